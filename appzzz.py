@@ -2,9 +2,17 @@
 import streamlit as st
 import pandas as pd
 import database
-from session_state import init_session_state
-from auto_save import salvar_tudo
-from models import Turma, Professor, Disciplina, Sala, DIAS_SEMANA, Aula
+from session_state import init_session_state, recarregar_do_banco
+from auto_save import salvar_tudo, salvar_edicao, obter_salvador, verificar_conflito_banco
+from models import (Turma, Professor, Disciplina, Sala, DIAS_SEMANA, Aula, inferir_segmento,
+                    segmento_da_turma, registrar_segmento, esquecer_segmento)
+from versoes_grade import obter_versoes
+from indice_grade import GradeIndex, indexar
+from registro_entidades import RegistroEntidades
+from horarios import HORARIOS
+from disponibilidade import contar, mascara_professor
+from matriz_grade import ScheduleMatrix
+from viabilidade_fluxo import analisar_viabilidade, descrever_gargalo
 import io
 import traceback
 from datetime import datetime
@@ -22,6 +30,7 @@ st.title("🕒 Gerador Inteligente de Grade Horária")
 ALGORITMOS_DISPONIVEIS = True
 try:
     from simple_scheduler import SimpleGradeHoraria
+    from multistart import gerar_grade_multistart
 except ImportError:
     ALGORITMOS_DISPONIVEIS = False
     
@@ -32,13 +41,16 @@ except ImportError:
             self.disciplinas = []
             self.salas = []
         
-        def gerar_grade(self):
+        def gerar_grade(self, ordenacao="aleatoria", reparar=True, verificar_viabilidade=True):
             st.error("❌ Algoritmo simples não disponível")
             return []
 
 # ============================================
 # INICIALIZAÇÃO
 # ============================================
+# Contadores do cache do banco no início deste rerun
+cache_banco_inicio = database.estatisticas_cache()
+
 try:
     init_session_state()
     st.success("✅ Sistema inicializado com sucesso!")
@@ -50,6 +62,10 @@ except Exception as e:
         st.rerun()
     st.stop()
 
+# Segmento de cada turma desta sessão, refeito a cada rerun a partir dos objetos
+# Turma (o registro de models é do processo, compartilhado entre as sessões)
+SEGMENTOS_TURMAS = {t.nome: t.segmento for t in st.session_state.turmas if getattr(t, 'segmento', None)}
+
 # ============================================
 # CONSTANTES E LIMITES
 # ============================================
@@ -72,26 +88,10 @@ def obter_grupo_seguro(objeto, opcoes=["A", "B", "AMBOS"]):
         return "A"
 
 def obter_segmento_turma(turma_nome):
-    """Determina o segmento da turma baseado no nome"""
+    """Segmento da turma: o da Turma desta sessão; models.segmento_da_turma só para nomes desconhecidos"""
     if not turma_nome:
         return "EF_II"
-    
-    turma_nome_lower = turma_nome.lower()
-    
-    # Verificar se é EM
-    if 'em' in turma_nome_lower:
-        return "EM"
-    # Verificar se é EF II
-    elif any(x in turma_nome_lower for x in ['6', '7', '8', '9', 'ano', 'ef']):
-        return "EF_II"
-    else:
-        try:
-            if turma_nome_lower[0].isdigit():
-                return "EF_II"
-            else:
-                return "EM"
-        except:
-            return "EF_II"
+    return SEGMENTOS_TURMAS.get(turma_nome) or segmento_da_turma(turma_nome)
 
 def obter_segmento_professor(professor):
     """Determina o segmento principal do professor baseado nas disciplinas que ministra"""
@@ -137,6 +137,9 @@ def obter_limite_horas_professor(professor):
 
 def calcular_horas_professor(professor, aulas):
     """Calcula horas semanais do professor baseado nas aulas"""
+    if isinstance(aulas, GradeIndex):
+        return aulas.horas_professor(professor.nome)
+    
     total_horas = 0
     
     for aula in aulas:
@@ -146,6 +149,28 @@ def calcular_horas_professor(professor, aulas):
     
     return total_horas
 
+def obter_aulas_indexadas():
+    """Aulas da sessão como GradeIndex (indexa de novo se a lista foi substituída)"""
+    aulas = st.session_state.get('aulas') or []
+    if not isinstance(aulas, GradeIndex):
+        aulas = GradeIndex(aulas)
+        st.session_state.aulas = aulas
+    return aulas
+
+def obter_registro():
+    """Registro de ids inteiros das entidades da sessão (nomes novos ganham id na primeira consulta)"""
+    if 'registro' not in st.session_state:
+        st.session_state.registro = RegistroEntidades()
+    return st.session_state.registro
+
+def obter_cargas_disciplinas():
+    """Carga semanal por (disciplina, turma), para consulta O(1)"""
+    cargas = {}
+    for disc in st.session_state.disciplinas:
+        for turma in disc.turmas:
+            cargas.setdefault((disc.nome, turma), disc.carga_semanal)
+    return cargas
+
 def obter_horarios_turma(turma_nome):
     """Retorna os períodos disponíveis para a turma"""
     segmento = obter_segmento_turma(turma_nome)
@@ -155,66 +180,19 @@ def obter_horarios_turma(turma_nome):
         return [1, 2, 3, 4, 5]  # 5 períodos para EF II
 
 def obter_horario_real(turma_nome, periodo):
-    """Retorna o horário real formatado COM INTERVALO CORRETO"""
-    segmento = obter_segmento_turma(turma_nome)
-    
-    if segmento == "EM":
-        # Ensino Médio: 7 períodos com intervalo APÓS o 3º período
-        horarios_em = {
-            1: "07:00 - 07:50",
-            2: "07:50 - 08:40", 
-            3: "08:40 - 09:30",  # ÚLTIMO ANTES DO INTERVALO
-            4: "09:50 - 10:40",  # PRIMEIRO APÓS INTERVALO
-            5: "10:40 - 11:30",
-            6: "11:30 - 12:20",
-            7: "12:20 - 13:10"
-        }
-        return horarios_em.get(periodo, f"Período {periodo}")
-    else:
-        # EF II: 5 períodos com intervalo APÓS o 2º período
-        horarios_efii = {
-            1: "07:50 - 08:40",
-            2: "08:40 - 09:30",  # ÚLTIMO ANTES DO INTERVALO
-            3: "09:50 - 10:40",  # PRIMEIRO APÓS INTERVALO
-            4: "10:40 - 11:30",
-            5: "11:30 - 12:20"
-        }
-        return horarios_efii.get(periodo, f"Período {periodo}")
+    """Retorna o horário real formatado COM INTERVALO CORRETO (tabela única de horarios.py)"""
+    return HORARIOS.rotulo(obter_segmento_turma(turma_nome), periodo)
 
 def obter_periodo_por_horario_real(turma_nome, horario_real):
     """Converte horário real para número do período baseado no segmento"""
-    segmento = obter_segmento_turma(turma_nome)
-    
-    if segmento == "EM":
-        # EM: 7 períodos
-        horarios_em = {
-            "07:00 - 07:50": 1,
-            "07:50 - 08:40": 2,
-            "08:40 - 09:30": 3,
-            "09:50 - 10:40": 4,
-            "10:40 - 11:30": 5,
-            "11:30 - 12:20": 6,
-            "12:20 - 13:10": 7
-        }
-        return horarios_em.get(horario_real, 0)
-    else:
-        # EF II: 5 períodos
-        horarios_efii = {
-            "07:50 - 08:40": 1,
-            "08:40 - 09:30": 2,
-            "09:50 - 10:40": 3,
-            "10:40 - 11:30": 4,
-            "11:30 - 12:20": 5
-        }
-        return horarios_efii.get(horario_real, 0)
+    return HORARIOS.periodo_por_rotulo(obter_segmento_turma(turma_nome), horario_real)
 
 def calcular_carga_maxima(serie):
     """Calcula a quantidade máxima de aulas semanais"""
     if not serie:
         return 25
     
-    serie_lower = serie.lower()
-    if 'em' in serie_lower or serie_lower in ['1em', '2em', '3em']:
+    if inferir_segmento(serie) == "EM":
         return 35  # EM: 7 aulas × 5 dias
     else:
         return 25  # EF II: 5 aulas × 5 dias
@@ -348,14 +326,8 @@ def obter_professores_para_disciplina(disciplina_nome, grupo=None):
 
 def calcular_disponibilidade_professor(professor):
     """Calcula disponibilidade semanal do professor em horas"""
-    dias_disponiveis = len(professor.disponibilidade) if hasattr(professor, 'disponibilidade') else 0
-    horarios_indisponiveis = len(professor.horarios_indisponiveis) if hasattr(professor, 'horarios_indisponiveis') else 0
-    
-    # Cada dia tem 7 períodos possíveis
-    total_periodos = dias_disponiveis * 7
-    periodos_disponiveis = total_periodos - horarios_indisponiveis
-    
-    return periodos_disponiveis
+    # Bits ligados da máscara (dia, período): dias disponíveis menos horários indisponíveis
+    return contar(mascara_professor(professor))
 
 def verificar_professor_comprometido(professor, disciplina_nome, grupo):
     """Verifica se um professor está comprometido com outras disciplinas"""
@@ -386,11 +358,30 @@ def verificar_professor_comprometido(professor, disciplina_nome, grupo):
 # FUNÇÕES PARA VERIFICAÇÃO E CORREÇÃO DE CONFLITOS (CORRIGIDAS)
 # ============================================
 
+def _codificador_horario_real(registro):
+    """(turma, período) -> (id da turma, horário real, id do horário real, segmento), calculado uma vez por par"""
+    memo = {}
+    ids_turma = registro.turmas.id
+    ids_horario = registro.tabela("horario_real").id
+    
+    def codificar(turma, horario_num):
+        chave = (turma, horario_num)
+        real = memo.get(chave)
+        if real is None:
+            hora_real = obter_horario_real(turma, horario_num)
+            real = memo[chave] = (ids_turma(turma), hora_real, ids_horario(hora_real), obter_segmento_turma(turma))
+        return real
+    
+    return codificar
+
 def verificar_conflitos_horarios(aulas):
     """Verifica se há horários sobrepostos na mesma turma considerando horários REAIS"""
     conflitos = []
     horarios_por_turma = {}
     aulas_por_disciplina_turma = {}
+    cargas = obter_cargas_disciplinas()
+    registro = obter_registro()
+    codificar = _codificador_horario_real(registro)
     
     for aula in aulas:
         turma = obter_turma_aula(aula)
@@ -401,19 +392,16 @@ def verificar_conflitos_horarios(aulas):
         if not turma or not dia or not horario_num or not disciplina:
             continue
         
-        # Obter horário REAL
-        hora_real = obter_horario_real(turma, horario_num)
-        segmento = obter_segmento_turma(turma)
+        # Obter horário REAL (e os ids inteiros usados nas chaves)
+        id_turma, hora_real, id_horario, segmento = codificar(turma, horario_num)
+        id_disciplina = registro.disciplinas.id(disciplina)
         
         # Chave baseada em horário REAL
-        chave_horario = f"{turma}|{dia}|{hora_real}"
-        
-        if chave_horario not in horarios_por_turma:
-            horarios_por_turma[chave_horario] = []
+        chave_horario = (id_turma, registro.dias.id(dia), id_horario)
+        no_horario = horarios_por_turma.setdefault(chave_horario, [])
         
         # VERIFICAÇÃO 1: Conflito no mesmo horário REAL
-        disciplinas_no_horario = [obter_disciplina_aula(a) for a in horarios_por_turma[chave_horario]]
-        if disciplina in disciplinas_no_horario:
+        if any(id_existente == id_disciplina for id_existente, _ in no_horario):
             # AULA REPETIDA - mesma disciplina já alocada neste horário REAL
             conflitos.append({
                 'tipo': 'repeticao_mesmo_horario',
@@ -422,13 +410,13 @@ def verificar_conflitos_horarios(aulas):
                 'horario_real': hora_real,
                 'horario_num': horario_num,
                 'disciplina': disciplina,
-                'chave': chave_horario,
+                'chave': f"{turma}|{dia}|{hora_real}",
                 'segmento': segmento
             })
         else:
-            horarios_por_turma[chave_horario].append(aula)
+            no_horario.append((id_disciplina, aula))
             
-            if len(horarios_por_turma[chave_horario]) > 1:
+            if len(no_horario) > 1:
                 # CONFLITO DETECTADO! Horário sobreposto com disciplinas diferentes
                 conflitos.append({
                     'tipo': 'sobreposicao',
@@ -436,35 +424,27 @@ def verificar_conflitos_horarios(aulas):
                     'dia': dia,
                     'horario_real': hora_real,
                     'horario_num': horario_num,
-                    'aulas': horarios_por_turma[chave_horario].copy(),
-                    'disciplinas': [obter_disciplina_aula(a) for a in horarios_por_turma[chave_horario]],
-                    'chave': chave_horario,
+                    'aulas': [a for _, a in no_horario],
+                    'disciplinas': [registro.disciplinas.nomes[d] for d, _ in no_horario],
+                    'chave': f"{turma}|{dia}|{hora_real}",
                     'segmento': segmento
                 })
         
         # VERIFICAÇÃO 2: Aulas repetidas em excesso
-        chave_disc_turma = f"{turma}|{disciplina}"
-        
-        if chave_disc_turma not in aulas_por_disciplina_turma:
-            aulas_por_disciplina_turma[chave_disc_turma] = []
-        
-        aulas_por_disciplina_turma[chave_disc_turma].append(aula)
+        quantidade = aulas_por_disciplina_turma.get((id_turma, id_disciplina), 0) + 1
+        aulas_por_disciplina_turma[(id_turma, id_disciplina)] = quantidade
         
         # Obter carga semanal necessária
-        carga_necessaria = 0
-        for disc in st.session_state.disciplinas:
-            if disc.nome == disciplina and turma in disc.turmas:
-                carga_necessaria = disc.carga_semanal
-                break
+        carga_necessaria = cargas.get((disciplina, turma), 0)
         
-        if len(aulas_por_disciplina_turma[chave_disc_turma]) > carga_necessaria:
+        if quantidade > carga_necessaria:
             conflitos.append({
                 'tipo': 'excesso_aulas',
                 'turma': turma,
                 'disciplina': disciplina,
-                'quantidade': len(aulas_por_disciplina_turma[chave_disc_turma]),
+                'quantidade': quantidade,
                 'necessario': carga_necessaria,
-                'chave': chave_disc_turma,
+                'chave': f"{turma}|{disciplina}",
                 'segmento': segmento
             })
     
@@ -474,6 +454,8 @@ def verificar_professor_superposto(aulas):
     """Verifica se o mesmo professor tem aulas em horários REAIS sobrepostos"""
     superposicoes = []
     horarios_por_professor = {}
+    registro = obter_registro()
+    codificar = _codificador_horario_real(registro)
     
     for aula in aulas:
         professor = obter_professor_aula(aula)
@@ -485,29 +467,25 @@ def verificar_professor_superposto(aulas):
             continue
         
         # Obter horário REAL
-        hora_real = obter_horario_real(turma, horario_num)
-        segmento = obter_segmento_turma(turma)
+        id_turma, hora_real, id_horario, segmento = codificar(turma, horario_num)
         
         # Chave baseada em horário REAL
-        chave = f"{professor}|{dia}|{hora_real}"
-        
-        if chave not in horarios_por_professor:
-            horarios_por_professor[chave] = []
+        chave = (registro.professores.id(professor), registro.dias.id(dia), id_horario)
+        no_horario = horarios_por_professor.setdefault(chave, [])
+        no_horario.append((aula, turma, segmento))
         
-        horarios_por_professor[chave].append(aula)
-        
-        if len(horarios_por_professor[chave]) > 1:
+        if len(no_horario) > 1:
             # SUPERPOSIÇÃO DETECTADA! Professor no mesmo horário REAL
             superposicoes.append({
                 'professor': professor,
                 'dia': dia,
                 'horario_real': hora_real,
                 'horario_num': horario_num,
-                'aulas': horarios_por_professor[chave].copy(),
-                'turmas': [obter_turma_aula(a) for a in horarios_por_professor[chave]],
-                'disciplinas': [obter_disciplina_aula(a) for a in horarios_por_professor[chave]],
-                'segmentos': [obter_segmento_turma(obter_turma_aula(a)) for a in horarios_por_professor[chave]],
-                'chave': chave
+                'aulas': [a for a, _, _ in no_horario],
+                'turmas': [t for _, t, _ in no_horario],
+                'disciplinas': [obter_disciplina_aula(a) for a, _, _ in no_horario],
+                'segmentos': [s for _, _, s in no_horario],
+                'chave': f"{professor}|{dia}|{hora_real}"
             })
     
     return superposicoes
@@ -515,6 +493,8 @@ def verificar_professor_superposto(aulas):
 def analisar_superposicoes_por_horario_real(aulas):
     """Analisa superposições agrupando por horário REAL (para diagnóstico)"""
     analise = {}
+    registro = obter_registro()
+    codificar = _codificador_horario_real(registro)
     
     for aula in aulas:
         professor = obter_professor_aula(aula)
@@ -526,10 +506,9 @@ def analisar_superposicoes_por_horario_real(aulas):
             continue
         
         # Obter horário REAL
-        hora_real = obter_horario_real(turma, horario_num)
-        segmento = obter_segmento_turma(turma)
+        id_turma, hora_real, id_horario, segmento = codificar(turma, horario_num)
         
-        chave = f"{professor}|{dia}|{hora_real}"
+        chave = (registro.professores.id(professor), registro.dias.id(dia), id_horario)
         
         if chave not in analise:
             analise[chave] = {
@@ -547,14 +526,16 @@ def analisar_superposicoes_por_horario_real(aulas):
         analise[chave]['segmentos'].append(segmento)
         analise[chave]['horarios_numericos'].append(horario_num)
     
-    # Filtrar apenas os que têm superposição
-    superposicoes = {k: v for k, v in analise.items() if len(v['aulas']) > 1}
+    # Filtrar apenas os que têm superposição (chaves legíveis só no resultado)
+    superposicoes = {f"{v['professor']}|{v['dia']}|{v['horario_real']}": v
+                     for v in analise.values() if len(v['aulas']) > 1}
     
     return superposicoes
 
 def verificar_limites_professores(aulas):
     """Verifica se algum professor excedeu o limite de horas"""
     problemas = []
+    aulas = indexar(aulas)
     
     for professor in st.session_state.professores:
         horas_atual = calcular_horas_professor(professor, aulas)
@@ -581,6 +562,7 @@ def remover_aulas_repetidas(aulas):
     
     aulas_filtradas = []
     contador = {}
+    cargas = obter_cargas_disciplinas()
     
     for aula in aulas:
         turma = obter_turma_aula(aula)
@@ -593,11 +575,7 @@ def remover_aulas_repetidas(aulas):
         chave = f"{turma}|{disciplina}"
         
         # Obter carga semanal necessária
-        carga_necessaria = 0
-        for disc in st.session_state.disciplinas:
-            if disc.nome == disciplina and turma in disc.turmas:
-                carga_necessaria = disc.carga_semanal
-                break
+        carga_necessaria = cargas.get((disciplina, turma), 0)
         
         # Inicializar contador se não existir
         if chave not in contador:
@@ -638,6 +616,7 @@ def corrigir_superposicoes_professor(aulas, superposicoes):
             'segmento': obter_segmento_aula(aula) or obter_segmento_turma(turma),
             'id_temporario': len(aulas_dict)
         })
+    indice = GradeIndex(aulas_dict)
     
     # Para cada superposição, tentar encontrar horário livre
     for superposicao in superposicoes:
@@ -670,27 +649,16 @@ def corrigir_superposicoes_professor(aulas, superposicoes):
                 else:
                     horarios_possiveis = list(range(1, 6))
                 
-                # Encontrar horários já ocupados nesta turma/dia (horários REAIS)
-                horarios_ocupados_turma = set()
-                horarios_ocupados_prof = set()
-                
-                for a in aulas_dict:
-                    if a['turma'] == turma and a['dia'] == dia:
-                        horarios_ocupados_turma.add(a['horario'])
-                    
-                    if a['professor'] == professor and a['dia'] == dia:
-                        horarios_ocupados_prof.add(a['horario'])
-                
                 # Prioridade 1: Encontrar horário livre no MESMO DIA
                 horario_livre = None
                 for h in horarios_possiveis:
-                    if h not in horarios_ocupados_turma and h not in horarios_ocupados_prof:
+                    if not indice.turma_ocupada(turma, dia, h) and not indice.professor_ocupado(professor, dia, h):
                         horario_livre = h
                         break
                 
                 # Se encontrou horário livre no mesmo dia, mover a aula
                 if horario_livre:
-                    aulas_dict[idx]['horario'] = horario_livre
+                    indice.mover(aulas_dict[idx], dia, horario_livre)
                     aulas_dict[idx]['horario_real'] = obter_horario_real(turma, horario_livre)
                     st.success(f"  • Movida aula de {aula['disciplina']} (Turma {turma}) para horário {horario_livre}º ({aulas_dict[idx]['horario_real']})")
                 
@@ -702,25 +670,16 @@ def corrigir_superposicoes_professor(aulas, superposicoes):
                     encontrou_novo_dia = False
                     for novo_dia in dias_semana:
                         # Verificar se turma tem horário livre neste novo dia
-                        turma_horarios_livres = []
-                        for h in horarios_possiveis:
-                            turma_ocupada = False
-                            prof_ocupado = False
-                            
-                            for a in aulas_dict:
-                                if a['turma'] == turma and a['dia'] == novo_dia and a['horario'] == h:
-                                    turma_ocupada = True
-                                if a['professor'] == professor and a['dia'] == novo_dia and a['horario'] == h:
-                                    prof_ocupado = True
-                            
-                            if not turma_ocupada and not prof_ocupado:
-                                turma_horarios_livres.append(h)
+                        turma_horarios_livres = [
+                            h for h in horarios_possiveis
+                            if not indice.turma_ocupada(turma, novo_dia, h)
+                            and not indice.professor_ocupado(professor, novo_dia, h)
+                        ]
                         
                         if turma_horarios_livres:
                             # Escolher o primeiro horário livre
                             novo_horario = turma_horarios_livres[0]
-                            aulas_dict[idx]['dia'] = novo_dia
-                            aulas_dict[idx]['horario'] = novo_horario
+                            indice.mover(aulas_dict[idx], novo_dia, novo_horario)
                             aulas_dict[idx]['horario_real'] = obter_horario_real(turma, novo_horario)
                             encontrou_novo_dia = True
                             st.success(f"  • Movida aula de {aula['disciplina']} (Turma {turma}) para {novo_dia}, {novo_horario}º ({aulas_dict[idx]['horario_real']})")
@@ -1074,7 +1033,7 @@ def diagnosticar_grade(turmas, professores, disciplinas, aulas_alocadas):
         horarios_indisponiveis = len(professor.horarios_indisponiveis) if hasattr(professor, 'horarios_indisponiveis') else 0
         
         # Calcular capacidade máxima baseada em disponibilidade
-        capacidade_maxima = dias_disponiveis * 7 - horarios_indisponiveis
+        capacidade_maxima = contar(mascara_professor(professor))
         
         # Calcular limite baseado no segmento
         limite_segmento = obter_limite_horas_professor(professor)
@@ -1493,9 +1452,14 @@ class CompletadorDeGradeAvancado:
         # Quanto menos professores livres, maior a prioridade
         return (10 - professores_livres) * 2 + (5 - professores_disponiveis)
     
+    def _matriz(self, grade):
+        """ScheduleMatrix da grade (ocupação de turmas/professores para consultas O(1))"""
+        return ScheduleMatrix.de_aulas(grade, self.turmas, self.professores, self.disciplinas)
+    
     def _estrategia_preencher_buracos(self, aulas, analise):
         """Preenche buracos óbvios na grade"""
         nova_grade = aulas.copy()
+        matriz = self._matriz(nova_grade)
         
         # Ordenar turmas por número de faltas
         turmas_ordenadas = []
@@ -1543,8 +1507,8 @@ class CompletadorDeGradeAvancado:
                     
                     # Tentar cada professor
                     for professor in professores_candidatos:
-                        # Verificar disponibilidade do professor
-                        if self._professor_disponivel(nova_grade, professor.nome, dia, horario):
+                        # Verificar disponibilidade do professor (horário REAL)
+                        if matriz.professor_livre(professor.nome, dia, obter_segmento_turma(turma_nome), horario):
                             # Verificar se não está bloqueado
                             if f"{dia}_{horario}" in professor.horarios_indisponiveis:
                                 continue
@@ -1557,14 +1521,16 @@ class CompletadorDeGradeAvancado:
                                 continue  # Professor já atingiu limite
                             
                             # Alocar aula
-                            nova_grade.append({
+                            nova_aula = {
                                 'turma': turma_nome,
                                 'disciplina': disciplina,
                                 'professor': professor.nome,
                                 'dia': dia,
                                 'horario': horario,
                                 'segmento': obter_segmento_turma(turma_nome)
-                            })
+                            }
+                            nova_grade.append(nova_aula)
+                            matriz.adicionar(nova_aula)
                             
                             # Atualizar contadores
                             falta['faltam'] -= 1
@@ -1580,6 +1546,7 @@ class CompletadorDeGradeAvancado:
     def _estrategia_rebalancear_professores(self, aulas, analise):
         """Rebalanceia carga entre professores"""
         nova_grade = aulas.copy()
+        matriz = self._matriz(nova_grade)
         
         # Encontrar professores sobrecarregados
         professores_sobrecarregados = []
@@ -1613,7 +1580,7 @@ class CompletadorDeGradeAvancado:
                             # Verificar se não está comprometido
                             if not verificar_professor_comprometido(prof, disciplina, grupo_turma):
                                 # Verificar disponibilidade no mesmo horário
-                                if self._professor_disponivel(nova_grade, prof.nome, aula['dia'], aula['horario']):
+                                if matriz.professor_livre(prof.nome, aula['dia'], aula['segmento'], aula['horario']):
                                     if f"{aula['dia']}_{aula['horario']}" not in prof.horarios_indisponiveis:
                                         # Verificar limite do professor
                                         carga_alternativo = analise['professores_carga'].get(prof.nome, 0)
@@ -1632,7 +1599,9 @@ class CompletadorDeGradeAvancado:
                     for i, a in enumerate(nova_grade):
                         if (a['turma'] == turma_nome and a['disciplina'] == disciplina and 
                             a['dia'] == aula['dia'] and a['horario'] == aula['horario']):
+                            matriz.remover(nova_grade[i])
                             nova_grade[i]['professor'] = novo_professor.nome
+                            matriz.adicionar(nova_grade[i])
                             break
                     
                     # Atualizar cargas
@@ -1645,6 +1614,7 @@ class CompletadorDeGradeAvancado:
     def _estrategia_permutar_horarios(self, aulas, analise):
         """Permuta horários para criar espaços"""
         nova_grade = aulas.copy()
+        matriz = self._matriz(nova_grade)
         
         # Para cada turma com faltas
         for turma_nome, faltas in analise['faltas_por_turma'].items():
@@ -1660,16 +1630,9 @@ class CompletadorDeGradeAvancado:
                 for outra_aula in nova_grade:
                     if outra_aula['turma'] != turma_nome:
                         # Tentar trocar horários
-                        if self._permutacao_valida(nova_grade, aula, outra_aula):
+                        if self._permutacao_valida(nova_grade, aula, outra_aula, matriz):
                             # Realizar troca
-                            dia_temp = aula['dia']
-                            horario_temp = aula['horario']
-                            
-                            aula['dia'] = outra_aula['dia']
-                            aula['horario'] = outra_aula['horario']
-                            
-                            outra_aula['dia'] = dia_temp
-                            outra_aula['horario'] = horario_temp
+                            self._trocar(matriz, aula, outra_aula)
         
         return nova_grade
     
@@ -1678,8 +1641,12 @@ class CompletadorDeGradeAvancado:
         melhor_grade = aulas.copy()
         melhor_completude = analise['completude']
         
+        melhor_matriz = self._matriz(melhor_grade)
+        
         for _ in range(50):  # 50 iterações
-            grade_tentativa = melhor_grade.copy()
+            # Cópia das aulas e snapshot copy-on-write da ocupação: a tentativa não altera a melhor grade
+            grade_tentativa = [dict(a) for a in melhor_grade]
+            matriz = melhor_matriz.copiar()
             
             # Aplicar operação aleatória
             operacao = random.choice(['mover', 'trocar', 'realocar'])
@@ -1696,9 +1663,8 @@ class CompletadorDeGradeAvancado:
                     novo_dia, novo_horario = random.choice(horarios_livres)
                     
                     # Verificar se professor está disponível
-                    if self._professor_disponivel(grade_tentativa, aula['professor'], novo_dia, novo_horario):
-                        grade_tentativa[aula_idx]['dia'] = novo_dia
-                        grade_tentativa[aula_idx]['horario'] = novo_horario
+                    if matriz.professor_livre(aula['professor'], novo_dia, aula['segmento'], novo_horario):
+                        matriz.mover(aula, novo_dia, novo_horario)
             
             elif operacao == 'trocar' and len(grade_tentativa) >= 2:
                 # Trocar duas aulas de lugar
@@ -1707,38 +1673,49 @@ class CompletadorDeGradeAvancado:
                 aula2 = grade_tentativa[idx2]
                 
                 # Verificar se troca é válida
-                if (self._professor_disponivel(grade_tentativa, aula1['professor'], aula2['dia'], aula2['horario']) and
-                    self._professor_disponivel(grade_tentativa, aula2['professor'], aula1['dia'], aula1['horario'])):
+                if (self._professor_disponivel(grade_tentativa, aula1['professor'], aula2['dia'], aula2['horario'], matriz, aula1['segmento']) and
+                    self._professor_disponivel(grade_tentativa, aula2['professor'], aula1['dia'], aula1['horario'], matriz, aula2['segmento'])):
                     
                     # Trocar horários
-                    dia_temp = aula1['dia']
-                    horario_temp = aula1['horario']
-                    
-                    grade_tentativa[idx1]['dia'] = aula2['dia']
-                    grade_tentativa[idx1]['horario'] = aula2['horario']
-                    
-                    grade_tentativa[idx2]['dia'] = dia_temp
-                    grade_tentativa[idx2]['horario'] = horario_temp
+                    self._trocar(matriz, aula1, aula2)
             
             # Avaliar nova grade
             nova_analise = self._analisar_estado(grade_tentativa)
             
             if nova_analise['completude'] > melhor_completude:
                 melhor_grade = grade_tentativa
+                melhor_matriz = matriz
                 melhor_completude = nova_analise['completude']
         
         return melhor_grade
     
-    def _professor_disponivel(self, grade, professor_nome, dia, horario):
-        """Verifica se professor está disponível em determinado horário"""
+    def _professor_disponivel(self, grade, professor_nome, dia, horario, matriz=None, segmento=None):
+        """Verifica se professor está disponível em determinado horário (REAL, se houver matriz)"""
+        if matriz is not None:
+            return matriz.professor_livre(professor_nome, dia, segmento, horario)
         for aula in grade:
             if aula['professor'] == professor_nome:
                 if aula['dia'] == dia and aula['horario'] == horario:
                     return False
         return True
     
-    def _permutacao_valida(self, grade, aula1, aula2):
+    def _trocar(self, matriz, aula1, aula2):
+        """Troca dia/horário de duas aulas mantendo a matriz"""
+        matriz.remover(aula1)
+        matriz.remover(aula2)
+        aula1['dia'], aula2['dia'] = aula2['dia'], aula1['dia']
+        aula1['horario'], aula2['horario'] = aula2['horario'], aula1['horario']
+        matriz.adicionar(aula1)
+        matriz.adicionar(aula2)
+    
+    def _permutacao_valida(self, grade, aula1, aula2, matriz=None):
         """Verifica se permutação entre duas aulas é válida"""
+        if matriz is not None:
+            return (matriz.professor_livre(aula1['professor'], aula2['dia'], aula1['segmento'], aula2['horario']) and
+                    matriz.professor_livre(aula2['professor'], aula1['dia'], aula2['segmento'], aula1['horario']) and
+                    matriz.turma_livre(aula1['turma'], aula2['dia'], aula2['horario']) and
+                    matriz.turma_livre(aula2['turma'], aula1['dia'], aula1['horario']))
+        
         # Verificar disponibilidade dos professores nos novos horários
         prof1_livre = self._professor_disponivel(grade, aula1['professor'], aula2['dia'], aula2['horario'])
         prof2_livre = self._professor_disponivel(grade, aula2['professor'], aula1['dia'], aula1['horario'])
@@ -1776,10 +1753,7 @@ class CompletadorDeGradeAvancado:
 # ============================================
 
 def salvar_grade_como(nome, aulas, config):
-    """Salva uma grade com um nome específico"""
-    if not hasattr(st.session_state, 'grades_salvas'):
-        st.session_state.grades_salvas = {}
-    
+    """Salva uma grade com um nome específico (versão persistida como delta)"""
     # Converter para dicionários
     aulas_dict = []
     for aula in aulas:
@@ -1804,13 +1778,13 @@ def salvar_grade_como(nome, aulas, config):
                 'segmento': obter_segmento_aula(aula)
             })
     
-    st.session_state.grades_salvas[nome] = {
-        'aulas': aulas_dict,
-        'config': config,
-        'data': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'total_aulas': len(aulas_dict)
-    }
+    try:
+        obter_versoes().salvar(nome, aulas_dict, config, pai=st.session_state.get('grade_versao_atual'))
+    except Exception as e:
+        st.error(f"❌ Erro ao salvar a grade: {str(e)}")
+        return False
     
+    st.session_state.grade_versao_atual = nome
     return True
 
 # ============================================
@@ -1939,7 +1913,7 @@ with abas[1]:
                             nome, carga, tipo, turmas_selecionadas, grupo, cor_fundo, cor_fonte
                         )
                         st.session_state.disciplinas.append(nova_disciplina)
-                        if salvar_tudo():
+                        if salvar_edicao():
                             st.success(f"✅ Disciplina '{nome}' adicionada!")
                         st.rerun()
                     except Exception as e:
@@ -2002,7 +1976,7 @@ with abas[1]:
                                 disc.cor_fundo = nova_cor_fundo
                                 disc.cor_fonte = nova_cor_fonte
                                 
-                                if salvar_tudo():
+                                if salvar_edicao():
                                     st.success("✅ Disciplina atualizada!")
                                 st.rerun()
                             except Exception as e:
@@ -2014,7 +1988,7 @@ with abas[1]:
                     if st.form_submit_button("🗑️ Excluir Disciplina", type="secondary"):
                         try:
                             st.session_state.disciplinas.remove(disc)
-                            if salvar_tudo():
+                            if salvar_edicao():
                                 st.success("✅ Disciplina excluída!")
                             st.rerun()
                         except Exception as e:
@@ -2059,7 +2033,7 @@ with abas[1]:
                         # Calcular carga atual (se houver aulas na grade)
                         carga_atual = 0
                         if hasattr(st.session_state, 'aulas') and st.session_state.aulas:
-                            carga_atual = calcular_horas_professor(prof, st.session_state.aulas)
+                            carga_atual = calcular_horas_professor(prof, obter_aulas_indexadas())
                         
                         status = "✅" if carga_atual < limite else "⚠️" if carga_atual == limite else "❌"
                         
@@ -2183,7 +2157,7 @@ with abas[2]:
                             horarios_indisponiveis
                         )
                         st.session_state.professores.append(novo_professor)
-                        if salvar_tudo():
+                        if salvar_edicao():
                             st.success(f"✅ Professor '{nome}' adicionado!")
                         st.rerun()
                     except Exception as e:
@@ -2212,7 +2186,7 @@ with abas[2]:
             # Calcular carga atual (se houver aulas na grade)
             carga_atual = 0
             if hasattr(st.session_state, 'aulas') and st.session_state.aulas:
-                carga_atual = calcular_horas_professor(prof, st.session_state.aulas)
+                carga_atual = calcular_horas_professor(prof, obter_aulas_indexadas())
             
             # Mostrar informações
             col1, col2, col3 = st.columns(3)
@@ -2313,7 +2287,7 @@ with abas[2]:
                                 prof.disponibilidade = disponibilidade_completa
                                 prof.horarios_indisponiveis = novos_horarios_indisponiveis
                                 
-                                if salvar_tudo():
+                                if salvar_edicao():
                                     st.success("✅ Professor atualizado!")
                                 st.rerun()
                             except Exception as e:
@@ -2325,7 +2299,7 @@ with abas[2]:
                     if st.form_submit_button("🗑️ Excluir Professor", type="secondary"):
                         try:
                             st.session_state.professores.remove(prof)
-                            if salvar_tudo():
+                            if salvar_edicao():
                                 st.success("✅ Professor excluído!")
                             st.rerun()
                         except Exception as e:
@@ -2349,7 +2323,7 @@ with abas[3]:
                 turno = st.selectbox("Turno*", ["manha"], disabled=True)
                 grupo = st.selectbox("Grupo*", ["A", "B"])
             
-            segmento = "EM" if serie and 'em' in serie.lower() else "EF_II"
+            segmento = inferir_segmento(serie)
             st.info(f"💡 Segmento: {segmento} - {calcular_carga_maxima(serie)}h semanais máximas")
             
             if st.form_submit_button("✅ Adicionar Turma"):
@@ -2357,7 +2331,7 @@ with abas[3]:
                     try:
                         nova_turma = Turma(nome, serie, "manha", grupo, segmento)
                         st.session_state.turmas.append(nova_turma)
-                        if salvar_tudo():
+                        if salvar_edicao():
                             st.success(f"✅ Turma '{nome}' adicionada!")
                         st.rerun()
                     except Exception as e:
@@ -2416,11 +2390,16 @@ with abas[3]:
                     if st.form_submit_button("💾 Salvar Alterações"):
                         if novo_nome and nova_serie:
                             try:
+                                nome_anterior = turma.nome
+                                if nova_serie != turma.serie:
+                                    # Mesma regra do cadastro: o segmento vem da série
+                                    turma.segmento = inferir_segmento(nova_serie)
                                 turma.nome = novo_nome
                                 turma.serie = nova_serie
                                 turma.grupo = novo_grupo
+                                registrar_segmento(turma.nome, turma.segmento, nome_anterior)
                                 
-                                if salvar_tudo():
+                                if salvar_edicao():
                                     st.success("✅ Turma atualizada!")
                                 st.rerun()
                             except Exception as e:
@@ -2432,7 +2411,8 @@ with abas[3]:
                     if st.form_submit_button("🗑️ Excluir Turma", type="secondary"):
                         try:
                             st.session_state.turmas.remove(turma)
-                            if salvar_tudo():
+                            esquecer_segmento(turma.nome)
+                            if salvar_edicao():
                                 st.success("✅ Turma excluída!")
                             st.rerun()
                         except Exception as e:
@@ -2458,7 +2438,7 @@ with abas[4]:
                     try:
                         nova_sala = Sala(nome, capacidade, tipo)
                         st.session_state.salas.append(nova_sala)
-                        if salvar_tudo():
+                        if salvar_edicao():
                             st.success(f"✅ Sala '{nome}' adicionada!")
                         st.rerun()
                     except Exception as e:
@@ -2495,7 +2475,7 @@ with abas[4]:
                                 sala.capacidade = nova_capacidade
                                 sala.tipo = novo_tipo
                                 
-                                if salvar_tudo():
+                                if salvar_edicao():
                                     st.success("✅ Sala atualizada!")
                                 st.rerun()
                             except Exception as e:
@@ -2507,7 +2487,7 @@ with abas[4]:
                     if st.form_submit_button("🗑️ Excluir Sala", type="secondary"):
                         try:
                             st.session_state.salas.remove(sala)
-                            if salvar_tudo():
+                            if salvar_edicao():
                                 st.success("✅ Sala excluída!")
                             st.rerun()
                         except Exception as e:
@@ -2543,7 +2523,39 @@ with abas[5]:
     with col2:
         tipo_algoritmo = st.selectbox(
             "Algoritmo de Geração",
-            ["Algoritmo Simples (Rápido)"]
+            ["Algoritmo Simples (Rápido)", "Algoritmo Simples - Mais Restritas Primeiro",
+             "Algoritmo Simples - Emparelhamento de Professores", "Busca com Backtracking (Completa)"],
+            help="Mais Restritas Primeiro aloca antes as aulas com menos horários e professores possíveis; "
+                 "o emparelhamento coloca cada aula no horário com mais professores sobrando, remaneja os "
+                 "professores já escolhidos para abrir vaga e equilibra a carga no fim (cerca de 1 ponto "
+                 "de completude a mais que o Rápido, levando até o dobro do tempo; não garante 100%); "
+                 "a busca com backtracking volta atrás nos conflitos até 30 s e completa o resto pelo algoritmo simples"
+        )
+        
+        execucoes_multistart = 1
+        if tipo_algoritmo == "Algoritmo Simples (Rápido)":
+            execucoes_multistart = st.number_input(
+                "Execuções em paralelo (multi-start)", min_value=1, max_value=64, value=1,
+                help="Roda o algoritmo (aleatório) várias vezes com sementes diferentes, em todos os núcleos, "
+                     "e fica com a grade mais completa (para na primeira com 100%)"
+            )
+        
+        reparar_sobras = st.checkbox(
+            "Reparar aulas que sobraram (cadeias de ejeção)", value=True,
+            help="Depois da alocação, tenta encaixar cada aula sem horário tirando uma aula do "
+                 "caminho e recolocando-a em outro lugar, ou trocando dois horários inteiros"
+        )
+        
+        refinar_tabu = st.checkbox(
+            "Refinar com busca tabu (5 s)", value=False,
+            help="Depois de gerar, move e troca aulas dentro de cada turma para eliminar conflitos "
+                 "e reduzir janelas e aulas fora do horário ideal"
+        )
+        
+        otimizar_preferencias = st.checkbox(
+            "Otimizar preferências pedagógicas (recozimento)", value=False,
+            help="Reorganiza a grade sem criar conflitos: pesadas cedo, práticas depois do intervalo, "
+                 "menos janelas de professor, disciplinas espalhadas e dias equilibrados"
         )
         
         tipo_completador = st.selectbox(
@@ -2662,8 +2674,30 @@ with abas[5]:
                             disciplinas=disciplinas_filtradas,
                             salas=st.session_state.salas
                         )
-                        aulas = simple_grade.gerar_grade()
-                        metodo = "Algoritmo Simples"
+                        if execucoes_multistart > 1:
+                            aulas, resumo_multistart = gerar_grade_multistart(
+                                turmas_filtradas, professores_filtrados, disciplinas_filtradas,
+                                st.session_state.salas, execucoes=int(execucoes_multistart),
+                                reparar=reparar_sobras
+                            )
+                            st.info(f"🎲 Multi-start: {resumo_multistart['execucoes']} execuções em "
+                                    f"{resumo_multistart['processos']} processos, melhor semente "
+                                    f"{resumo_multistart['semente']} com {resumo_multistart['completude']:.1f}% "
+                                    f"(média {resumo_multistart['media_completude']:.1f}%) em "
+                                    f"{resumo_multistart['tempo_ms']:.0f} ms")
+                            metodo = f"Algoritmo Simples (Multi-start, {resumo_multistart['execucoes']} execuções)"
+                        elif tipo_algoritmo == "Algoritmo Simples - Mais Restritas Primeiro":
+                            aulas = simple_grade.gerar_grade(ordenacao="restritiva", reparar=reparar_sobras)
+                            metodo = "Algoritmo Simples (Mais Restritas Primeiro)"
+                        elif tipo_algoritmo == "Algoritmo Simples - Emparelhamento de Professores":
+                            aulas = simple_grade.gerar_grade(ordenacao="emparelhamento", reparar=reparar_sobras)
+                            metodo = "Algoritmo Simples (Emparelhamento de Professores)"
+                        elif tipo_algoritmo == "Busca com Backtracking (Completa)":
+                            aulas = simple_grade.gerar_grade(ordenacao="backtracking", reparar=reparar_sobras)
+                            metodo = "Busca com Backtracking"
+                        else:
+                            aulas = simple_grade.gerar_grade(reparar=reparar_sobras)
+                            metodo = "Algoritmo Simples"
                         
                         # ============================================
                         # ETAPA 1: REMOVER AULAS REPETIDAS
@@ -2675,6 +2709,25 @@ with abas[5]:
                         if aulas_antes_repetidas > aulas_depois_repetidas:
                             st.info(f"ℹ️ Removidas {aulas_antes_repetidas - aulas_depois_repetidas} aulas repetidas automaticamente")
                         
+                        if refinar_tabu and aulas:
+                            aulas = simple_grade.otimizar_grade(aulas)
+                            tabu = simple_grade.estatisticas_tabu
+                            st.info(f"🔁 Busca tabu: violações {tabu['violacoes_inicial']} → {tabu['violacoes_final']}, "
+                                    f"penalidade suave {tabu['suave_inicial']} → {tabu['suave_final']} "
+                                    f"({tabu['iteracoes']} iterações, {tabu['tempo_ms']:.0f} ms)")
+                            metodo += " + Busca Tabu"
+                        
+                        if otimizar_preferencias and aulas:
+                            aulas = simple_grade.otimizar_preferencias(aulas)
+                            recozimento = simple_grade.recozimento.estatisticas
+                            st.info(f"🌡️ Recozimento: pontuação {recozimento['pontuacao_inicial']:.0f} → "
+                                    f"{recozimento['pontuacao_final']:.0f} "
+                                    f"({recozimento['iteracoes']} iterações, {recozimento['tempo_ms']:.0f} ms)")
+                            st.download_button("📈 Baixar traço do recozimento (CSV)",
+                                               simple_grade.recozimento.traco_csv(),
+                                               file_name="traco_recozimento.csv", mime="text/csv")
+                            metodo += " + Recozimento"
+                        
                         # Filtrar por turma específica se necessário
                         if tipo_grade == "Grade por Turma Específica" and turma_selecionada:
                             aulas = [a for a in aulas if obter_turma_aula(a) == turma_selecionada]
@@ -2904,18 +2957,15 @@ with abas[5]:
                         if aulas:
                             st.subheader("📅 Visualização da Grade Horária (COM HORÁRIOS REAIS)")
                             
-                            # Usar função segura para obter turmas
-                            turmas_com_aulas = []
-                            for a in aulas:
-                                turma = obter_turma_aula(a)
-                                if turma and turma not in turmas_com_aulas:
-                                    turmas_com_aulas.append(turma)
+                            # Índice por turma e por (turma, dia, período): cada célula é uma consulta O(1)
+                            indice_aulas = indexar(aulas)
+                            turmas_com_aulas = [turma for turma in indice_aulas.por_turma if turma and indice_aulas.por_turma[turma]]
                             
                             for turma_nome in turmas_com_aulas:
                                 st.write(f"#### 🎒 Grade da Turma: {turma_nome}")
                                 
                                 # Filtrar aulas da turma
-                                aulas_turma = [a for a in aulas if obter_turma_aula(a) == turma_nome]
+                                aulas_turma = indice_aulas.da_turma(turma_nome)
                                 
                                 # Determinar segmento e períodos
                                 segmento = obter_segmento_turma(turma_nome)
@@ -3000,11 +3050,8 @@ with abas[5]:
                                     
                                     for dia in dias_ordenados:
                                         # Procurar aula
-                                        aula_encontrada = None
-                                        for aula in aulas_turma:
-                                            if obter_dia_aula(aula) == dia and obter_horario_aula(aula) == periodo:
-                                                aula_encontrada = aula
-                                                break
+                                        aulas_celula = indice_aulas.na_turma(turma_nome, dia, periodo)
+                                        aula_encontrada = aulas_celula[0] if aulas_celula else None
                                         
                                         if aula_encontrada:
                                             # Obter dados da aula
@@ -3114,11 +3161,8 @@ with abas[6]:
         # Filtros
         col1, col2 = st.columns(2)
         with col1:
-            options_set = set()
-            for a in st.session_state.aulas:
-                prof = obter_professor_aula(a)
-                if prof:
-                    options_set.add(prof)
+            indice_aulas = obter_aulas_indexadas()
+            options_set = {prof for prof, aulas_prof in indice_aulas.por_professor.items() if prof and aulas_prof}
             options = list(sorted(options_set))
             
             professor_selecionado = st.selectbox(
@@ -3129,7 +3173,7 @@ with abas[6]:
         
         if professor_selecionado:
             # Filtrar aulas do professor
-            aulas_professor = [a for a in st.session_state.aulas if obter_professor_aula(a) == professor_selecionado]
+            aulas_professor = indice_aulas.do_professor(professor_selecionado)
             
             if not aulas_professor:
                 st.warning(f"ℹ️ Professor {professor_selecionado} não tem aulas alocadas.")
@@ -3254,11 +3298,11 @@ with abas[6]:
                         
                         for dia in dias_ordenados:
                             # Procurar aula
-                            aula_encontrada = None
-                            for aula in aulas_turma:
-                                if obter_dia_aula(aula) == dia and obter_horario_aula(aula) == periodo:
-                                    aula_encontrada = aula
-                                    break
+                            aula_encontrada = next(
+                                (a for a in indice_aulas.do_professor_em(professor_selecionado, dia, periodo)
+                                 if obter_turma_aula(a) == turma_nome),
+                                None
+                            )
                             
                             if aula_encontrada:
                                 # Obter dados da aula
@@ -3391,11 +3435,7 @@ with abas[6]:
                     
                     for dia in dias_completos:
                         # Encontrar todas as aulas deste professor neste dia/periodo
-                        aulas_no_horario = []
-                        for aula in aulas_professor:
-                            if (obter_dia_aula(aula) == dia and 
-                                obter_horario_aula(aula) == periodo):
-                                aulas_no_horario.append(aula)
+                        aulas_no_horario = indice_aulas.do_professor_em(professor_selecionado, dia, periodo)
                         
                         if aulas_no_horario:
                             # Se tiver mais de uma aula (superposição - PROBLEMA!)
@@ -3521,11 +3561,8 @@ with abas[6]:
         # Filtros
         col1, col2 = st.columns(2)
         with col1:
-            options_set = set()
-            for a in st.session_state.aulas:
-                prof = obter_professor_aula(a)
-                if prof:
-                    options_set.add(prof)
+            indice_aulas = obter_aulas_indexadas()
+            options_set = {prof for prof, aulas_prof in indice_aulas.por_professor.items() if prof and aulas_prof}
             options = list(sorted(options_set))
             
             professor_selecionado = st.selectbox(
@@ -3536,7 +3573,7 @@ with abas[6]:
         
         if professor_selecionado:
             # Filtrar aulas do professor
-            aulas_professor = [a for a in st.session_state.aulas if obter_professor_aula(a) == professor_selecionado]
+            aulas_professor = indice_aulas.do_professor(professor_selecionado)
             
             if not aulas_professor:
                 st.warning(f"ℹ️ Professor {professor_selecionado} não tem aulas alocadas.")
@@ -3623,6 +3660,27 @@ with abas[7]:
                 problemas.append(f"Professores: -{total_necessario - capacidade_professores}")
             st.error(f"❌ Déficit: {', '.join(problemas)}")
     
+    # Os totais acima não veem disputas por professor/horário: fluxo máximo com corte mínimo
+    st.subheader("🔀 Viabilidade por Fluxo Máximo")
+    analise = analisar_viabilidade(
+        st.session_state.turmas, st.session_state.professores, st.session_state.disciplinas,
+        {prof.nome: obter_limite_horas_professor(prof) for prof in st.session_state.professores}
+    )
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Aulas que Cabem", f"{analise['fluxo']}/{analise['demanda']}")
+    with col2:
+        st.metric("Completude Máxima", f"{analise['completude_maxima']:.1f}%")
+    with col3:
+        st.metric("Tempo da Análise", f"{analise['tempo_ms']:.0f} ms")
+    
+    if analise["viavel"]:
+        st.success("✅ Professores e horários comportam todas as aulas")
+    else:
+        st.error(f"❌ Nenhuma geração chega a 100%: {len(analise['gargalos'])} gargalo(s)")
+        for gargalo in analise["gargalos"]:
+            st.markdown(f"- {descrever_gargalo(gargalo)}")
+    
     # Análise de professores
     st.subheader("👨‍🏫 Análise de Professores")
     
@@ -3793,18 +3851,33 @@ with abas[7]:
                 st.info("ℹ️ Gere uma grade primeiro para usar esta ferramenta.")
     
     # Grades salvas
-    if hasattr(st.session_state, 'grades_salvas') and st.session_state.grades_salvas:
+    grades_salvas = obter_versoes().listar()
+    if grades_salvas:
         st.subheader("💾 Grades Salvas")
+        estatisticas_versoes = obter_versoes().estatisticas()
+        st.caption(
+            f"{estatisticas_versoes['versoes']} versões | {estatisticas_versoes['conteudos']} grades distintas "
+            f"({estatisticas_versoes['deltas']} deltas, {estatisticas_versoes['bases']} completas) | "
+            f"{estatisticas_versoes['tamanho_bytes'] / 1024:.0f} KB"
+        )
         
-        for nome_grade, dados_grade in st.session_state.grades_salvas.items():
+        for dados_grade in reversed(grades_salvas):
+            nome_grade = dados_grade['nome']
             with st.expander(f"📁 {nome_grade} ({dados_grade['total_aulas']} aulas)"):
                 st.write(f"**Data:** {dados_grade['data']}")
                 st.write(f"**Configuração:** {dados_grade['config']}")
                 
-                if st.button(f"Carregar Grade '{nome_grade}'", key=f"load_{nome_grade}"):
-                    st.session_state.aulas = dados_grade['aulas']
-                    st.success(f"✅ Grade '{nome_grade}' carregada!")
-                    st.rerun()
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button(f"Carregar Grade '{nome_grade}'", key=f"load_{nome_grade}"):
+                        st.session_state.aulas = [Aula(**aula) for aula in obter_versoes().checkout(nome_grade)]
+                        st.session_state.grade_versao_atual = nome_grade
+                        st.success(f"✅ Grade '{nome_grade}' carregada!")
+                        st.rerun()
+                with col2:
+                    if st.button(f"🗑️ Excluir '{nome_grade}'", key=f"del_{nome_grade}"):
+                        obter_versoes().remover(nome_grade)
+                        st.rerun()
 
 # ============================================
 # SIDEBAR (ATUALIZADO COM INFORMAÇÕES CLARAS)
@@ -3824,6 +3897,36 @@ st.sidebar.write(f"**Disciplinas:** {len(st.session_state.disciplinas)}")
 st.sidebar.write(f"**Salas:** {len(st.session_state.salas)}")
 st.sidebar.write(f"**Aulas na Grade:** {len(st.session_state.get('aulas', []))}")
 
+st.sidebar.write("### 💾 Salvamento")
+st.session_state.salvamento_assincrono = st.sidebar.checkbox(
+    "Salvar edições em segundo plano",
+    value=st.session_state.get("salvamento_assincrono", False),
+    help="Agrupa edições rápidas dos cadastros numa única gravação a cada 500 ms"
+)
+if st.session_state.salvamento_assincrono:
+    status_salvador = obter_salvador().status()
+    latencia = status_salvador['ultima_latencia_ms']
+    st.sidebar.caption(
+        f"Pendentes: {status_salvador['edicoes_pendentes']} | "
+        f"Gravações: {status_salvador['gravacoes']} ({status_salvador['edicoes_agrupadas']} edições) | "
+        f"Última latência: {f'{latencia:.0f} ms' if latencia is not None else '-'}"
+    )
+    if status_salvador['ultimo_erro']:
+        st.sidebar.error(f"❌ {status_salvador['ultimo_erro']}")
+
+conflito_banco = verificar_conflito_banco()
+if conflito_banco:
+    st.sidebar.warning(f"⚠️ {conflito_banco}. Suas últimas alterações nessas coleções não foram gravadas.")
+    if st.sidebar.button("🔄 Recarregar dados do banco"):
+        recarregar_do_banco()
+        st.rerun()
+
+cache_banco_fim = database.estatisticas_cache()
+st.sidebar.caption(
+    f"Cache do banco neste rerun: {cache_banco_fim['acertos'] - cache_banco_inicio['acertos']} acertos, "
+    f"{cache_banco_fim['falhas'] - cache_banco_inicio['falhas']} leituras do disco"
+)
+
 st.sidebar.write("### 💡 IMPORTANTE - Horários DIFERENTES por Segmento:")
 st.sidebar.write("**EF II:** 07:50-12:20 (5 períodos)")
 st.sidebar.write("**EM:** 07:00-13:10 (7 períodos)")
@@ -0,0 +1,233 @@
+# aula_batch.py - Grade em colunas NumPy (AulaBatch)
+"""
+Representação colunar de uma lista de models.Aula.
+
+Cada campo de texto vira uma coluna de inteiros que aponta para uma tabela
+de valores únicos (turma 3 -> "1emA"), e horario/periodo viram colunas
+int16. Um AulaBatch com milhares de aulas ocupa poucos bytes por aula, e
+contagens/conflitos são feitos com np.bincount / np.unique sobre as colunas
+em vez de percorrer objetos Python.
+
+A conversão é sem perdas: AulaBatch.de_aulas(aulas).para_aulas() devolve
+aulas iguais às originais, na mesma ordem.
+
+Conflitos de turma comparam o número do período; conflitos de professor
+comparam o horário REAL (faixas de matriz_grade.FAIXAS, via MASCARA_SLOT),
+porque o período 1 do EF II (07:50) é o período 2 do EM.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+from estado_grade import MASCARA_SLOT
+from matriz_grade import FAIXAS
+from models import Aula, segmento_da_turma
+
+CAMPOS_TEXTO = ["turma", "disciplina", "professor", "dia", "segmento",
+                "sala", "grupo", "cor_fundo", "cor_fonte"]
+CAMPOS_INTEIROS = ["horario", "periodo"]
+
+# Valor de horario/periodo que representa None
+SEM_VALOR = -1
+
+DTYPE_AULA = np.dtype(
+    [(campo, np.int32) for campo in CAMPOS_TEXTO] +
+    [(campo, np.int16) for campo in CAMPOS_INTEIROS]
+)
+
+def _valor(aula, campo):
+    if isinstance(aula, dict):
+        return aula.get(campo)
+    return getattr(aula, campo)
+
+class AulaBatch:
+    """Aulas em um array estruturado NumPy + tabelas de códigos por campo de texto"""
+
+    def __init__(self, dados, tabelas):
+        self.dados = dados          # np.ndarray com dtype DTYPE_AULA
+        self.tabelas = tabelas      # {campo: [valor do código 0, valor do código 1, ...]}
+        self._codigos = {campo: {valor: i for i, valor in enumerate(valores)}
+                         for campo, valores in tabelas.items()}
+
+    # ============================================
+    # CONVERSÃO
+    # ============================================
+
+    @classmethod
+    def de_aulas(cls, aulas):
+        """Constrói o lote a partir de uma lista de Aula (ou dicts com os campos de Aula)"""
+        aulas = [Aula(**a) if isinstance(a, dict) else a for a in aulas]
+        dados = np.empty(len(aulas), dtype=DTYPE_AULA)
+        tabelas = {}
+
+        for campo in CAMPOS_TEXTO:
+            codigos = {}
+            coluna = [codigos.setdefault(_valor(aula, campo), len(codigos)) for aula in aulas]
+            dados[campo] = coluna
+            tabelas[campo] = list(codigos)
+
+        for campo in CAMPOS_INTEIROS:
+            dados[campo] = [SEM_VALOR if (v := _valor(aula, campo)) is None else v for aula in aulas]
+
+        return cls(dados, tabelas)
+
+    def para_aulas(self) -> List[Aula]:
+        """Converte de volta para uma lista de Aula"""
+        colunas = {campo: [self.tabelas[campo][c] for c in self.dados[campo].tolist()]
+                   for campo in CAMPOS_TEXTO}
+        for campo in CAMPOS_INTEIROS:
+            colunas[campo] = [None if v == SEM_VALOR else v for v in self.dados[campo].tolist()]
+        campos = CAMPOS_TEXTO + CAMPOS_INTEIROS
+        return [Aula(**dict(zip(campos, valores))) for valores in zip(*(colunas[c] for c in campos))]
+
+    @classmethod
+    def concatenar(cls, lotes):
+        """Junta vários lotes (ex.: escolas de uma rede) recodificando as tabelas"""
+        lotes = list(lotes)
+        tabelas = {campo: [] for campo in CAMPOS_TEXTO}
+        partes = []
+        for lote in lotes:
+            parte = lote.dados.copy()
+            for campo in CAMPOS_TEXTO:
+                unificada = tabelas[campo]
+                posicoes = {valor: i for i, valor in enumerate(unificada)}
+                mapa = np.empty(len(lote.tabelas[campo]), dtype=np.int32)
+                for codigo, valor in enumerate(lote.tabelas[campo]):
+                    if valor not in posicoes:
+                        posicoes[valor] = len(unificada)
+                        unificada.append(valor)
+                    mapa[codigo] = posicoes[valor]
+                if len(parte):
+                    parte[campo] = mapa[parte[campo]]
+            partes.append(parte)
+        dados = np.concatenate(partes) if partes else np.empty(0, dtype=DTYPE_AULA)
+        return cls(dados, tabelas)
+
+    def __len__(self):
+        return len(self.dados)
+
+    @property
+    def nbytes(self):
+        """Bytes do array de colunas (as tabelas são compartilhadas e pequenas)"""
+        return self.dados.nbytes
+
+    def codigo(self, campo, valor):
+        """Código inteiro de um valor (ex.: codigo("turma", "1emA")); -1 se não existir"""
+        return self._codigos[campo].get(valor, -1)
+
+    def filtrar(self, mascara):
+        """Novo lote com as aulas selecionadas pela máscara booleana (mesmas tabelas)"""
+        return AulaBatch(self.dados[mascara], self.tabelas)
+
+    def mascara(self, campo, valor):
+        return self.dados[campo] == self.codigo(campo, valor)
+
+    # ============================================
+    # AGREGAÇÕES VETORIZADAS
+    # ============================================
+
+    def _contagem(self, campo):
+        return np.bincount(self.dados[campo], minlength=len(self.tabelas[campo]))
+
+    def contagem_por_professor(self) -> Dict[str, int]:
+        """Aulas por professor (np.bincount sobre a coluna professor)"""
+        contagem = self._contagem("professor")
+        return {nome: int(n) for nome, n in zip(self.tabelas["professor"], contagem) if n}
+
+    def contagem_por_turma(self) -> Dict[str, int]:
+        contagem = self._contagem("turma")
+        return {nome: int(n) for nome, n in zip(self.tabelas["turma"], contagem) if n}
+
+    def matriz_turma_dia(self):
+        """Matriz [turma, dia] com o número de aulas (índices das tabelas turma/dia)"""
+        n_turmas = len(self.tabelas["turma"])
+        n_dias = len(self.tabelas["dia"])
+        chave = self.dados["turma"].astype(np.int64) * n_dias + self.dados["dia"]
+        return np.bincount(chave, minlength=n_turmas * n_dias).reshape(n_turmas, n_dias)
+
+    def contagem_por_turma_dia(self) -> Dict[tuple, int]:
+        """Aulas por (turma, dia)"""
+        matriz = self.matriz_turma_dia()
+        turmas, dias = np.nonzero(matriz)
+        return {
+            (self.tabelas["turma"][t], self.tabelas["dia"][d]): int(matriz[t, d])
+            for t, d in zip(turmas.tolist(), dias.tolist())
+        }
+
+    def _conflitos(self, campo):
+        """Posições (campo, dia, horario) ocupadas por mais de uma aula"""
+        if not len(self):
+            return []
+        horarios = self.dados["horario"].astype(np.int64) - SEM_VALOR
+        n_horarios = int(horarios.max()) + 1
+        n_dias = len(self.tabelas["dia"])
+        chave = (self.dados[campo].astype(np.int64) * n_dias + self.dados["dia"]) * n_horarios + horarios
+        unicas, quantidades = np.unique(chave, return_counts=True)
+        repetidas = quantidades > 1
+
+        conflitos = []
+        for valor, quantidade in zip(unicas[repetidas].tolist(), quantidades[repetidas].tolist()):
+            resto, horario = divmod(valor, n_horarios)
+            codigo, dia = divmod(resto, n_dias)
+            horario += SEM_VALOR
+            conflitos.append({
+                campo: self.tabelas[campo][codigo],
+                'dia': self.tabelas["dia"][dia],
+                'horario': None if horario == SEM_VALOR else horario,
+                'quantidade': quantidade,
+            })
+        return conflitos
+
+    def conflitos_turma(self):
+        """Turmas com mais de uma aula no mesmo dia/horário"""
+        return self._conflitos("turma")
+
+    def _faixas(self):
+        """
+        (linhas, faixas): cada aula repetida para cada faixa de FAIXAS que o seu
+        (segmento, horario) ocupa; segmento ausente vem da turma
+        """
+        segmentos = sorted({segmento for segmento, _ in MASCARA_SLOT})
+        horarios = self.dados["horario"].astype(np.int64)
+        tabela = np.zeros((len(segmentos), int(horarios.max()) + 1), dtype=np.int64)
+        for (segmento, periodo), mascara in MASCARA_SLOT.items():
+            if periodo < tabela.shape[1]:
+                tabela[segmentos.index(segmento), periodo] = mascara
+
+        codigos = np.array([segmentos.index(s) if s in segmentos else -1 for s in self.tabelas["segmento"]])
+        segmento = codigos[self.dados["segmento"]]
+        if (segmento < 0).any():
+            da_turma = np.array([segmentos.index(segmento_da_turma(t or "")) for t in self.tabelas["turma"]])
+            segmento = np.where(segmento < 0, da_turma[self.dados["turma"]], segmento)
+        mascaras = np.where(horarios >= 0, tabela[segmento, np.maximum(horarios, 0)], 0)
+
+        linhas, faixas = [], []
+        for faixa in range(len(FAIXAS)):
+            selecionadas = np.nonzero((mascaras >> faixa) & 1)[0]
+            linhas.append(selecionadas)
+            faixas.append(np.full(len(selecionadas), faixa, dtype=np.int64))
+        return np.concatenate(linhas), np.concatenate(faixas)
+
+    def conflitos_professor(self):
+        """Professores com mais de uma aula no mesmo dia e horário REAL (faixa de FAIXAS)"""
+        if not len(self):
+            return []
+        linhas, faixas = self._faixas()
+        n_dias = len(self.tabelas["dia"])
+        chave = (self.dados["professor"][linhas].astype(np.int64) * n_dias
+                 + self.dados["dia"][linhas]) * len(FAIXAS) + faixas
+        unicas, quantidades = np.unique(chave, return_counts=True)
+        repetidas = quantidades > 1
+
+        conflitos = []
+        for valor, quantidade in zip(unicas[repetidas].tolist(), quantidades[repetidas].tolist()):
+            resto, faixa = divmod(valor, len(FAIXAS))
+            codigo, dia = divmod(resto, n_dias)
+            conflitos.append({
+                'professor': self.tabelas["professor"][codigo],
+                'dia': self.tabelas["dia"][dia],
+                'faixa': FAIXAS[faixa],
+                'quantidade': quantidade,
+            })
+        return conflitos
@@ -1,18 +1,270 @@
+import atexit
+import threading
+import time
+import uuid
 import streamlit as st
 import database
 
+def _colecoes_da_sessao():
+    """Coleções da sessão que são gravadas no banco"""
+    colecoes = {
+        "turmas": list(st.session_state.turmas),
+        "professores": list(st.session_state.professores),
+        "disciplinas": list(st.session_state.disciplinas),
+        "salas": list(st.session_state.salas),
+        "periodos": list(st.session_state.periodos),
+        "feriados": list(st.session_state.feriados),
+    }
+    if "aulas" in st.session_state and st.session_state.aulas:
+        colecoes["aulas"] = list(st.session_state.aulas)
+    return colecoes
+
+def _id_sessao():
+    """Identificador da sessão do navegador (separa as edições de cada coordenador)"""
+    if "id_sessao" not in st.session_state:
+        st.session_state.id_sessao = uuid.uuid4().hex
+    return st.session_state.id_sessao
+
+def _versoes_da_sessao():
+    """Versões das coleções carregadas nesta sessão, já avançadas pelas gravações do salvador"""
+    versoes = st.session_state.get("versoes_banco")
+    if versoes and _salvador is not None:
+        versoes = _salvador.traduzir_versoes(_id_sessao(), versoes)
+    return versoes
+
+def _avisar_conflito(conflito):
+    st.session_state.conflito_banco = str(conflito)
+    st.error(f"⚠️ {conflito}. Nada foi gravado: recarregue os dados do banco "
+             "(barra lateral) e refaça as alterações.")
+
 def salvar_tudo():
-    """Salva todos os dados no banco automaticamente"""
+    """Salva todos os dados no banco automaticamente (uma única escrita atômica)"""
     try:
-        database.salvar_turmas(st.session_state.turmas)
-        database.salvar_professores(st.session_state.professores)
-        database.salvar_disciplinas(st.session_state.disciplinas)
-        database.salvar_salas(st.session_state.salas)
-        database.salvar_periodos(st.session_state.periodos)
-        database.salvar_feriados(st.session_state.feriados)
-        if "aulas" in st.session_state and st.session_state.aulas:
-            database.salvar_grade(st.session_state.aulas)
-        return True
+        # Edições ainda na fila do salvador são mais antigas que o estado atual
+        if _salvador is not None:
+            _salvador.descarregar()
+            conflito = _salvador.conflito_da_sessao(_id_sessao())
+            if conflito is not None:
+                _avisar_conflito(conflito)
+                return False
+        with database.transacao(_versoes_da_sessao()) as t:
+            for nome, itens in _colecoes_da_sessao().items():
+                t.definir(nome, itens)
+        if t.conflito is not None:
+            _avisar_conflito(t.conflito)
+            return False
+        if t.versoes:
+            st.session_state.versoes_banco = t.versoes
+        return t.sucesso
     except Exception as e:
         st.error(f"❌ Erro ao salvar: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+# ============================================
+# SALVAMENTO EM SEGUNDO PLANO (WRITE-BEHIND)
+# ============================================
+
+class SalvadorEmSegundoPlano:
+    """
+    Thread que agrupa rajadas de edições numa única gravação.
+
+    Cada edição só substitui as coleções pendentes em memória; a thread grava
+    o que estiver pendente no máximo uma vez a cada `intervalo_ms`, e tudo o
+    que restar é gravado ao encerrar o processo.
+    
+    As edições são agrupadas por sessão, cada lote com as versões que a
+    sessão tinha carregado. Um lote recusado por ConflitoDeVersao não é
+    repetido: fica registrado para a sessão, que avisa o usuário.
+    """
+
+    def __init__(self, intervalo_ms=500):
+        self.intervalo = intervalo_ms / 1000
+        self.gravacoes = 0
+        self.edicoes_agrupadas = 0
+        self.ultima_latencia_ms = None
+        self.ultima_duracao_ms = None
+        self.ultima_gravacao = None
+        self.ultimo_erro = None
+        self._pendentes = {}  # sessão -> {"colecoes": {...}, "versoes": {...} ou None}
+        self._sucessoras = {}  # (sessão, coleção, versão esperada) -> versão gravada
+        self._conflitos = {}  # sessão -> ConflitoDeVersao
+        self._edicoes_pendentes = 0
+        self._primeira_edicao = None
+        self._condicao = threading.Condition()
+        self._gravando = threading.Lock()
+        self._encerrado = False
+        self._thread = threading.Thread(target=self._executar, name="salvador-banco", daemon=True)
+        self._thread.start()
+        atexit.register(self.encerrar)
+
+    def traduzir_versoes(self, sessao, versoes):
+        """Avança as versões da sessão pelas gravações que o salvador já fez em nome dela"""
+        with self._condicao:
+            traduzidas = dict(versoes)
+            for nome, versao in traduzidas.items():
+                while (sessao, nome, versao) in self._sucessoras:
+                    versao = self._sucessoras[(sessao, nome, versao)]
+                traduzidas[nome] = versao
+            return traduzidas
+
+    def conflito_da_sessao(self, sessao):
+        """Retorna (e esquece) o conflito registrado para a sessão, se houver"""
+        with self._condicao:
+            return self._conflitos.pop(sessao, None)
+
+    def agendar(self, colecoes, versoes_esperadas=None, sessao=None):
+        """Registra uma edição; a gravação acontece depois, em segundo plano"""
+        if versoes_esperadas:
+            versoes_esperadas = self.traduzir_versoes(sessao, versoes_esperadas)
+        with self._condicao:
+            if self._encerrado:
+                raise RuntimeError("Salvador em segundo plano já foi encerrado")
+            lote = self._pendentes.setdefault(sessao, {"colecoes": {}, "versoes": None})
+            if versoes_esperadas:
+                # O lote é gravado a partir da versão que a coleção tinha na primeira edição
+                lote["versoes"] = lote["versoes"] or {}
+                for nome in colecoes:
+                    lote["versoes"].setdefault(nome, versoes_esperadas.get(nome))
+            lote["colecoes"].update(colecoes)
+            self._edicoes_pendentes += 1
+            if self._primeira_edicao is None:
+                self._primeira_edicao = time.perf_counter()
+            self._condicao.notify()
+
+    def _executar(self):
+        while True:
+            with self._condicao:
+                while not self._pendentes and not self._encerrado:
+                    self._condicao.wait()
+                if self._encerrado:
+                    return
+                # Espera o intervalo contado a partir da primeira edição pendente
+                restante = self._primeira_edicao + self.intervalo - time.perf_counter()
+                if restante > 0:
+                    self._condicao.wait(restante)
+                    continue
+            self.descarregar()
+
+    def descarregar(self):
+        """Grava imediatamente tudo o que estiver pendente"""
+        with self._gravando:
+            with self._condicao:
+                pendentes = self._pendentes
+                edicoes = self._edicoes_pendentes
+                primeira_edicao = self._primeira_edicao
+                self._pendentes = {}
+                self._edicoes_pendentes = 0
+                self._primeira_edicao = None
+            if not pendentes:
+                return True
+
+            inicio = time.perf_counter()
+            sucesso = True
+            falhas = {}
+            for sessao, lote in pendentes.items():
+                try:
+                    versoes = database.salvar_colecoes_versionado(lote["colecoes"], lote["versoes"])
+                except database.ConflitoDeVersao as e:
+                    with self._condicao:
+                        self._conflitos[sessao] = e
+                    continue
+                except Exception as e:
+                    print(f"Erro ao salvar: {e}")
+                    falhas[sessao] = lote
+                    sucesso = False
+                    continue
+                if lote["versoes"]:
+                    with self._condicao:
+                        for nome, esperada in lote["versoes"].items():
+                            if esperada is not None and nome in versoes:
+                                self._sucessoras[(sessao, nome, esperada)] = versoes[nome]
+            fim = time.perf_counter()
+
+            self.ultima_duracao_ms = (fim - inicio) * 1000
+            self.ultima_latencia_ms = (fim - primeira_edicao) * 1000
+            self.ultima_gravacao = time.time()
+            if sucesso:
+                self.gravacoes += 1
+                self.edicoes_agrupadas += edicoes
+                self.ultimo_erro = None
+            else:
+                self.ultimo_erro = "Falha ao gravar no banco"
+                # Devolve as coleções para nova tentativa, sem sobrescrever edições mais novas
+                with self._condicao:
+                    for sessao, lote in falhas.items():
+                        atual = self._pendentes.setdefault(sessao, {"colecoes": {}, "versoes": None})
+                        for nome, itens in lote["colecoes"].items():
+                            atual["colecoes"].setdefault(nome, itens)
+                        if lote["versoes"]:
+                            atual["versoes"] = dict(atual["versoes"] or {}, **lote["versoes"])
+                    self._edicoes_pendentes += edicoes
+                    if self._primeira_edicao is None:
+                        self._primeira_edicao = time.perf_counter()
+                    self._condicao.notify()
+            return sucesso
+
+    def encerrar(self):
+        """Para a thread e grava o que ainda estiver pendente"""
+        with self._condicao:
+            if self._encerrado:
+                return
+            self._encerrado = True
+            self._condicao.notify()
+        self._thread.join(timeout=5)
+        self.descarregar()
+
+    def status(self):
+        with self._condicao:
+            pendentes = self._edicoes_pendentes
+        return {
+            "edicoes_pendentes": pendentes,
+            "gravacoes": self.gravacoes,
+            "edicoes_agrupadas": self.edicoes_agrupadas,
+            "ultima_latencia_ms": self.ultima_latencia_ms,
+            "ultima_duracao_ms": self.ultima_duracao_ms,
+            "ultima_gravacao": self.ultima_gravacao,
+            "ultimo_erro": self.ultimo_erro,
+            "conflitos": len(self._conflitos),
+        }
+
+_salvador = None
+_salvador_lock = threading.Lock()
+
+def obter_salvador(intervalo_ms=500):
+    """Retorna o salvador em segundo plano do processo (criado na primeira chamada)"""
+    global _salvador
+    with _salvador_lock:
+        if _salvador is None:
+            _salvador = SalvadorEmSegundoPlano(intervalo_ms)
+        return _salvador
+
+def verificar_conflito_banco():
+    """Mensagem do último conflito de gravação desta sessão (inclusive do salvador), ou None"""
+    if _salvador is not None:
+        conflito = _salvador.conflito_da_sessao(_id_sessao())
+        if conflito is not None:
+            st.session_state.conflito_banco = str(conflito)
+    return st.session_state.get("conflito_banco")
+
+def salvar_edicao():
+    """
+    Salva as edições dos formulários de cadastro.
+
+    Com `st.session_state.salvamento_assincrono` ligado, a gravação é entregue
+    ao salvador em segundo plano e o rerun não espera o disco; caso contrário,
+    equivale a salvar_tudo().
+    """
+    if not st.session_state.get("salvamento_assincrono", False):
+        return salvar_tudo()
+
+    try:
+        salvador = obter_salvador()
+        conflito = salvador.conflito_da_sessao(_id_sessao())
+        if conflito is not None:
+            _avisar_conflito(conflito)
+            return False
+        salvador.agendar(_colecoes_da_sessao(), st.session_state.get("versoes_banco"), _id_sessao())
+        return True
+    except Exception as e:
+        st.error(f"❌ Erro ao agendar salvamento: {str(e)}")
+        return False
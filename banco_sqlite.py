@@ -0,0 +1,365 @@
+# banco_sqlite.py - Backend SQLite para o banco da escola
+"""
+Armazena turmas, professores, disciplinas, salas e aulas em tabelas SQLite
+indexadas. Usado por database.py quando BACKEND == "sqlite".
+
+As gravações comparam o conteúdo novo com as linhas existentes e só
+inserem/atualizam/removem o que mudou: alterar um professor não reescreve
+as aulas. Cada coleção alterada tem sua versão incrementada na tabela
+"versoes", dentro da mesma transação.
+
+Um banco já inicializado (migrado do JSON ou com os dados padrão) tem a
+chave CHAVE_INICIALIZADO em "extras", gravada junto com a primeira escrita.
+
+Migração única a partir do JSON (snapshot JSON ou binário + diário de aulas):
+    python banco_sqlite.py escola_database.json escola_database.sqlite
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+from collections import Counter
+
+# Colunas de cada tabela de entidade (todas com chave primária "id").
+# As colunas em COLUNAS_JSON guardam listas serializadas.
+COLUNAS_ENTIDADES = {
+    "turmas": ["id", "nome", "serie", "turno", "grupo", "segmento"],
+    "professores": ["id", "nome", "disciplinas", "disponibilidade", "grupo", "horarios_indisponiveis"],
+    "disciplinas": ["id", "nome", "carga_semanal", "tipo", "turmas", "grupo", "cor_fundo", "cor_fonte"],
+    "salas": ["id", "nome", "capacidade", "tipo"],
+}
+
+COLUNAS_JSON = {"disciplinas", "disponibilidade", "horarios_indisponiveis", "turmas"}
+
+# Marcador em "extras" de banco inicializado; chaves de extras com "_" não são coleções
+CHAVE_INICIALIZADO = "_inicializado"
+
+COLUNAS_AULAS = ["turma", "disciplina", "professor", "dia", "horario", "periodo",
+                 "segmento", "sala", "grupo", "cor_fundo", "cor_fonte"]
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS turmas (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    serie TEXT,
+    turno TEXT,
+    grupo TEXT,
+    segmento TEXT
+);
+CREATE TABLE IF NOT EXISTS professores (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    disciplinas TEXT,
+    disponibilidade TEXT,
+    grupo TEXT,
+    horarios_indisponiveis TEXT
+);
+CREATE TABLE IF NOT EXISTS disciplinas (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    carga_semanal INTEGER,
+    tipo TEXT,
+    turmas TEXT,
+    grupo TEXT,
+    cor_fundo TEXT,
+    cor_fonte TEXT
+);
+CREATE TABLE IF NOT EXISTS salas (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    capacidade INTEGER,
+    tipo TEXT
+);
+CREATE TABLE IF NOT EXISTS aulas (
+    rowid INTEGER PRIMARY KEY,
+    turma TEXT NOT NULL,
+    disciplina TEXT NOT NULL,
+    professor TEXT,
+    dia TEXT NOT NULL,
+    horario INTEGER NOT NULL,
+    periodo INTEGER,
+    segmento TEXT,
+    sala TEXT,
+    grupo TEXT,
+    cor_fundo TEXT,
+    cor_fonte TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_aulas_turma_dia_horario ON aulas (turma, dia, horario);
+CREATE INDEX IF NOT EXISTS idx_aulas_professor_dia ON aulas (professor, dia);
+CREATE TABLE IF NOT EXISTS extras (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versoes (
+    colecao TEXT PRIMARY KEY,
+    versao INTEGER NOT NULL
+);
+"""
+
+def _para_coluna(coluna, valor):
+    if coluna in COLUNAS_JSON:
+        if isinstance(valor, (set, frozenset)):
+            valor = sorted(valor)
+        return json.dumps(valor if valor is not None else [], ensure_ascii=False)
+    return valor
+
+def _de_coluna(coluna, valor):
+    if coluna in COLUNAS_JSON:
+        return json.loads(valor) if valor else []
+    return valor
+
+class BancoSQLite:
+    """Acesso ao banco SQLite (uma conexão curta por operação, segura entre threads)"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.consultas = 0
+        self._lock = threading.Lock()
+        with self._conectar() as conexao:
+            conexao.executescript(ESQUEMA)
+
+    def _conectar(self):
+        conexao = sqlite3.connect(self.caminho, timeout=30)
+        conexao.row_factory = sqlite3.Row
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        return conexao
+
+    def _consultar(self, sql, parametros=()):
+        self.consultas += 1
+        conexao = self._conectar()
+        try:
+            return conexao.execute(sql, parametros).fetchall()
+        finally:
+            conexao.close()
+
+    # ============================================
+    # LEITURA
+    # ============================================
+
+    def esta_vazio(self):
+        """Se o banco ainda não foi inicializado (nem migrado nem preenchido com os dados padrão)"""
+        if self._consultar("SELECT 1 FROM extras WHERE chave = ?", (CHAVE_INICIALIZADO,)):
+            return False
+        # Bancos gravados antes do marcador: qualquer linha conta como inicializado
+        tabelas = list(COLUNAS_ENTIDADES) + ["aulas", "extras"]
+        if not any(self._consultar(f"SELECT 1 FROM {nome} LIMIT 1") for nome in tabelas):
+            return True
+        self.salvar_colecoes({})
+        return False
+
+    def carregar_colecao(self, nome):
+        """Retorna os itens de uma coleção como dicionários"""
+        if nome in COLUNAS_ENTIDADES:
+            colunas = COLUNAS_ENTIDADES[nome]
+            linhas = self._consultar(f"SELECT {', '.join(colunas)} FROM {nome} ORDER BY rowid")
+            return [{c: _de_coluna(c, linha[c]) for c in colunas} for linha in linhas]
+        if nome == "aulas":
+            linhas = self._consultar(f"SELECT {', '.join(COLUNAS_AULAS)} FROM aulas ORDER BY rowid")
+            return [dict(linha) for linha in linhas]
+
+        linhas = self._consultar("SELECT valor FROM extras WHERE chave = ?", (nome,))
+        return json.loads(linhas[0]["valor"]) if linhas else []
+
+    def carregar_tudo(self):
+        dados = {nome: self.carregar_colecao(nome) for nome in list(COLUNAS_ENTIDADES) + ["aulas"]}
+        for linha in self._consultar("SELECT chave, valor FROM extras"):
+            if not linha["chave"].startswith("_"):
+                dados[linha["chave"]] = json.loads(linha["valor"])
+        dados.setdefault("feriados", [])
+        dados.setdefault("periodos", [])
+        return dados
+
+    def versoes(self):
+        """Versão atual de cada coleção ({nome: inteiro})"""
+        return {linha["colecao"]: linha["versao"] for linha in self._consultar("SELECT colecao, versao FROM versoes")}
+
+    def aulas_do_professor(self, professor, dia=None):
+        """Aulas de um professor (usa o índice professor/dia)"""
+        sql = f"SELECT {', '.join(COLUNAS_AULAS)} FROM aulas WHERE professor = ?"
+        parametros = [professor]
+        if dia is not None:
+            sql += " AND dia = ?"
+            parametros.append(dia)
+        return [dict(linha) for linha in self._consultar(sql + " ORDER BY dia, horario", parametros)]
+
+    def aulas_da_turma(self, turma, dia=None):
+        """Aulas de uma turma (usa o índice turma/dia/horario)"""
+        sql = f"SELECT {', '.join(COLUNAS_AULAS)} FROM aulas WHERE turma = ?"
+        parametros = [turma]
+        if dia is not None:
+            sql += " AND dia = ?"
+            parametros.append(dia)
+        return [dict(linha) for linha in self._consultar(sql + " ORDER BY dia, horario", parametros)]
+
+    # ============================================
+    # ESCRITA (UPSERT POR LINHA)
+    # ============================================
+
+    def _sincronizar_entidades(self, conexao, nome, itens):
+        """Insere/atualiza só as linhas alteradas e remove as que sumiram"""
+        colunas = COLUNAS_ENTIDADES[nome]
+        existentes = {
+            linha["id"]: tuple(linha[c] for c in colunas)
+            for linha in conexao.execute(f"SELECT {', '.join(colunas)} FROM {nome}")
+        }
+        novos = {}
+        for item in itens:
+            novos[item["id"]] = tuple(_para_coluna(c, item.get(c)) for c in colunas)
+
+        alterados = [linha for id_, linha in novos.items() if existentes.get(id_) != linha]
+        removidos = [(id_,) for id_ in existentes if id_ not in novos]
+
+        if alterados:
+            atualizacoes = ", ".join(f"{c} = excluded.{c}" for c in colunas[1:])
+            conexao.executemany(
+                f"INSERT INTO {nome} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))}) "
+                f"ON CONFLICT(id) DO UPDATE SET {atualizacoes}",
+                alterados
+            )
+        if removidos:
+            conexao.executemany(f"DELETE FROM {nome} WHERE id = ?", removidos)
+        return len(alterados) + len(removidos)
+
+    def _sincronizar_aulas(self, conexao, itens):
+        """Aulas não têm id: compara o multiconjunto de linhas e aplica só a diferença"""
+        existentes = {}
+        for linha in conexao.execute(f"SELECT rowid, {', '.join(COLUNAS_AULAS)} FROM aulas"):
+            existentes.setdefault(tuple(linha[c] for c in COLUNAS_AULAS), []).append(linha["rowid"])
+
+        novas = Counter()
+        for item in itens:
+            linha = dict(item)
+            if linha.get("periodo") is None:
+                linha["periodo"] = linha.get("horario")
+            novas[tuple(linha.get(c) for c in COLUNAS_AULAS)] += 1
+
+        removidas = []
+        for chave, rowids in existentes.items():
+            excesso = len(rowids) - novas.get(chave, 0)
+            if excesso > 0:
+                removidas.extend((rowid,) for rowid in rowids[:excesso])
+
+        inseridas = []
+        for chave, quantidade in novas.items():
+            faltam = quantidade - len(existentes.get(chave, []))
+            inseridas.extend([chave] * max(faltam, 0))
+
+        if removidas:
+            conexao.executemany("DELETE FROM aulas WHERE rowid = ?", removidas)
+        if inseridas:
+            conexao.executemany(
+                f"INSERT INTO aulas ({', '.join(COLUNAS_AULAS)}) VALUES ({', '.join('?' * len(COLUNAS_AULAS))})",
+                inseridas
+            )
+        return len(removidas) + len(inseridas)
+
+    def salvar_colecoes(self, colecoes, verificar_versoes=None):
+        """
+        Grava as coleções (dicionários) numa única transação.
+
+        `verificar_versoes`, se informado, é chamado com as versões atuais já
+        dentro da transação (BEGIN IMMEDIATE) e pode lançar uma exceção para
+        desfazer tudo. Retorna (linhas alteradas, versões após a gravação).
+        """
+        alteracoes = 0
+        with self._lock:
+            conexao = self._conectar()
+            try:
+                with conexao:
+                    conexao.execute("BEGIN IMMEDIATE")
+                    versoes = {
+                        linha["colecao"]: linha["versao"]
+                        for linha in conexao.execute("SELECT colecao, versao FROM versoes")
+                    }
+                    if verificar_versoes is not None:
+                        verificar_versoes(versoes)
+                    conexao.execute(
+                        "INSERT OR IGNORE INTO extras (chave, valor) VALUES (?, ?)",
+                        (CHAVE_INICIALIZADO, json.dumps(True))
+                    )
+
+                    for nome, itens in colecoes.items():
+                        if nome in COLUNAS_ENTIDADES:
+                            alteradas = self._sincronizar_entidades(conexao, nome, itens)
+                        elif nome == "aulas":
+                            alteradas = self._sincronizar_aulas(conexao, itens)
+                        else:
+                            anterior = conexao.execute("SELECT valor FROM extras WHERE chave = ?", (nome,)).fetchone()
+                            valor = json.dumps(itens, ensure_ascii=False)
+                            alteradas = 0 if anterior is not None and anterior["valor"] == valor else 1
+                            if alteradas:
+                                conexao.execute(
+                                    "INSERT INTO extras (chave, valor) VALUES (?, ?) "
+                                    "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+                                    (nome, valor)
+                                )
+                        if alteradas:
+                            versoes[nome] = versoes.get(nome, 0) + 1
+                            conexao.execute(
+                                "INSERT INTO versoes (colecao, versao) VALUES (?, ?) "
+                                "ON CONFLICT(colecao) DO UPDATE SET versao = excluded.versao",
+                                (nome, versoes[nome])
+                            )
+                        alteracoes += alteradas
+            finally:
+                conexao.close()
+        return alteracoes, versoes
+
+    def upsert(self, nome, item):
+        """Insere ou atualiza uma única entidade (turma, professor, disciplina ou sala)"""
+        colunas = COLUNAS_ENTIDADES[nome]
+        atualizacoes = ", ".join(f"{c} = excluded.{c}" for c in colunas[1:])
+        with self._lock:
+            conexao = self._conectar()
+            try:
+                with conexao:
+                    conexao.execute(
+                        f"INSERT INTO {nome} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))}) "
+                        f"ON CONFLICT(id) DO UPDATE SET {atualizacoes}",
+                        tuple(_para_coluna(c, item.get(c)) for c in colunas)
+                    )
+            finally:
+                conexao.close()
+
+    def remover(self, nome, id_):
+        with self._lock:
+            conexao = self._conectar()
+            try:
+                with conexao:
+                    conexao.execute(f"DELETE FROM {nome} WHERE id = ?", (id_,))
+            finally:
+                conexao.close()
+
+    def apagar_tudo(self):
+        with self._lock:
+            conexao = self._conectar()
+            try:
+                with conexao:
+                    for nome in list(COLUNAS_ENTIDADES) + ["aulas", "extras", "versoes"]:
+                        conexao.execute(f"DELETE FROM {nome}")
+            finally:
+                conexao.close()
+
+    def estatisticas(self):
+        return {"acertos": 0, "falhas": self.consultas, "taxa_acerto": 0.0}
+
+    # ============================================
+    # MIGRAÇÃO
+    # ============================================
+
+    def migrar_de_json(self, caminho_json):
+        """Importa (uma vez) todo o conteúdo do banco JSON, com o diário de aulas reaplicado"""
+        from database import ler_banco_json
+        dados = ler_banco_json(caminho_json)
+        alteracoes, _ = self.salvar_colecoes(
+            {nome: itens for nome, itens in dados.items() if not nome.startswith("_")}
+        )
+        return alteracoes
+
+if __name__ == "__main__":
+    origem = sys.argv[1] if len(sys.argv) > 1 else "escola_database.json"
+    destino = sys.argv[2] if len(sys.argv) > 2 else "escola_database.sqlite"
+    linhas = BancoSQLite(destino).migrar_de_json(origem)
+    print(f"✅ {linhas} linhas migradas de {origem} para {destino}")
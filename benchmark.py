@@ -0,0 +1,910 @@
+# benchmark.py - Medições de desempenho do banco e dos algoritmos
+"""
+Uso:
+    python benchmark.py salvamento
+    python benchmark.py snapshot
+    python benchmark.py indice
+    python benchmark.py colunar
+    python benchmark.py modelos
+    python benchmark.py registro
+    python benchmark.py horarios
+    python benchmark.py disponibilidade
+    python benchmark.py matriz
+    python benchmark.py segmentos
+    python benchmark.py estado
+    python benchmark.py ordenacao
+    python benchmark.py backtracking
+    python benchmark.py multistart
+    python benchmark.py tabu
+    python benchmark.py recozimento
+    python benchmark.py reparo
+    python benchmark.py emparelhamento
+    python benchmark.py viabilidade
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+import database
+import snapshot_binario
+from aula_batch import AulaBatch
+from disponibilidade import DIAS, DisponibilidadeBits, PERIODOS_POR_DIA
+from estado_grade import MASCARA_SLOT
+from horarios import HORARIOS
+from indice_grade import GradeIndex
+from matriz_grade import FAIXAS, ScheduleMatrix
+from models import HORARIOS_REAIS, Aula, AulaCompacta, Disciplina, Professor, Turma, segmento_da_turma
+from registro_entidades import RegistroEntidades
+
+BANCO_ORIGINAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "escola_database.json")
+
+# ============================================
+# UTILITÁRIOS
+# ============================================
+
+def gerar_aulas_sinteticas(quantidade):
+    """Replica as aulas do banco original até atingir a quantidade pedida"""
+    base = database.carregar_grade()
+    aulas = []
+    copia = 0
+    while len(aulas) < quantidade:
+        for aula in base:
+            if len(aulas) >= quantidade:
+                break
+            aulas.append(Aula(
+                turma=f"{aula.turma}_{copia}" if copia else aula.turma,
+                disciplina=aula.disciplina,
+                professor=aula.professor,
+                dia=aula.dia,
+                horario=aula.horario,
+                segmento=aula.segmento
+            ))
+        copia += 1
+    return aulas
+
+def gerar_escola_sintetica(quantidade_turmas):
+    """Replica turmas, professores e disciplinas do banco original até ter a quantidade de turmas pedida
+
+    Cada cópia k ganha turmas "<nome>_k" e professores "<nome>_k" com as mesmas
+    disciplinas e restrições; as disciplinas passam a listar as turmas de todas as cópias.
+    """
+    turmas_base = database.carregar_turmas()
+    professores_base = database.carregar_professores()
+    disciplinas = database.carregar_disciplinas()
+    turmas, professores = [], []
+    copia = 0
+    while len(turmas) < quantidade_turmas:
+        sufixo = f"_{copia}" if copia else ""
+        novas = [t.nome for t in turmas_base[:quantidade_turmas - len(turmas)]]
+        for turma in turmas_base[:len(novas)]:
+            turmas.append(Turma(turma.nome + sufixo, turma.serie, turma.turno, turma.grupo, turma.segmento))
+        for prof in professores_base:
+            professores.append(Professor(prof.nome + sufixo, list(prof.disciplinas), list(prof.disponibilidade),
+                                         prof.grupo, list(prof.horarios_indisponiveis)))
+        if copia:
+            for disc in disciplinas:
+                disc.turmas = disc.turmas + [nome + sufixo for nome in novas if nome in disc.turmas]
+        copia += 1
+    return turmas, professores, disciplinas
+
+# Aulas por semana de cada matéria em uma turma cheia: (matéria, tipo, carga)
+PLANO_APERTADO = {
+    "EF_II": [("Português", "pesada", 5), ("Matemática", "pesada", 5), ("Ciências", "pesada", 3),
+              ("História", "media", 3), ("Geografia", "media", 3), ("Inglês", "leve", 2),
+              ("Arte", "leve", 2), ("Educação Física", "pratica", 2)],
+    "EM": [("Português", "pesada", 5), ("Matemática", "pesada", 5), ("Física", "pesada", 4),
+           ("Química", "pesada", 4), ("Biologia", "media", 4), ("História", "media", 3),
+           ("Geografia", "media", 3), ("Filosofia", "media", 2), ("Inglês", "leve", 2),
+           ("Arte", "leve", 1), ("Educação Física", "pratica", 2)],
+}
+
+def gerar_instancia_apertada(quantidade_turmas=14, semente=0, bloqueio=0.3):
+    """Escola com uma grade completa plantada: toda turma com a semana cheia
+
+    Os professores são criados sob demanda enquanto a grade plantada é preenchida
+    (cada um o mais ocupado possível, até o limite), e uma fração `bloqueio` dos
+    períodos em que cada um não dá aula vira horário indisponível. Existe solução
+    com 100% das aulas, mas sobra pouca folga.
+    """
+    import random
+
+    gerador = random.Random(semente)
+    turmas_base = database.carregar_turmas()
+    turmas = []
+    for i in range(quantidade_turmas):
+        base = turmas_base[i % len(turmas_base)]
+        sufixo = f"_{i // len(turmas_base)}" if i >= len(turmas_base) else ""
+        turmas.append(Turma(base.nome + sufixo, base.serie, base.turno, base.grupo, base.segmento))
+
+    # Disciplinas por (matéria, grupo, segmento), como "Matemática A EM" no banco original
+    disciplinas = {}
+    for turma in turmas:
+        for materia, tipo, carga in PLANO_APERTADO[turma.segmento]:
+            chave = (materia, turma.grupo, turma.segmento)
+            if chave not in disciplinas:
+                disciplinas[chave] = Disciplina(f"{materia} {turma.grupo} {turma.segmento}", carga, tipo, [], turma.grupo)
+            disciplinas[chave].turmas.append(turma.nome)
+
+    # Grade plantada de cada turma: (dia, período) -> matéria, respeitando o máximo por dia
+    plantada = []
+    for turma in turmas:
+        periodos = HORARIOS.periodos(turma.segmento)
+        while True:
+            livres = {(dia, periodo) for dia in DIAS for periodo in periodos}
+            no_dia = Counter()
+            grade = {}
+            aulas = [(m, t) for m, t, carga in PLANO_APERTADO[turma.segmento] for _ in range(carga)]
+            aulas.sort(key=lambda a: a[1] != "pesada")
+            for materia, tipo in aulas:
+                maximo = 1 if tipo == "pesada" else 2
+                opcoes = [slot for slot in livres if no_dia[(materia, slot[0])] < maximo]
+                if not opcoes:
+                    break
+                slot = gerador.choice(sorted(opcoes))
+                livres.discard(slot)
+                no_dia[(materia, slot[0])] += 1
+                grade[slot] = materia
+            else:
+                break
+        plantada.extend((turma, materia, dia, periodo) for (dia, periodo), materia in grade.items())
+
+    # Professores por matéria, criados quando nenhum está livre no horário REAL
+    materias_em = {m for m, _, _ in PLANO_APERTADO["EM"]}
+    por_materia = {}
+    ocupacao = {}       # professor -> {(dia, segmento, periodo)}
+    gerador.shuffle(plantada)
+    atribuicao = []
+    for turma, materia, dia, periodo in plantada:
+        limite = 35 if materia in materias_em else 25
+        escolhido = None
+        for nome in por_materia.setdefault(materia, []):
+            ocupado = ocupacao[nome]
+            if len(ocupado) < limite and not any(
+                    (dia, s, p) in ocupado for s, p in
+                    ((HORARIOS.slots[b].segmento, HORARIOS.slots[b].periodo)
+                     for b in HORARIOS.sobrepostos(HORARIOS.id_slot(turma.segmento, periodo)))):
+                escolhido = nome
+                break
+        if escolhido is None:
+            escolhido = f"{materia} {len(por_materia[materia]) + 1}"
+            por_materia[materia].append(escolhido)
+            ocupacao[escolhido] = set()
+        ocupacao[escolhido].add((dia, turma.segmento, periodo))
+
+    professores = []
+    for materia, nomes in por_materia.items():
+        disciplinas_materia = [d.nome for (m, _, _), d in disciplinas.items() if m == materia]
+        for nome in nomes:
+            dando_aula = {(dia, periodo) for dia, _, periodo in ocupacao[nome]}
+            bloqueados = [f"{dia[:3]}_{periodo}" for dia in DIAS for periodo in range(1, PERIODOS_POR_DIA + 1)
+                          if (dia, periodo) not in dando_aula and gerador.random() < bloqueio]
+            professores.append(Professor(nome, list(disciplinas_materia), list(DIAS), "AMBOS", bloqueados))
+    return turmas, professores, list(disciplinas.values())
+
+class BancoTemporario:
+    """Copia o banco original para um diretório temporário e aponta database.DB_FILE para ele"""
+
+    def __enter__(self):
+        self.diretorio = tempfile.mkdtemp(prefix="bench_escola_")
+        self.caminho = os.path.join(self.diretorio, "escola_database.json")
+        shutil.copy(BANCO_ORIGINAL, self.caminho)
+        self.db_file_anterior = database.DB_FILE
+        database.DB_FILE = self.caminho
+        return self
+
+    def __exit__(self, *args):
+        database.DB_FILE = self.db_file_anterior
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+        return False
+
+def cronometrar(funcao, repeticoes=3):
+    """Retorna o melhor tempo (em ms) entre as repetições"""
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        decorrido = (time.perf_counter() - inicio) * 1000
+        melhor = decorrido if melhor is None else min(melhor, decorrido)
+    return melhor
+
+# ============================================
+# SALVAMENTO (salvar_tudo: 7 escritas x transação única)
+# ============================================
+
+def _estados_alternados(turmas, professores, disciplinas, salas, aulas):
+    """
+    Dois conteúdos do banco que diferem em todas as coleções: gravar um depois
+    do outro obriga cada salvar_* a escrever de verdade (gravar o mesmo
+    conteúdo de novo não encontra coleção alterada e retorna sem escrever).
+    Nas aulas muda a sala de todas, como numa grade gerada de novo.
+    """
+    def alterar(objetos, campo, valor):
+        itens = [database._converter_para_dict(obj) for obj in objetos]
+        itens[0] = dict(itens[0], **{campo: valor})
+        return itens
+
+    return [
+        {"turmas": turmas, "professores": professores, "disciplinas": disciplinas, "salas": salas,
+         "periodos": [], "feriados": [], "aulas": aulas},
+        {"turmas": alterar(turmas, "turno", "tarde"),
+         "professores": alterar(professores, "grupo", "A"),
+         "disciplinas": alterar(disciplinas, "carga_semanal", 1),
+         "salas": alterar(salas, "capacidade", 1),
+         "periodos": ["2026-1"], "feriados": ["2026-04-21"],
+         "aulas": [dict(database._converter_para_dict(aula), sala="Auditório") for aula in aulas]},
+    ]
+
+def bench_salvamento(tamanhos=(400, 4000, 40000), repeticoes=3):
+    print(f"{'aulas':>8} | {'7x salvar_*':>12} | {'transação':>10} | {'ganho':>6} | {'arquivo':>9}")
+    for quantidade in tamanhos:
+        with BancoTemporario() as banco:
+            estados = _estados_alternados(
+                database.carregar_turmas(), database.carregar_professores(),
+                database.carregar_disciplinas(), database.carregar_salas(),
+                gerar_aulas_sinteticas(quantidade)
+            )
+            gravacoes = [0]
+
+            def proximo_estado():
+                gravacoes[0] += 1
+                return estados[gravacoes[0] % 2]
+
+            def sete_escritas():
+                estado = proximo_estado()
+                database.salvar_turmas(estado["turmas"])
+                database.salvar_professores(estado["professores"])
+                database.salvar_disciplinas(estado["disciplinas"])
+                database.salvar_salas(estado["salas"])
+                database.salvar_periodos(estado["periodos"])
+                database.salvar_feriados(estado["feriados"])
+                database.salvar_grade(estado["aulas"])
+
+            def transacao_unica():
+                with database.transacao() as t:
+                    for nome, itens in proximo_estado().items():
+                        t.definir(nome, itens)
+
+            # Estado estável: o banco já contém a grade do tamanho medido
+            transacao_unica()
+            versoes = database.versoes_colecoes()
+            tempo_antigo = cronometrar(sete_escritas, repeticoes)
+            gravadas = sum(database.versoes_colecoes()[nome] - versoes[nome] for nome in versoes)
+            assert gravadas == 7 * repeticoes, f"salvar_* não gravou todas as coleções ({gravadas})"
+            tempo_novo = cronometrar(transacao_unica, repeticoes)
+            tamanho_kb = os.path.getsize(banco.caminho) / 1024
+            print(f"{quantidade:>8} | {tempo_antigo:>10.1f}ms | {tempo_novo:>8.1f}ms | "
+                  f"{tempo_antigo / tempo_novo:>5.1f}x | {tamanho_kb:>7.0f}KB")
+
+# ============================================
+# SNAPSHOT (JSON indent=2 x binário compacto)
+# ============================================
+
+def _medir_leitura(caminho, repeticoes=5):
+    """Melhor tempo de leitura (ms) e pico de memória (KB) ao carregar o snapshot"""
+    tempo = cronometrar(lambda: database._ler_snapshot(caminho), repeticoes)
+    tracemalloc.start()
+    dados = database._ler_snapshot(caminho)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del dados
+    return tempo, pico / 1024
+
+def bench_snapshot(fatores=(1, 50)):
+    with open(BANCO_ORIGINAL, 'r', encoding='utf-8') as f:
+        original = json.load(f)
+
+    formatos = [("json", None), ("pickle-5", snapshot_binario.CODEC_PICKLE)]
+    if snapshot_binario.msgpack is not None:
+        formatos.append(("msgpack", snapshot_binario.CODEC_MSGPACK))
+
+    print(f"{'dados':>10} | {'formato':>8} | {'arquivo':>10} | {'leitura':>9} | {'pico memória':>12}")
+    diretorio = tempfile.mkdtemp(prefix="bench_snapshot_")
+    try:
+        for fator in fatores:
+            dados = dict(original)
+            dados["aulas"] = [
+                dict(aula, turma=f"{aula['turma']}_{copia}" if copia else aula['turma'])
+                for copia in range(fator) for aula in original["aulas"]
+            ]
+            rotulo = f"{len(dados['aulas'])} aulas"
+            for nome, codec in formatos:
+                caminho = os.path.join(diretorio, f"banco_{fator}_{nome}")
+                if codec is None:
+                    conteudo = json.dumps(dados, indent=2, ensure_ascii=False).encode('utf-8')
+                else:
+                    conteudo = snapshot_binario.codificar(dados, codec)
+                with open(caminho, 'wb') as f:
+                    f.write(conteudo)
+                tempo, pico = _medir_leitura(caminho)
+                print(f"{rotulo:>10} | {nome:>8} | {len(conteudo) / 1024:>8.0f}KB | "
+                      f"{tempo:>7.1f}ms | {pico:>10.0f}KB")
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+# ============================================
+# ÍNDICE DA GRADE (varredura x GradeIndex)
+# ============================================
+
+def bench_indice(tamanhos=(410, 4100, 20500)):
+    dias = ["segunda", "terca", "quarta", "quinta", "sexta"]
+    print(f"{'aulas':>8} | {'operação':<28} | {'varredura':>10} | {'índice':>9} | {'ganho':>6}")
+    for quantidade in tamanhos:
+        aulas = gerar_aulas_sinteticas(quantidade)
+        turmas = sorted({a.turma for a in aulas})
+        professores = sorted({a.professor for a in aulas})
+
+        def horas_varredura():
+            return [sum(1 for a in aulas if a.professor == p) for p in professores]
+
+        def grades_varredura():
+            for t in turmas:
+                aulas_turma = [a for a in aulas if a.turma == t]
+                for dia in dias:
+                    for periodo in range(1, 8):
+                        next((a for a in aulas_turma if a.dia == dia and a.horario == periodo), None)
+
+        def agenda_varredura():
+            for p in professores:
+                for dia in dias:
+                    for periodo in range(1, 8):
+                        next((a for a in aulas if a.professor == p and a.dia == dia and a.horario == periodo), None)
+
+        inicio = time.perf_counter()
+        indice = GradeIndex(aulas)
+        construcao = (time.perf_counter() - inicio) * 1000
+
+        def horas_indice():
+            return [indice.horas_professor(p) for p in professores]
+
+        def grades_indice():
+            for t in turmas:
+                for dia in dias:
+                    for periodo in range(1, 8):
+                        indice.na_turma(t, dia, periodo)
+
+        def agenda_indice():
+            for p in professores:
+                for dia in dias:
+                    for periodo in range(1, 8):
+                        indice.do_professor_em(p, dia, periodo)
+
+        print(f"{quantidade:>8} | {'construir GradeIndex':<28} | {'-':>10} | {construcao:>7.1f}ms | {'-':>6}")
+        for nome, varredura, com_indice in [
+            ("horas de cada professor", horas_varredura, horas_indice),
+            ("células da grade por turma", grades_varredura, grades_indice),
+            ("agenda de cada professor", agenda_varredura, agenda_indice),
+        ]:
+            tempo_varredura = cronometrar(varredura)
+            tempo_indice = cronometrar(com_indice)
+            print(f"{quantidade:>8} | {nome:<28} | {tempo_varredura:>8.1f}ms | {tempo_indice:>7.2f}ms | "
+                  f"{tempo_varredura / tempo_indice:>5.0f}x")
+
+# ============================================
+# GRADE COLUNAR (List[Aula] x AulaBatch)
+# ============================================
+
+def _memoria_kb(construir):
+    tracemalloc.start()
+    objeto = construir()
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objeto, atual / 1024
+
+def bench_colunar(tamanhos=(4100, 41000, 205000)):
+    print(f"{'aulas':>8} | {'operação':<26} | {'List[Aula]':>11} | {'AulaBatch':>10} | {'ganho':>6}")
+    for quantidade in tamanhos:
+        dicts = [dict(a.__dict__) for a in gerar_aulas_sinteticas(quantidade)]
+        aulas, memoria_lista = _memoria_kb(lambda: [Aula(**d) for d in dicts])
+        lote, memoria_lote = _memoria_kb(lambda: AulaBatch.de_aulas(aulas))
+        print(f"{quantidade:>8} | {'memória (bytes/aula)':<26} | {memoria_lista * 1024 / quantidade:>9.0f}B | "
+              f"{memoria_lote * 1024 / quantidade:>8.0f}B | {memoria_lista / memoria_lote:>5.1f}x")
+
+        # Horário real: o período 1 do EF II é o período 2 do EM
+        faixas_do_slot = {
+            slot: [f for f in range(len(FAIXAS)) if mascara >> f & 1] for slot, mascara in MASCARA_SLOT.items()
+        }
+
+        def conflitos_lista():
+            contagem = Counter(
+                (a.professor, a.dia, faixa)
+                for a in aulas
+                for faixa in faixas_do_slot.get((a.segmento or segmento_da_turma(a.turma), a.horario), ())
+            )
+            return [chave for chave, n in contagem.items() if n > 1]
+
+        for nome, com_lista, com_lote in [
+            ("aulas por professor", lambda: Counter(a.professor for a in aulas), lote.contagem_por_professor),
+            ("aulas por turma/dia", lambda: Counter((a.turma, a.dia) for a in aulas), lote.matriz_turma_dia),
+            ("conflitos de professor", conflitos_lista, lote.conflitos_professor),
+        ]:
+            tempo_lista = cronometrar(com_lista)
+            tempo_lote = cronometrar(com_lote)
+            print(f"{quantidade:>8} | {nome:<26} | {tempo_lista:>9.2f}ms | {tempo_lote:>8.2f}ms | "
+                  f"{tempo_lista / tempo_lote:>5.1f}x")
+
+# ============================================
+# MODELOS (Aula com __dict__ x AulaCompacta com __slots__)
+# ============================================
+
+def bench_modelos(quantidade=100000):
+    texto = json.dumps([dict(a.__dict__) for a in gerar_aulas_sinteticas(quantidade)])
+
+    def carregar(classe):
+        # Memória que fica retida depois de carregar a grade do JSON e descartar os dicts
+        gc.collect()
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        dicts = json.loads(texto)
+        aulas = [classe(**d) for d in dicts]
+        decorrido = (time.perf_counter() - inicio) * 1000
+        del dicts
+        gc.collect()
+        atual, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return aulas, atual, decorrido
+
+    print(f"{quantidade} aulas carregadas do JSON")
+    print(f"{'modelo':<14} | {'memória':>9} | {'bytes/aula':>10} | {'carga':>9} | {'to_dict()':>9}")
+    for classe in (Aula, AulaCompacta):
+        aulas, memoria, tempo_carga = carregar(classe)
+        tempo_dict = cronometrar(lambda: [a.to_dict() for a in aulas], 1)
+        print(f"{classe.__name__:<14} | {memoria / 2**20:>7.1f}MB | {memoria / quantidade:>9.0f}B | "
+              f"{tempo_carga:>7.0f}ms | {tempo_dict:>7.0f}ms")
+        del aulas
+
+def bench_registro(tamanhos=(4100, 41000)):
+    """Agrupamento por chaves de texto vs. tuplas de ids do RegistroEntidades"""
+    for tamanho in tamanhos:
+        aulas = gerar_aulas_sinteticas(tamanho)
+        registro = RegistroEntidades.de_colecoes(aulas=aulas)
+        codigos = [registro.codificar_aula(a) for a in aulas]
+
+        def por_texto():
+            grupos = {}
+            for a in aulas:
+                grupos.setdefault(f"{a.professor}|{a.dia}|{a.horario}", []).append(a)
+            return grupos
+
+        def por_ids():
+            grupos = {}
+            for a, (t, d, p, di, h) in zip(aulas, codigos):
+                grupos.setdefault((p, di, h), []).append(a)
+            return grupos
+
+        assert len(por_texto()) == len(por_ids())
+        tempo_texto = cronometrar(por_texto, 5)
+        tempo_ids = cronometrar(por_ids, 5)
+        print(f"{tamanho} aulas: chave texto {tempo_texto:.1f}ms | chave ids {tempo_ids:.1f}ms | "
+              f"codificar {cronometrar(lambda: [registro.codificar_aula(a) for a in aulas], 1):.1f}ms")
+
+    # Montagem das restrições do modelo OR-Tools: uma varredura das variáveis
+    # por (professor, dia, período) vs. uma única passada agrupando por ids
+    aulas = gerar_aulas_sinteticas(4100)
+    registro = RegistroEntidades.de_colecoes(aulas=aulas)
+    variaveis_texto = {}
+    for a in aulas:
+        for periodo in range(1, 8):
+            variaveis_texto[(a.turma, a.disciplina, a.dia, periodo, a.professor)] = None
+    variaveis_ids = {(registro.turmas.id(t), registro.disciplinas.id(d), registro.dias.id(di), p,
+                      registro.professores.id(pr)): v for (t, d, di, p, pr), v in variaveis_texto.items()}
+    professores = sorted({a.professor for a in aulas})
+    dias = ['segunda', 'terca', 'quarta', 'quinta', 'sexta']
+
+    def varredura():
+        grupos = 0
+        for prof in professores:
+            for dia in dias:
+                for periodo in range(1, 8):
+                    if [v for (t, d, di, p, pr), v in variaveis_texto.items()
+                            if pr == prof and di == dia and p == periodo]:
+                        grupos += 1
+        return grupos
+
+    def passada_unica():
+        grupos = {}
+        for (t, d, di, p, pr), v in variaveis_ids.items():
+            grupos.setdefault((pr, di, p), []).append(v)
+        return len(grupos)
+
+    assert varredura() == passada_unica()
+    print(f"restrições de professor ({len(variaveis_ids)} variáveis, {len(professores)} professores): "
+          f"varredura {cronometrar(varredura, 1):.0f}ms | passada única {cronometrar(passada_unica):.1f}ms")
+
+def bench_horarios(quantidade=410):
+    """Colisão de horário REAL entre aulas: strptime a cada verificação vs. matriz de TimeSlot"""
+    from datetime import datetime
+
+    tabela = {seg: {p: [t.strip() for t in texto.split("-")] for p, texto in periodos.items()}
+              for seg, periodos in HORARIOS_REAIS.items()}
+
+    def colidem_strptime(seg1, p1, seg2, p2):
+        # Mesma conversão que o escalonador fazia antes de horarios.py
+        inicio1, fim1 = (datetime.strptime(h, "%H:%M").time() for h in tabela[seg1][p1])
+        inicio2, fim2 = (datetime.strptime(h, "%H:%M").time() for h in tabela[seg2][p2])
+        return not (fim1 <= inicio2 or fim2 <= inicio1)
+
+    aulas = gerar_aulas_sinteticas(quantidade)
+    pares = [(a, b) for i, a in enumerate(aulas) for b in aulas[i + 1:]
+             if a.professor == b.professor and a.dia == b.dia]
+
+    def contar(colidem):
+        return sum(1 for a, b in pares if colidem(a.segmento, a.horario, b.segmento, b.horario))
+
+    assert contar(colidem_strptime) == contar(HORARIOS.colidem)
+    tempo_antigo = cronometrar(lambda: contar(colidem_strptime), 1)
+    tempo_novo = cronometrar(lambda: contar(HORARIOS.colidem))
+    print(f"{len(pares)} pares (professor, dia) de {quantidade} aulas: "
+          f"strptime {tempo_antigo:.1f}ms | matriz {tempo_novo:.2f}ms ({tempo_antigo / tempo_novo:.0f}x)")
+
+def bench_disponibilidade(copias=(1, 10)):
+    """Quem pode dar a disciplina D no slot S: laço com textos vs. AND de máscaras"""
+    professores = database.carregar_professores()
+    disciplinas = [d.nome for d in database.carregar_disciplinas()]
+    consultas = [(disc, dia, periodo, grupo) for disc in disciplinas for dia in DIAS
+                 for periodo in range(1, PERIODOS_POR_DIA + 1) for grupo in ("A", "B")]
+
+    for fator in copias:
+        equipe = professores * fator
+
+        def laco():
+            # Mesmas verificações que o escalonador OR-Tools fazia para cada slot
+            resultado = []
+            for disc, dia, periodo, grupo in consultas:
+                resultado.append([
+                    prof.nome for prof in equipe
+                    if disc in prof.disciplinas and dia in prof.disponibilidade
+                    and f"{dia}_{periodo}" not in prof.horarios_indisponiveis
+                    and prof.grupo in [grupo, "AMBOS"]
+                ])
+            return resultado
+
+        tabela = DisponibilidadeBits(equipe)
+
+        def mascaras():
+            return [tabela.mascara_candidatos(disc, dia, periodo, grupo)
+                    for disc, dia, periodo, grupo in consultas]
+
+        tempo_laco = cronometrar(laco)
+        tempo_mascaras = cronometrar(mascaras)
+        tempo_tabela = cronometrar(lambda: DisponibilidadeBits(equipe))
+        print(f"{len(equipe)} professores, {len(consultas)} consultas: laço {tempo_laco:.1f}ms | "
+              f"máscaras {tempo_mascaras:.1f}ms ({tempo_laco / tempo_mascaras:.0f}x) | "
+              f"montar tabela {tempo_tabela:.2f}ms")
+
+def bench_matriz(tamanhos=(410, 4100)):
+    """Consultas de ocupação: varredura da lista de aulas vs. ScheduleMatrix"""
+    import random
+
+    for tamanho in tamanhos:
+        aulas = gerar_aulas_sinteticas(tamanho)
+        gerador = random.Random(0)
+        consultas = [gerador.choice(aulas) for _ in range(500)]
+
+        def varredura():
+            livres = 0
+            for a in consultas:
+                livres += not any(b.turma == a.turma and b.dia == a.dia and b.horario == a.horario for b in aulas)
+                livres += not any(b.professor == a.professor and b.dia == a.dia and
+                                  HORARIOS.colidem(a.segmento, a.horario, b.segmento, b.horario) for b in aulas)
+                livres += sum(1 for b in aulas if b.turma == a.turma and b.dia == a.dia and
+                              b.disciplina == a.disciplina)
+            return livres
+
+        matriz = ScheduleMatrix.de_aulas(aulas)
+
+        def consultas_matriz():
+            livres = 0
+            for a in consultas:
+                livres += matriz.turma_livre(a.turma, a.dia, a.horario)
+                livres += matriz.professor_livre(a.professor, a.dia, a.segmento, a.horario)
+                livres += matriz.aulas_disciplina_no_dia(a.turma, a.disciplina, a.dia)
+            return livres
+
+        assert varredura() == consultas_matriz()
+        tempo_varredura = cronometrar(varredura, 1)
+        tempo_matriz = cronometrar(consultas_matriz)
+        tempo_snapshot = cronometrar(lambda: matriz.copiar().adicionar(aulas[0]))
+        print(f"{tamanho} aulas, {len(consultas)}x3 consultas: varredura {tempo_varredura:.0f}ms | "
+              f"matriz {tempo_matriz:.1f}ms ({tempo_varredura / tempo_matriz:.0f}x) | "
+              f"snapshot + 1 escrita {tempo_snapshot * 1000:.0f}us | "
+              f"montar {cronometrar(lambda: ScheduleMatrix.de_aulas(aulas)):.1f}ms")
+
+def bench_segmentos(quantidade=41000):
+    """Segmento de cada aula: busca linear + heurística pelo nome vs. dicionário por turma"""
+    from models import SEGMENTO_POR_TURMA, segmento_da_turma
+
+    turmas = database.carregar_turmas()
+    aulas = gerar_aulas_sinteticas(quantidade)
+
+    def heuristica(turma_nome):
+        # Mesmo caminho do antigo GradeHorariaORTools._obter_segmento
+        turma_obj = next((t for t in turmas if t.nome == turma_nome), None)
+        if turma_obj and hasattr(turma_obj, 'segmento'):
+            return turma_obj.segmento
+        return "EF_II" if "ef" in turma_nome.lower() or "ano" in turma_nome.lower() else "EM"
+
+    tempo_heuristica = cronometrar(lambda: [heuristica(a.turma) for a in aulas], 1)
+    tempo_dicionario = cronometrar(lambda: [segmento_da_turma(a.turma) for a in aulas])
+    print(f"{quantidade} aulas, {len(SEGMENTO_POR_TURMA)} turmas: heurística {tempo_heuristica:.1f}ms | "
+          f"dicionário {tempo_dicionario:.1f}ms ({tempo_heuristica / tempo_dicionario:.0f}x)")
+
+def bench_estado(tamanhos=(14, 150)):
+    """Escalonador guloso: as quatro verificações por varredura da lista vs. EstadoGrade"""
+    import contextlib
+    import io
+    import random
+
+    import simple_scheduler
+
+    for quantidade in tamanhos:
+        turmas, professores, disciplinas = gerar_escola_sintetica(quantidade)
+        escalonador = simple_scheduler.SimpleGradeHoraria(turmas, professores, disciplinas, [])
+        random.seed(0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            aulas = escalonador.gerar_grade()
+
+        gerador = random.Random(0)
+        consultas = [(gerador.choice(aulas), gerador.choice(professores)) for _ in range(300)]
+        varredura = list(aulas)  # outra lista: _estado_para devolve None e os métodos varrem
+
+        def verificar(lista):
+            return [(escalonador.turma_tem_horario_livre(lista, a.turma, a.dia, a.horario),
+                     escalonador.professor_disponivel_horario_real(lista, p.nome, a.dia, a.segmento, a.horario),
+                     escalonador.disciplina_ja_dada_hoje(lista, a.turma, a.dia, a.disciplina),
+                     escalonador.professor_atingiu_limite(lista, p))
+                    for a, p in consultas]
+
+        assert verificar(varredura) == verificar(aulas)
+        tempo_varredura = cronometrar(lambda: verificar(varredura), 1)
+        tempo_estado = cronometrar(lambda: verificar(aulas))
+
+        def gerar():
+            random.seed(0)
+            with contextlib.redirect_stdout(io.StringIO()):
+                simple_scheduler.SimpleGradeHoraria(turmas, professores, disciplinas, []).gerar_grade()
+
+        print(f"{quantidade} turmas, {len(aulas)} aulas, {len(consultas)}x4 verificações: "
+              f"varredura {tempo_varredura:.1f}ms | estado {tempo_estado:.2f}ms "
+              f"({tempo_varredura / tempo_estado:.0f}x) | gerar_grade {cronometrar(gerar, 1):.0f}ms")
+
+def bench_ordenacao(tamanhos=(14, 150), sementes=(0, 1, 2, 3, 4)):
+    """gerar_grade: ordem aleatória (várias sementes) vs. mais restritas primeiro"""
+    import contextlib
+    import io
+    import random
+
+    import simple_scheduler
+
+    print(f"{'turmas':>6} | {'ordenação':<10} | {'completude':>11} | {'falhas':>7} | {'tempo':>8}")
+    for quantidade in tamanhos:
+        turmas, professores, disciplinas = gerar_escola_sintetica(quantidade)
+        for ordenacao in ("aleatoria", "restritiva"):
+            execucoes = []
+            for semente in sementes:
+                random.seed(semente)
+                escalonador = simple_scheduler.SimpleGradeHoraria(turmas, professores, disciplinas, [])
+                with contextlib.redirect_stdout(io.StringIO()):
+                    escalonador.gerar_grade(ordenacao, reparar=False)
+                execucoes.append(escalonador.estatisticas)
+            completude = [e["completude"] for e in execucoes]
+            falhas = [e["falhas"] for e in execucoes]
+            tempo = sum(e["tempo_ms"] for e in execucoes) / len(execucoes)
+            faixa_completude = f"{min(completude):.1f}-{max(completude):.1f}%"
+            faixa_falhas = f"{min(falhas)}-{max(falhas)}"
+            print(f"{quantidade:>6} | {ordenacao:<10} | {faixa_completude:>11} | {faixa_falhas:>7} | {tempo:>6.0f}ms")
+
+def bench_backtracking(tamanhos=(6, 14, 20), sementes=(0, 1)):
+    """Instâncias apertadas (solução completa plantada): gulosos vs. busca com backtracking"""
+    import contextlib
+    import io
+    import random
+
+    import simple_scheduler
+    from busca_backtracking import BuscaBacktracking
+
+    print(f"{'turmas':>6} | {'semente':>7} | {'aleatória':>9} | {'restritiva':>10} | "
+          f"{'backtracking':>12} | {'nós':>6} | {'backjumps':>9} | {'tempo':>8}")
+    for quantidade in tamanhos:
+        for semente in sementes:
+            turmas, professores, disciplinas = gerar_instancia_apertada(quantidade, semente)
+            completude = {}
+            for ordenacao in ("aleatoria", "restritiva"):
+                random.seed(semente)
+                escalonador = simple_scheduler.SimpleGradeHoraria(turmas, professores, disciplinas, [])
+                with contextlib.redirect_stdout(io.StringIO()):
+                    escalonador.gerar_grade(ordenacao, reparar=False)
+                completude[ordenacao] = escalonador.estatisticas["completude"]
+            busca = BuscaBacktracking(turmas, professores, disciplinas, escalonador.limites,
+                                      max_nos=50000, max_segundos=60)
+            busca.resolver()
+            e = busca.estatisticas
+            print(f"{quantidade:>6} | {semente:>7} | {completude['aleatoria']:>8.1f}% | "
+                  f"{completude['restritiva']:>9.1f}% | {e['atribuidas'] / e['variaveis'] * 100:>11.1f}% | "
+                  f"{e['nos']:>6} | {e['backjumps']:>9} | {e['tempo_ms']:>6.0f}ms")
+
+def bench_multistart(execucoes=(1, 4, 16, 64)):
+    """Melhor de N execuções do algoritmo simples (banco original), em 1 processo e em todos os núcleos"""
+    from multistart import gerar_grade_multistart
+
+    dados = (database.carregar_turmas(), database.carregar_professores(), database.carregar_disciplinas())
+    print(f"núcleos: {os.cpu_count()}")
+    print(f"{'execuções':>9} | {'processos':>9} | {'melhor':>7} | {'média':>7} | {'pontuação':>9} | {'tempo':>8}")
+    for quantidade in execucoes:
+        for processos in sorted({1, os.cpu_count() or 1}):
+            _, resumo = gerar_grade_multistart(*dados, execucoes=quantidade, processos=processos,
+                                               reparar=False)
+            print(f"{quantidade:>9} | {resumo['processos']:>9} | {resumo['completude']:>6.1f}% | "
+                  f"{resumo['media_completude']:>6.1f}% | {resumo['pontuacao']:>9} | {resumo['tempo_ms']:>6.0f}ms")
+
+def bench_tabu(tamanhos=(14, 100), fracao_bagunca=0.05, max_segundos=5.0):
+    """Busca tabu sobre a grade gulosa, limpa e com uma fração das aulas espalhadas ao acaso"""
+    import copy
+    import random
+
+    import simple_scheduler
+    from busca_tabu import BuscaTabu
+
+    print(f"{'turmas':>6} | {'grade':<9} | {'aulas':>5} | {'violações':>10} | {'suave':>9} | "
+          f"{'sem violações':>13} | {'iterações':>9}")
+    for quantidade in tamanhos:
+        turmas, professores, disciplinas = gerar_escola_sintetica(quantidade)
+        random.seed(0)
+        aulas = simple_scheduler.SimpleGradeHoraria(turmas, professores, disciplinas, [],
+                                                    silencioso=True).gerar_grade()
+        gerador = random.Random(1)
+        bagunca = [copy.copy(aula) for aula in aulas]
+        for aula in gerador.sample(bagunca, int(len(bagunca) * fracao_bagunca)):
+            aula.dia = gerador.choice(DIAS)
+            aula.horario = gerador.randint(1, 5)
+        for nome, entrada in (("limpa", aulas), ("bagunçada", bagunca)):
+            busca = BuscaTabu(entrada, professores, disciplinas, max_segundos=max_segundos)
+            busca.resolver()
+            e = busca.estatisticas
+            viavel = "-" if e["sem_violacoes_ms"] is None else f"{e['sem_violacoes_ms']:.0f}ms"
+            print(f"{quantidade:>6} | {nome:<9} | {len(entrada):>5} | "
+                  f"{e['violacoes_inicial']:>4} -> {e['violacoes_final']:<3} | "
+                  f"{e['suave_inicial']:>3} -> {e['suave_final']:<3} | {viavel:>13} | {e['iteracoes']:>9}")
+
+def bench_recozimento(tamanhos=(14, 100), resfriamentos=(0.99, 0.995, 0.999)):
+    """Recozimento sobre a grade gulosa: pontuação por termo para cada taxa de resfriamento"""
+    import random
+
+    import simple_scheduler
+    from recozimento import Recozimento
+
+    for quantidade in tamanhos:
+        turmas, professores, disciplinas = gerar_escola_sintetica(quantidade)
+        random.seed(0)
+        aulas = simple_scheduler.SimpleGradeHoraria(turmas, professores, disciplinas, [],
+                                                    silencioso=True).gerar_grade()
+        for resfriamento in resfriamentos:
+            recozimento = Recozimento(aulas, professores, disciplinas, resfriamento=resfriamento,
+                                      max_iteracoes=10 ** 7, max_segundos=60)
+            recozimento.resolver()
+            e = recozimento.estatisticas
+            termos = " ".join(f"{termo} {e['termos_iniciais'][termo]:.0f}->{valor:.0f}"
+                              for termo, valor in e["termos_finais"].items())
+            print(f"{quantidade} turmas, resfriamento {resfriamento}: pontuação {e['pontuacao_inicial']:.0f} -> "
+                  f"{e['pontuacao_final']:.0f} em {e['tempo_ms']:.0f}ms ({e['iteracoes']} iterações, "
+                  f"{e['violacoes']} violações) | {termos}")
+
+def bench_reparo(tamanhos=(6, 14, 20, 40), sementes=(0, 1, 2)):
+    """Aulas que os gulosos deixam de fora: sem reparo vs. cadeias de ejeção e de Kempe"""
+    import random
+
+    import simple_scheduler
+
+    print(f"{'instância':<14} | {'ordenação':<10} | {'sem reparo':>10} | {'com reparo':>10} | "
+          f"{'direto':>6} | {'ejeção':>6} | {'kempe':>5} | {'reparo':>8}")
+    instancias = [("banco", (database.carregar_turmas(), database.carregar_professores(),
+                             database.carregar_disciplinas()), sementes)]
+    instancias += [(f"apertada {quantidade}", gerar_instancia_apertada(quantidade, semente), (semente,))
+                   for quantidade in tamanhos for semente in sementes]
+    for nome, (turmas, professores, disciplinas), sementes_instancia in instancias:
+        for ordenacao in ("aleatoria", "restritiva"):
+            antes, depois, tempo = [], [], 0.0
+            contagem = Counter()
+            for semente in sementes_instancia:
+                for reparar in (False, True):
+                    random.seed(semente)
+                    escalonador = simple_scheduler.SimpleGradeHoraria(turmas, professores, disciplinas, [],
+                                                                      silencioso=True)
+                    escalonador.gerar_grade(ordenacao, reparar=reparar)
+                    (depois if reparar else antes).append(escalonador.estatisticas["completude"])
+                e = escalonador.estatisticas_reparo
+                contagem.update({chave: e.get(chave, 0) for chave in ("direto", "ejecao", "kempe")})
+                tempo += e.get("tempo_ms", 0.0)
+            print(f"{nome:<14} | {ordenacao:<10} | {sum(antes) / len(antes):>9.1f}% | "
+                  f"{sum(depois) / len(depois):>9.1f}% | {contagem['direto']:>6} | {contagem['ejecao']:>6} | "
+                  f"{contagem['kempe']:>5} | {tempo / len(sementes_instancia):>6.0f}ms")
+
+def bench_emparelhamento(tamanhos=(14, 150), sementes=(0, 1, 2)):
+    """Professor escolhido na hora (guloso) vs. emparelhamento por horário REAL com equilíbrio de carga"""
+    import random
+
+    import simple_scheduler
+
+    print(f"{'instância':<14} | {'ordenação':<14} | {'completude':>11} | {'trocas':>6} | "
+          f"{'custo carga':>15} | {'tempo':>8}")
+    instancias = [("banco", (database.carregar_turmas(), database.carregar_professores(),
+                             database.carregar_disciplinas()))]
+    instancias += [(f"sintética {quantidade}", gerar_escola_sintetica(quantidade)) for quantidade in tamanhos]
+    instancias += [(f"apertada {quantidade}", gerar_instancia_apertada(quantidade, 0)) for quantidade in (14, 40)]
+    for nome, (turmas, professores, disciplinas) in instancias:
+        for ordenacao in ("aleatoria", "emparelhamento"):
+            completude, tempo = [], 0.0
+            for semente in sementes:
+                random.seed(semente)
+                escalonador = simple_scheduler.SimpleGradeHoraria(turmas, professores, disciplinas, [],
+                                                                  silencioso=True)
+                escalonador.gerar_grade(ordenacao, reparar=False)
+                completude.append(escalonador.estatisticas["completude"])
+                tempo += escalonador.estatisticas["tempo_ms"]
+            e = escalonador.estatisticas_emparelhamento if ordenacao == "emparelhamento" else {}
+            custo = f"{e['custo_inicial']}->{e['custo_final']}" if e else "-"
+            print(f"{nome:<14} | {ordenacao:<14} | {min(completude):>4.1f}-{max(completude):.1f}% | "
+                  f"{e.get('trocas', '-'):>6} | {custo:>15} | {tempo / len(sementes):>6.0f}ms")
+
+def bench_viabilidade(tamanhos=(14, 150), apertadas=(14, 40)):
+    """Fluxo máximo demanda -> (professor, horário): tempo, limite de completude e gargalos do corte mínimo"""
+    import simple_scheduler
+    from viabilidade_fluxo import analisar_viabilidade, descrever_gargalo
+
+    instancias = [("banco", (database.carregar_turmas(), database.carregar_professores(),
+                             database.carregar_disciplinas()))]
+    instancias += [(f"sintética {quantidade}", gerar_escola_sintetica(quantidade)) for quantidade in tamanhos]
+    instancias += [(f"apertada {quantidade}", gerar_instancia_apertada(quantidade, 0)) for quantidade in apertadas]
+    print(f"{'instância':<14} | {'fluxo':>11} | {'máxima':>7} | {'gargalos':>8} | {'tempo':>8}")
+    for nome, (turmas, professores, disciplinas) in instancias:
+        limites = simple_scheduler.SimpleGradeHoraria(turmas, professores, disciplinas, [], silencioso=True).limites
+        melhor = None
+        for _ in range(3):
+            analise = analisar_viabilidade(turmas, professores, disciplinas, limites)
+            melhor = analise["tempo_ms"] if melhor is None else min(melhor, analise["tempo_ms"])
+        print(f"{nome:<14} | {analise['fluxo']:>5}/{analise['demanda']:<5} | {analise['completude_maxima']:>6.1f}% | "
+              f"{len(analise['gargalos']):>8} | {melhor:>6.1f}ms")
+        for gargalo in analise["gargalos"][:3]:
+            print(f"    {descrever_gargalo(gargalo)}")
+
+# ============================================
+# PONTO DE ENTRADA
+# ============================================
+
+BENCHMARKS = {
+    "salvamento": bench_salvamento,
+    "snapshot": bench_snapshot,
+    "indice": bench_indice,
+    "colunar": bench_colunar,
+    "modelos": bench_modelos,
+    "registro": bench_registro,
+    "horarios": bench_horarios,
+    "disponibilidade": bench_disponibilidade,
+    "matriz": bench_matriz,
+    "segmentos": bench_segmentos,
+    "estado": bench_estado,
+    "ordenacao": bench_ordenacao,
+    "backtracking": bench_backtracking,
+    "multistart": bench_multistart,
+    "tabu": bench_tabu,
+    "recozimento": bench_recozimento,
+    "reparo": bench_reparo,
+    "emparelhamento": bench_emparelhamento,
+    "viabilidade": bench_viabilidade,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do gerador de grade horária")
+    parser.add_argument("nome", choices=sorted(BENCHMARKS), help="benchmark a executar")
+    args = parser.parse_args(argv)
+    BENCHMARKS[args.nome]()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,383 @@
+# busca_backtracking.py - Busca completa com forward checking e backjumping dirigido por conflitos
+"""
+Cada aula a colocar (turma, disciplina, k-ésima aula da semana) é uma
+variável; os valores são (dia, período, professor) permitidos pela
+disponibilidade. Depois de cada atribuição os domínios das variáveis
+futuras são podados (forward checking):
+
+    - mesma turma: o (dia, período) escolhido sai do domínio
+    - professor: os períodos de qualquer segmento que se sobrepõem no
+      horário REAL saem para as aulas que o professor poderia dar
+    - máximo por dia (1 se pesada, 2 senão): atingido, o dia sai das aulas
+      da mesma disciplina na turma
+    - limite semanal: atingido, o professor sai de todos os domínios
+    - aulas da mesma (turma, disciplina) são intercambiáveis: as seguintes
+      só podem ficar depois da k-ésima na semana (quebra de simetria)
+
+Além dos domínios vazios, dois testes pegam becos sem saída mais cedo:
+cada (turma, disciplina) precisa de dias suficientes para as aulas que
+faltam (5 aulas pesadas pedem 5 dias distintos), e as aulas livres de cada
+turma precisam caber em horários distintos (fluxo máximo em um grafo
+grupo -> dia -> horário).
+Quando um teste falha, a busca volta direto para a atribuição mais recente
+entre as responsáveis pelas podas envolvidas (FC-CBJ, Prosser 1993), em vez
+de desfazer apenas a última. Limites de nós e de tempo encerram a busca; nesse caso
+resolver() devolve a atribuição parcial mais profunda encontrada.
+
+    busca = BuscaBacktracking(turmas, professores, disciplinas, limites)
+    aulas = busca.resolver()
+    busca.estatisticas   # completo, nos, backjumps, tempo_ms, motivo...
+"""
+
+import time
+
+from disponibilidade import DIAS, DisponibilidadeBits
+from horarios import HORARIOS
+from models import Aula, segmento_da_turma
+from neuro_rules import maximo_aulas_por_dia
+from viabilidade_fluxo import fluxo_maximo
+
+def _rank_periodo(tipo, segmento, periodo):
+    """Preferência de período do escalonador guloso (menor = melhor)"""
+    if tipo == "pesada":
+        return 0 if periodo <= 3 else 1 if periodo <= 5 else 2
+    if tipo == "pratica":
+        return 1 if periodo == 1 else 0
+    if tipo == "leve":
+        return 0 if periodo >= (5 if segmento == "EM" else 4) else 1
+    return 0
+
+class BuscaBacktracking:
+    """FC-CBJ sobre as aulas de um conjunto de turmas, com limites de nós e de tempo"""
+
+    def __init__(self, turmas, professores, disciplinas, limites=None, max_nos=200000, max_segundos=30.0):
+        self.turmas = list(turmas)
+        self.professores = list(professores)
+        self.disciplinas = list(disciplinas)
+        self.limites = dict(limites or {})
+        self.max_nos = max_nos
+        self.max_segundos = max_segundos
+        self.estatisticas = {}
+        self._montar_variaveis()
+
+    # ============================================
+    # VARIÁVEIS E DOMÍNIOS
+    # ============================================
+
+    def _montar_variaveis(self):
+        disponibilidade = DisponibilidadeBits(self.professores)
+        indice_prof = disponibilidade.indice
+        self.limite_prof = [self.limites.get(p.nome, 35) for p in self.professores]
+
+        # Atributos de cada variável em listas paralelas
+        self.var_turma, self.var_segmento, self.var_disciplina, self.var_grupo = [], [], [], []
+        self.grupos = []            # (turma, disciplina) -> [variáveis em ordem k]
+        self.maximo_grupo = []      # aulas por dia permitidas para o grupo
+        self.dominio_inicial = []
+        self.vars_da_turma = {}
+        self.grupos_da_turma = {}
+        self.vars_do_prof_segmento = {}
+        self.vars_do_prof = [[] for _ in self.professores]
+
+        for turma in self.turmas:
+            segmento = getattr(turma, 'segmento', None) or segmento_da_turma(turma.nome)
+            grupo_turma = getattr(turma, 'grupo', "A")
+            periodos = HORARIOS.periodos(segmento)
+            for disc in self.disciplinas:
+                if turma.nome not in disc.turmas or getattr(disc, 'grupo', "A") != grupo_turma:
+                    continue
+                dominio = set()
+                professores_possiveis = set()
+                for d, dia in enumerate(DIAS):
+                    for periodo in periodos:
+                        for prof in disponibilidade.candidatos(disc.nome, dia, periodo, grupo_turma):
+                            p = indice_prof[prof.nome]
+                            dominio.add((d, periodo, p))
+                            professores_possiveis.add(p)
+                g = len(self.grupos)
+                self.grupos.append([])
+                self.grupos_da_turma.setdefault(turma.nome, []).append(g)
+                self.maximo_grupo.append(maximo_aulas_por_dia(disc))
+                for _ in range(disc.carga_semanal):
+                    v = len(self.var_turma)
+                    self.var_turma.append(turma.nome)
+                    self.var_segmento.append(segmento)
+                    self.var_disciplina.append(disc)
+                    self.var_grupo.append(g)
+                    self.dominio_inicial.append(set(dominio))
+                    self.grupos[g].append(v)
+                    self.vars_da_turma.setdefault(turma.nome, []).append(v)
+                    for p in professores_possiveis:
+                        self.vars_do_prof[p].append(v)
+                        self.vars_do_prof_segmento.setdefault((p, segmento), []).append(v)
+        self.n = len(self.var_turma)
+
+        # Períodos de cada segmento que se sobrepõem a um (segmento, período)
+        self.sobrepostos = {}
+        for slot in HORARIOS.slots:
+            self.sobrepostos[(slot.segmento, slot.periodo)] = [
+                (HORARIOS.slots[b].segmento, HORARIOS.slots[b].periodo) for b in HORARIOS.sobrepostos(slot.id)
+            ]
+
+    # ============================================
+    # ATRIBUIÇÃO E PODA
+    # ============================================
+
+    def _podar(self, u, valor, x):
+        """Retira valor do domínio de u por causa da atribuição de x (registrado na trilha)"""
+        if valor in self.dominio[u]:
+            self.dominio[u].discard(valor)
+            self.trilha.append((u, valor, x))
+            self.passado_fc[u].add(x)
+            return not self.dominio[u]
+        return False
+
+    def _podar_todos(self, u, condicao, x):
+        """Retira do domínio de u os valores que satisfazem condicao; True se esvaziou"""
+        for valor in [v for v in self.dominio[u] if condicao(v)]:
+            self.dominio[u].discard(valor)
+            self.trilha.append((u, valor, x))
+            self.passado_fc[u].add(x)
+        return not self.dominio[u]
+
+    def _atribuir(self, x, valor):
+        """Atribui e poda; devolve as atribuições culpadas se algo ficou impossível, ou None"""
+        d, periodo, p = valor
+        turma = self.var_turma[x]
+        segmento = self.var_segmento[x]
+        g = self.var_grupo[x]
+        self.atribuido[x] = valor
+        self.inicio_trilha[x] = len(self.trilha)
+        self.horas[p] += 1
+        self.no_dia[(g, d)] = self.no_dia.get((g, d), 0) + 1
+        livre = self.atribuido
+
+        # Mesma turma: o horário ficou ocupado
+        for u in self.vars_da_turma[turma]:
+            if livre[u] is None:
+                for valor_u in [v for v in self.dominio[u] if v[0] == d and v[1] == periodo]:
+                    if self._podar(u, valor_u, x):
+                        return self.passado_fc[u]
+        # Professor: períodos sobrepostos no horário real, de qualquer segmento
+        for segmento_u, periodo_u in self.sobrepostos[(segmento, periodo)]:
+            for u in self.vars_do_prof_segmento.get((p, segmento_u), ()):
+                if livre[u] is None and self._podar(u, (d, periodo_u, p), x):
+                    return self.passado_fc[u]
+        # Máximo de aulas da disciplina no dia; simetria: as demais aulas do grupo ficam depois desta
+        esgotou_dia = self.no_dia[(g, d)] >= self.maximo_grupo[g]
+        for u in self.grupos[g]:
+            if livre[u] is None and self._podar_todos(
+                    u, lambda v: (v[0], v[1]) <= (d, periodo) or (esgotou_dia and v[0] == d), x):
+                return self.passado_fc[u]
+        # Limite semanal do professor
+        if self.horas[p] >= self.limite_prof[p]:
+            for u in self.vars_do_prof[p]:
+                if livre[u] is None and self._podar_todos(u, lambda v: v[2] == p, x):
+                    return self.passado_fc[u]
+
+        # Testes além dos domínios vazios, só nos grupos e turmas que sofreram poda
+        podadas = {u for u, _, _ in self.trilha[self.inicio_trilha[x]:]}
+        for grupo in {self.var_grupo[u] for u in podadas} | {g}:
+            culpados = self._faltam_dias(grupo)
+            if culpados is not None:
+                return culpados
+        for turma_u in {self.var_turma[u] for u in podadas} | {turma}:
+            culpados = self._faltam_horarios(turma_u)
+            if culpados is not None:
+                return culpados
+        return None
+
+    def _faltam_dias(self, g):
+        """Culpados se as aulas livres do grupo não cabem nos dias que restam, senão None"""
+        livres = [u for u in self.grupos[g] if self.atribuido[u] is None]
+        if not livres:
+            return None
+        # As aulas livres de um grupo recebem as mesmas podas: o domínio da primeira vale para todas
+        horarios_por_dia = {}
+        for d, periodo, _ in self.dominio[livres[0]]:
+            horarios_por_dia.setdefault(d, set()).add(periodo)
+        cabem = sum(min(self.maximo_grupo[g] - self.no_dia.get((g, d), 0), len(periodos))
+                    for d, periodos in horarios_por_dia.items())
+        if cabem >= len(livres):
+            return None
+        return self.passado_fc[livres[0]] | {u for u in self.grupos[g] if self.atribuido[u] is not None}
+
+    def _faltam_horarios(self, turma):
+        """
+        Culpados se as aulas livres da turma não cabem em horários distintos respeitando
+        o máximo por dia de cada disciplina, senão None. É um fluxo máximo pequeno:
+        fonte -> grupo (aulas livres) -> (grupo, dia) (máximo do dia) -> horário -> sumidouro (1).
+        """
+        demanda = {}
+        horarios = {}
+        for g in self.grupos_da_turma[turma]:
+            livres = [u for u in self.grupos[g] if self.atribuido[u] is None]
+            if livres:
+                demanda[g] = len(livres)
+                for d, periodo, _ in self.dominio[livres[0]]:
+                    horarios.setdefault((g, d), set()).add((d, periodo))
+        if not demanda:
+            return None
+
+        nos = {}
+        def no(chave):
+            return nos.setdefault(chave, len(nos))
+        fonte, sumidouro = no("fonte"), no("sumidouro")
+        arestas = []
+        for g, quantidade in demanda.items():
+            arestas.append((fonte, no(("g", g)), quantidade))
+        for (g, d), livres in horarios.items():
+            arestas.append((no(("g", g)), no(("gd", g, d)), self.maximo_grupo[g] - self.no_dia.get((g, d), 0)))
+            for horario in livres:
+                arestas.append((no(("gd", g, d)), no(("h", horario)), 1))
+        for chave in list(nos):
+            if chave[0] == "h":
+                arestas.append((nos[chave], sumidouro, 1))
+
+        if fluxo_maximo(len(nos), arestas, fonte, sumidouro) >= sum(demanda.values()):
+            return None
+        culpados = set()
+        for g in demanda:
+            for u in self.grupos[g]:
+                if self.atribuido[u] is None:
+                    culpados |= self.passado_fc[u]
+                else:
+                    culpados.add(u)
+        return culpados
+
+    def _desfazer(self, x):
+        """Desfaz a atribuição de x e as podas que ela causou"""
+        d, _, p = self.atribuido[x]
+        g = self.var_grupo[x]
+        inicio = self.inicio_trilha[x]
+        while len(self.trilha) > inicio:
+            u, valor, _ = self.trilha.pop()
+            self.dominio[u].add(valor)
+            self.passado_fc[u].discard(x)
+        self.horas[p] -= 1
+        self.no_dia[(g, d)] -= 1
+        self.atribuido[x] = None
+
+    # ============================================
+    # ORDENAÇÃO
+    # ============================================
+
+    def _escolher_variavel(self):
+        """Menor domínio entre a primeira aula ainda livre de cada grupo (as demais esperam a simetria)"""
+        melhor = None
+        melhor_chave = None
+        for g, variaveis in enumerate(self.grupos):
+            for v in variaveis:
+                if self.atribuido[v] is None:
+                    chave = (len(self.dominio[v]), -(len(variaveis)), v)
+                    if melhor_chave is None or chave < melhor_chave:
+                        melhor, melhor_chave = v, chave
+                    break
+        return melhor
+
+    def _ordenar_valores(self, x):
+        disc = self.var_disciplina[x]
+        segmento = self.var_segmento[x]
+        horas = self.horas
+        return sorted(self.dominio[x], reverse=True,
+                      key=lambda v: (_rank_periodo(disc.tipo, segmento, v[1]), horas[v[2]], v))
+
+    # ============================================
+    # BUSCA
+    # ============================================
+
+    def resolver(self):
+        """Lista de Aula: completa se achou solução, senão a atribuição parcial mais profunda"""
+        inicio = time.perf_counter()
+        self.dominio = [set(d) for d in self.dominio_inicial]
+        self.atribuido = [None] * self.n
+        self.inicio_trilha = [0] * self.n
+        self.trilha = []
+        self.passado_fc = [set() for _ in range(self.n)]
+        self.conflitos = [set() for _ in range(self.n)]
+        self.horas = [0] * len(self.professores)
+        self.no_dia = {}
+
+        posicao = {}            # variável -> profundidade na pilha
+        pilha = []              # [(variável, valores ainda não tentados)]
+        nos = backjumps = 0
+        melhor = {}
+        motivo = "completo"
+
+        # Domínio vazio antes de começar: nenhuma atribuição é culpada
+        if any(not d for d in self.dominio):
+            motivo = "inviavel"
+        else:
+            x = self._escolher_variavel()
+            if x is not None:
+                posicao[x] = 0
+                pilha.append((x, self._ordenar_valores(x)))
+
+        while pilha and motivo == "completo":
+            x, valores = pilha[-1]
+            atribuiu = False
+            while valores:
+                nos += 1
+                if nos > self.max_nos:
+                    motivo = "limite_nos"
+                    break
+                if nos % 256 == 0 and time.perf_counter() - inicio > self.max_segundos:
+                    motivo = "limite_tempo"
+                    break
+                valor = valores.pop()
+                culpados = self._atribuir(x, valor)
+                if culpados is None:
+                    atribuiu = True
+                    break
+                # Os responsáveis pelas podas envolvidas entram no conjunto de conflitos de x
+                self.conflitos[x] |= culpados - {x}
+                self._desfazer(x)
+            if motivo != "completo":
+                break
+
+            if atribuiu:
+                if len(pilha) > len(melhor):
+                    melhor = {v: self.atribuido[v] for v, _ in pilha}
+                y = self._escolher_variavel()
+                if y is None:
+                    break  # todas atribuídas
+                self.conflitos[y] = set()
+                posicao[y] = len(pilha)
+                pilha.append((y, self._ordenar_valores(y)))
+                continue
+
+            # Sem valores: volta para o culpado mais recente
+            culpados = self.conflitos[x] | self.passado_fc[x]
+            if not culpados:
+                motivo = "inviavel"
+                break
+            h = max(culpados, key=posicao.__getitem__)
+            self.conflitos[h] |= culpados - {h}
+            backjumps += 1
+            pilha.pop()
+            del posicao[x]
+            while pilha[-1][0] != h:
+                y, _ = pilha.pop()
+                self._desfazer(y)
+                del posicao[y]
+            self._desfazer(h)
+
+        completo = motivo == "completo" and all(v is not None for v in self.atribuido)
+        atribuicao = {v: self.atribuido[v] for v in range(self.n) if self.atribuido[v] is not None} \
+            if completo else melhor
+        aulas = [
+            Aula(turma=self.var_turma[v], disciplina=self.var_disciplina[v].nome,
+                 professor=self.professores[p].nome, dia=DIAS[d], horario=periodo,
+                 segmento=self.var_segmento[v])
+            for v, (d, periodo, p) in sorted(atribuicao.items())
+        ]
+        self.estatisticas = {
+            "completo": completo,
+            "motivo": motivo,
+            "variaveis": self.n,
+            "atribuidas": len(aulas),
+            "nos": nos,
+            "backjumps": backjumps,
+            "tempo_ms": (time.perf_counter() - inicio) * 1000,
+        }
+        return aulas
@@ -0,0 +1,393 @@
+# busca_tabu.py - Melhoria de uma grade pronta por busca tabu
+"""
+Parte de uma List[Aula] já alocada e melhora o custo
+
+    custo = PESO_DURO * violações + penalidade suave
+
+violações: pares de aulas do mesmo professor na mesma faixa de horário
+REAL, aulas da turma no mesmo período, disciplina acima do máximo por dia
+(1 se pesada, 2 senão), aula em horário indisponível do professor.
+penalidade suave: aulas fora do horário ideal do tipo
+(neuro_rules.eh_horario_ideal) + janelas (períodos vagos entre aulas) de
+cada turma no dia.
+
+Vizinhanças, sempre dentro da turma e com o mesmo professor:
+    mover  - a aula vai para um (dia, período) vago da turma
+    trocar - duas aulas da turma trocam de (dia, período)
+
+O custo é mantido por contadores (turma/período, professor/faixa,
+disciplina/dia, períodos ocupados da turma no dia), então avaliar um
+movimento é tirar e recolocar as aulas envolvidas, O(faixas), sem varrer a
+lista. Cada iteração examina todas as aulas em violação e uma amostra
+aleatória das demais. Voltar uma aula ao (dia, período) de onde saiu fica
+proibido por alguns passos (lista tabu), a menos que o movimento leve a um
+custo menor que o melhor já visto (critério de aspiração). Para por tempo,
+por iterações ou depois de muitas iterações sem melhorar.
+
+    busca = BuscaTabu(aulas, professores, disciplinas, max_segundos=5)
+    aulas_melhores = busca.resolver()
+    busca.estatisticas   # custo_inicial, custo_final, violacoes_*, sem_violacoes_ms...
+"""
+
+import copy
+import random
+import time
+
+from disponibilidade import DIAS, DisponibilidadeBits, bit_slot, indice_dia
+from estado_grade import MASCARA_SLOT
+from horarios import HORARIOS
+from neuro_rules import eh_horario_ideal, maximo_aulas_por_dia
+
+PESO_DURO = 1000
+
+def _janelas(ocupados):
+    """Períodos vagos entre a primeira e a última aula, com ocupados em bits (bit p-1 = período p)"""
+    if not ocupados:
+        return 0
+    return ocupados.bit_length() - (ocupados & -ocupados).bit_length() + 1 - ocupados.bit_count()
+
+class BuscaTabu:
+    """Busca tabu com vizinhanças mover/trocar e avaliação incremental do custo"""
+
+    def __init__(self, aulas, professores, disciplinas, max_segundos=5.0, max_iteracoes=20000,
+                 max_sem_melhora=3000, amostra=12, semente=0):
+        # Cópias: a lista original não muda
+        self.aulas = [copy.copy(aula) for aula in aulas]
+        self.max_segundos = max_segundos
+        self.max_iteracoes = max_iteracoes
+        self.max_sem_melhora = max_sem_melhora
+        self.amostra = amostra
+        self.aleatorio = random.Random(semente)
+        self.estatisticas = {}
+
+        disponibilidade = DisponibilidadeBits(professores)
+        tipos = {disc.nome: disc.tipo for disc in disciplinas}
+        por_nome = {disc.nome: disc for disc in disciplinas}
+        n = len(self.aulas)
+        self.segmento = [aula.segmento or "EF_II" for aula in self.aulas]
+        self.maximo_dia = [
+            maximo_aulas_por_dia(por_nome[aula.disciplina]) if aula.disciplina in por_nome else 2
+            for aula in self.aulas
+        ]
+        # Slots livres do professor (bits de disponibilidade.bit_slot); professor desconhecido: todos
+        self.livres_prof = []
+        for aula in self.aulas:
+            i = disponibilidade.indice.get(aula.professor)
+            self.livres_prof.append(-1 if i is None else disponibilidade.mascaras[i])
+        # Períodos ideais de cada aula, em bits (bit p-1 = período p)
+        self.ideais = []
+        for aula, segmento in zip(self.aulas, self.segmento):
+            tipo = tipos.get(aula.disciplina, "media")
+            self.ideais.append(sum(1 << (p - 1) for p in HORARIOS.periodos(segmento)
+                                   if eh_horario_ideal(tipo, p, segmento)))
+        # Slots (dia, período) possíveis de cada segmento
+        self.slots_segmento = {s: [(d, p) for d in range(len(DIAS)) for p in HORARIOS.periodos(s)]
+                               for s in set(self.segmento)}
+
+        self.dia = [indice_dia(aula.dia) for aula in self.aulas]
+        self.periodo = [aula.horario for aula in self.aulas]
+        self.ativas = [i for i in range(n) if self.dia[i] is not None]
+
+        # Contadores do custo
+        self.ocupantes = {}         # (turma, dia, periodo) -> [aulas]
+        self.faixas_prof = {}       # (professor, dia, bit da faixa) -> aulas
+        self.no_dia = {}            # (turma, disciplina, dia) -> aulas
+        self.ocupados = {}          # (turma, dia) -> bits dos períodos com aula
+        self.duro = 0
+        self.suave = 0
+        for i in self.ativas:
+            self._por(i, self.dia[i], self.periodo[i])
+
+    # ============================================
+    # CUSTO INCREMENTAL
+    # ============================================
+
+    def custo(self):
+        return PESO_DURO * self.duro + self.suave
+
+    def _registrar(self, i, d, p, delta):
+        """Conta (delta=1) ou desconta (delta=-1) a aula i em (d, p), atualizando duro e suave"""
+        aula = self.aulas[i]
+        turma = aula.turma
+
+        # Turma no mesmo período: pares c*(c-1)/2
+        chave = (turma, d, p)
+        ocupantes = self.ocupantes.setdefault(chave, [])
+        if delta > 0:
+            self.duro += len(ocupantes)
+            ocupantes.append(i)
+        else:
+            ocupantes.remove(i)
+            self.duro -= len(ocupantes)
+
+        # Professor nas faixas de horário REAL do período
+        mascara = MASCARA_SLOT.get((self.segmento[i], p), 0)
+        while mascara:
+            bit = mascara & -mascara
+            mascara ^= bit
+            chave = (aula.professor, d, bit)
+            c = self.faixas_prof.get(chave, 0)
+            if delta > 0:
+                self.duro += c
+                self.faixas_prof[chave] = c + 1
+            else:
+                self.faixas_prof[chave] = c - 1
+                self.duro -= c - 1
+
+        # Máximo da disciplina no dia
+        chave = (turma, aula.disciplina, d)
+        c = self.no_dia.get(chave, 0)
+        if delta > 0:
+            self.duro += c >= self.maximo_dia[i]
+            self.no_dia[chave] = c + 1
+        else:
+            self.no_dia[chave] = c - 1
+            self.duro -= c - 1 >= self.maximo_dia[i]
+
+        # Disponibilidade do professor
+        bit = bit_slot(DIAS[d], p)
+        if bit is not None and not self.livres_prof[i] >> bit & 1:
+            self.duro += delta
+
+        # Suave: fora do horário ideal, janelas da turma no dia
+        if not self.ideais[i] >> (p - 1) & 1:
+            self.suave += delta
+        chave = (turma, d)
+        antes = self.ocupados.get(chave, 0)
+        depois = antes | 1 << (p - 1) if ocupantes else antes & ~(1 << (p - 1))
+        if depois != antes:
+            self.ocupados[chave] = depois
+            self.suave += _janelas(depois) - _janelas(antes)
+
+    def _por(self, i, d, p):
+        self.dia[i], self.periodo[i] = d, p
+        self._registrar(i, d, p, 1)
+
+    def _tirar(self, i):
+        self._registrar(i, self.dia[i], self.periodo[i], -1)
+
+    def _em_violacao(self, i):
+        aula = self.aulas[i]
+        d, p = self.dia[i], self.periodo[i]
+        if len(self.ocupantes[(aula.turma, d, p)]) > 1:
+            return True
+        if self.no_dia[(aula.turma, aula.disciplina, d)] > self.maximo_dia[i]:
+            return True
+        bit = bit_slot(DIAS[d], p)
+        if bit is not None and not self.livres_prof[i] >> bit & 1:
+            return True
+        mascara = MASCARA_SLOT.get((self.segmento[i], p), 0)
+        while mascara:
+            faixa = mascara & -mascara
+            mascara ^= faixa
+            if self.faixas_prof[(aula.professor, d, faixa)] > 1:
+                return True
+        return False
+
+    # ============================================
+    # MOVIMENTOS
+    # ============================================
+
+    def _indisponivel(self, i, d, p):
+        bit = bit_slot(DIAS[d], p)
+        return bit is not None and not self.livres_prof[i] >> bit & 1
+
+    def _delta_professor(self, i, d0, p0, d, p):
+        """Pares de conflito do professor de i ao sair de (d0, p0) e entrar em (d, p)"""
+        professor = self.aulas[i].professor
+        faixas_prof = self.faixas_prof
+        saindo = MASCARA_SLOT.get((self.segmento[i], p0), 0)
+        entrando = MASCARA_SLOT.get((self.segmento[i], p), 0)
+        delta = 0
+        while saindo:
+            bit = saindo & -saindo
+            saindo ^= bit
+            delta -= faixas_prof[(professor, d0, bit)] - 1
+        while entrando:
+            bit = entrando & -entrando
+            entrando ^= bit
+            # Faixa que a própria aula deixa no mesmo dia não conta como conflito
+            c = faixas_prof.get((professor, d, bit), 0)
+            delta += c - 1 if d == d0 and bit & MASCARA_SLOT.get((self.segmento[i], p0), 0) else c
+        return delta
+
+    def _delta_disciplina(self, i, d0, d):
+        if d == d0:
+            return 0
+        aula = self.aulas[i]
+        maximo = self.maximo_dia[i]
+        return (self.no_dia.get((aula.turma, aula.disciplina, d), 0) >= maximo) - \
+            (self.no_dia[(aula.turma, aula.disciplina, d0)] - 1 >= maximo)
+
+    def _delta_local(self, i, d0, p0, d, p):
+        """Parte do delta que só depende da aula: disponibilidade (dura) e horário ideal (suave)"""
+        duro = self._indisponivel(i, d, p) - self._indisponivel(i, d0, p0)
+        suave = (not self.ideais[i] >> (p - 1) & 1) - (not self.ideais[i] >> (p0 - 1) & 1)
+        return duro, suave
+
+    def variacao_mover(self, i, d, p):
+        """(violações, suave) que mudam se a aula i for para (d, p), sem alterar nada"""
+        d0, p0 = self.dia[i], self.periodo[i]
+        turma = self.aulas[i].turma
+        duro, suave = self._delta_local(i, d0, p0, d, p)
+        duro += len(self.ocupantes.get((turma, d, p), ())) - (len(self.ocupantes[(turma, d0, p0)]) - 1)
+        duro += self._delta_professor(i, d0, p0, d, p)
+        duro += self._delta_disciplina(i, d0, d)
+
+        # Janelas: o período de origem só esvazia se a aula estava sozinha nele
+        sai = 1 << (p0 - 1) if len(self.ocupantes[(turma, d0, p0)]) == 1 else 0
+        origem = self.ocupados.get((turma, d0), 0)
+        if d == d0:
+            suave += _janelas(origem & ~sai | 1 << (p - 1)) - _janelas(origem)
+        else:
+            destino = self.ocupados.get((turma, d), 0)
+            suave += _janelas(origem & ~sai) - _janelas(origem)
+            suave += _janelas(destino | 1 << (p - 1)) - _janelas(destino)
+        return duro, suave
+
+    def variacao_trocar(self, i, j):
+        """(violações, suave) que mudam se as aulas i e j (mesma turma) trocarem de posição, sem alterar nada"""
+        di, pi = self.dia[i], self.periodo[i]
+        dj, pj = self.dia[j], self.periodo[j]
+        # Ocupação da turma e janelas não mudam: os mesmos períodos continuam ocupados
+        duro_i, suave_i = self._delta_local(i, di, pi, dj, pj)
+        duro_j, suave_j = self._delta_local(j, dj, pj, di, pi)
+        duro = duro_i + duro_j
+        if self.aulas[i].professor != self.aulas[j].professor:
+            duro += self._delta_professor(i, di, pi, dj, pj) + self._delta_professor(j, dj, pj, di, pi)
+        duro += self._delta_disciplina(i, di, dj) + self._delta_disciplina(j, dj, di)
+        return duro, suave_i + suave_j
+
+    def _vizinhos(self, i):
+        """[(delta, movimento)] de todas as posições da turma para a aula i"""
+        aula = self.aulas[i]
+        vizinhos = []
+        for d, p in self.slots_segmento[self.segmento[i]]:
+            if (d, p) == (self.dia[i], self.periodo[i]):
+                continue
+            ocupantes = self.ocupantes.get((aula.turma, d, p))
+            if not ocupantes:
+                duro, suave = self.variacao_mover(i, d, p)
+                vizinhos.append((PESO_DURO * duro + suave, ("mover", i, d, p)))
+            else:
+                j = ocupantes[0]
+                if self.aulas[j].disciplina != aula.disciplina:
+                    duro, suave = self.variacao_trocar(i, j)
+                    vizinhos.append((PESO_DURO * duro + suave, ("trocar", i, j)))
+        return vizinhos
+
+    def aplicar(self, movimento):
+        """Executa o movimento; devolve [(aula, dia, periodo)] das posições deixadas (viram tabu)"""
+        if movimento[0] == "mover":
+            _, i, d, p = movimento
+            deixadas = [(i, self.dia[i], self.periodo[i])]
+            self._tirar(i)
+            self._por(i, d, p)
+        else:
+            _, i, j = movimento
+            deixadas = [(i, self.dia[i], self.periodo[i]), (j, self.dia[j], self.periodo[j])]
+            self._tirar(i)
+            self._tirar(j)
+            self._por(i, deixadas[1][1], deixadas[1][2])
+            self._por(j, deixadas[0][1], deixadas[0][2])
+        return deixadas
+
+    def _destinos(self, movimento):
+        if movimento[0] == "mover":
+            _, i, d, p = movimento
+            return [(i, d, p)]
+        _, i, j = movimento
+        return [(i, self.dia[j], self.periodo[j]), (j, self.dia[i], self.periodo[i])]
+
+    def posicionar(self, dias, periodos):
+        """Põe todas as aulas nas posições dadas (índices de DIAS, períodos) e grava nas Aula"""
+        for i in self.ativas:
+            self._tirar(i)
+        for i in self.ativas:
+            self._por(i, dias[i], periodos[i])
+            aula = self.aulas[i]
+            aula.dia = DIAS[dias[i]]
+            aula.horario = periodos[i]
+            if hasattr(aula, 'periodo'):
+                aula.periodo = periodos[i]
+
+    # ============================================
+    # BUSCA
+    # ============================================
+
+    def resolver(self):
+        """Lista de Aula (cópias) na melhor posição encontrada"""
+        inicio = time.perf_counter()
+        custo_inicial = self.custo()
+        duro_inicial, suave_inicial = self.duro, self.suave
+        melhor_custo = custo_inicial
+        melhor = (list(self.dia), list(self.periodo))
+        tabu = {}                   # (aula, dia, periodo) -> iteração até a qual é proibido
+        iteracao = sem_melhora = aspiracoes = 0
+        motivo = "sem_melhora"
+        em_violacao = []
+        # Momento em que a grade ficou sem violações pela primeira vez
+        sem_violacoes_ms = 0.0 if self.duro == 0 else None
+
+        while self.ativas:
+            if iteracao >= self.max_iteracoes:
+                motivo = "limite_iteracoes"
+                break
+            if sem_melhora >= self.max_sem_melhora:
+                break
+            if time.perf_counter() - inicio > self.max_segundos:
+                motivo = "limite_tempo"
+                break
+            if self.custo() == 0:
+                motivo = "otimo"
+                break
+            iteracao += 1
+
+            # Aulas em violação (recalculadas de tempos em tempos) + amostra aleatória
+            if self.duro and iteracao % 20 == 1:
+                em_violacao = [i for i in self.ativas if self._em_violacao(i)]
+            candidatas = set(em_violacao[:self.amostra]) if self.duro else set()
+            candidatas.update(self.aleatorio.sample(self.ativas, min(self.amostra, len(self.ativas))))
+
+            escolhido = None
+            escolhido_delta = None
+            atual = self.custo()
+            for i in candidatas:
+                for delta, movimento in self._vizinhos(i):
+                    proibido = any(tabu.get(destino, 0) > iteracao for destino in self._destinos(movimento))
+                    if proibido and atual + delta >= melhor_custo:
+                        continue
+                    if escolhido_delta is None or delta < escolhido_delta:
+                        escolhido, escolhido_delta, escolhido_tabu = movimento, delta, proibido
+            if escolhido is None:
+                sem_melhora += 1
+                continue
+            aspiracoes += escolhido_tabu
+
+            for deixada in self.aplicar(escolhido):
+                tabu[deixada] = iteracao + 7 + self.aleatorio.randint(0, 10)
+            if self.duro == 0 and sem_violacoes_ms is None:
+                sem_violacoes_ms = (time.perf_counter() - inicio) * 1000
+            if self.custo() < melhor_custo:
+                melhor_custo = self.custo()
+                melhor = (list(self.dia), list(self.periodo))
+                sem_melhora = 0
+            else:
+                sem_melhora += 1
+
+        self.posicionar(*melhor)
+
+        self.estatisticas = {
+            "custo_inicial": custo_inicial,
+            "custo_final": self.custo(),
+            "violacoes_inicial": duro_inicial,
+            "violacoes_final": self.duro,
+            "suave_inicial": suave_inicial,
+            "suave_final": self.suave,
+            "iteracoes": iteracao,
+            "aspiracoes": aspiracoes,
+            "motivo": motivo,
+            "sem_violacoes_ms": sem_violacoes_ms,
+            "tempo_ms": (time.perf_counter() - inicio) * 1000,
+        }
+        return self.aulas
@@ -1,10 +1,39 @@
+import copy
 import json
 import os
-from models import Turma, Professor, Disciplina, Sala, Aula
+import tempfile
+import threading
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+from models import Turma, Professor, Disciplina, Sala, Aula, MODELOS_COMPACTOS
+import snapshot_binario
+from indice_grade import GradeIndex
+from diario_grade import (DiarioGrade, CHAVE_SEQUENCIA, LIMITE_DIARIO_BYTES,
+                          aplicar_operacoes, calcular_operacoes, normalizar_aula)
 
 # Arquivo de database
 DB_FILE = "escola_database.json"
 
+# Backend de armazenamento: "json" (arquivo único) ou "sqlite" (tabelas indexadas)
+BACKEND = os.environ.get("ESCOLA_DB_BACKEND", "json")
+SQLITE_FILE = "escola_database.sqlite"
+
+# Formato do snapshot gravado pelo backend JSON: "json" ou "binario"
+# (snapshot_binario.py). A leitura detecta o formato automaticamente.
+FORMATO_SNAPSHOT = os.environ.get("ESCOLA_DB_FORMATO", "json")
+
+# Chave do snapshot com a versão de cada coleção ({nome: inteiro})
+CHAVE_VERSOES = "_versoes"
+
+# Carregar as coleções nas variantes com __slots__ de models (AulaCompacta...)
+USAR_MODELOS_COMPACTOS = os.environ.get("ESCOLA_MODELOS_COMPACTOS", "0") == "1"
+
 def criar_dados_iniciais():
     """Cria dados iniciais para teste"""
     
@@ -125,160 +154,678 @@ def criar_dados_iniciais():
 
 def init_db():
     """Inicializa o banco de dados com dados padrão se não existir"""
-    if not os.path.exists(DB_FILE):
-        dados_iniciais = criar_dados_iniciais()
-        salvar_tudo(dados_iniciais)
+    repositorio = obter_repositorio()
+    if repositorio.existe():
+        return
+    
+    # SQLite vazio: migra o JSON existente (snapshot + diário) uma única vez
+    if BACKEND == "sqlite" and os.path.exists(DB_FILE):
+        try:
+            repositorio.banco.migrar_de_json(DB_FILE)
+        except Exception as e:
+            print(f"Erro ao migrar {DB_FILE} para o SQLite: {e}")
+        return
+    
+    dados_iniciais = criar_dados_iniciais()
+    salvar_tudo(dados_iniciais)
 
-def carregar_tudo():
-    """Carrega todos os dados do banco"""
-    if not os.path.exists(DB_FILE):
-        init_db()
+# ============================================
+# CONCORRÊNCIA (VERSÕES POR COLEÇÃO + TRAVA DE ESCRITA)
+# ============================================
+
+class ConflitoDeVersao(Exception):
+    """Outra sessão gravou uma coleção depois que ela foi carregada"""
     
-    try:
-        with open(DB_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return criar_dados_iniciais()
+    def __init__(self, conflitos):
+        self.conflitos = conflitos  # {colecao: (versao_esperada, versao_atual)}
+        nomes = ", ".join(sorted(conflitos))
+        super().__init__(f"Coleções alteradas por outra sessão desde o carregamento: {nomes}")
 
-def salvar_tudo(dados):
-    """Salva todos os dados no banco"""
-    try:
-        with open(DB_FILE, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        print(f"Erro ao salvar: {e}")
+def _verificar_versoes(versoes_esperadas, versoes_atuais, colecoes):
+    """Lança ConflitoDeVersao se alguma coleção a gravar mudou desde a versão esperada"""
+    if not versoes_esperadas:
+        return
+    conflitos = {}
+    for nome in colecoes:
+        esperada = versoes_esperadas.get(nome)
+        atual = versoes_atuais.get(nome, 0)
+        if esperada is not None and esperada != atual:
+            conflitos[nome] = (esperada, atual)
+    if conflitos:
+        raise ConflitoDeVersao(conflitos)
+
+class TravaArquivo:
+    """
+    Trava consultiva (flock/msvcrt) num arquivo ".lock" ao lado do banco.
+    
+    Só as escritas a usam, e só pelo tempo de reler, verificar versões e
+    gravar; as leituras não travam, porque o snapshot é trocado por rename
+    atômico e linhas incompletas do diário são ignoradas. Reentrante dentro do
+    mesmo processo: deve ser usada com o lock do repositório já adquirido.
+    """
+    
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = None
+        self._nivel = 0
+    
+    def __enter__(self):
+        if self._nivel == 0:
+            arquivo = open(self.caminho, 'a+b')
+            try:
+                if fcntl is not None:
+                    fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+                elif msvcrt is not None:
+                    arquivo.seek(0)
+                    msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+            except BaseException:
+                arquivo.close()
+                raise
+            self._arquivo = arquivo
+        self._nivel += 1
+        return self
+    
+    def __exit__(self, tipo_erro, erro, rastreamento):
+        self._nivel -= 1
+        if self._nivel == 0:
+            arquivo, self._arquivo = self._arquivo, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    arquivo.seek(0)
+                    msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                arquivo.close()
         return False
 
-# Funções de carregamento
-def carregar_turmas():
-    dados = carregar_tudo()
-    turmas = dados.get("turmas", [])
+# ============================================
+# REPOSITÓRIO EM MEMÓRIA (CACHE POR MTIME/TAMANHO)
+# ============================================
+
+# Classe do modelo e atributos mínimos esperados em cada coleção
+_MODELOS_COLECOES = {
+    "turmas": (Turma, ("nome", "serie")),
+    "professores": (Professor, ("nome", "disciplinas")),
+    "disciplinas": (Disciplina, ("nome", "carga_semanal")),
+    "salas": (Sala, ("nome", "capacidade")),
+    "aulas": (Aula, ("turma", "disciplina")),
+}
+
+def _construir_objetos(colecao, itens):
+    """Converte os itens crus de uma coleção nos objetos de models"""
+    modelo, atributos = _MODELOS_COLECOES[colecao]
+    if USAR_MODELOS_COMPACTOS:
+        modelo = MODELOS_COMPACTOS[modelo]
     resultado = []
     
-    for item in turmas:
+    for item in itens:
         if isinstance(item, dict):
-            resultado.append(Turma(**item))
-        elif hasattr(item, 'nome') and hasattr(item, 'serie'):
+            resultado.append(modelo(**item))
+        elif all(hasattr(item, atributo) for atributo in atributos):
             resultado.append(item)
         else:
-            print(f"Item inválido em turmas: {item}")
+            print(f"Item inválido em {colecao}: {item}")
     
     return resultado
 
-def carregar_professores():
-    dados = carregar_tudo()
-    professores = dados.get("professores", [])
-    resultado = []
+# Coleções cujos objetos só têm campos escalares: a cópia rasa já é independente
+_COLECOES_ESCALARES = {"aulas", "salas"}
+
+def _copiar_objetos(colecao, objetos):
+    """Cópias dos objetos em cache que podem ser alteradas sem afetar o cache"""
+    if colecao in _COLECOES_ESCALARES:
+        return [copy.copy(obj) for obj in objetos]
+    return copy.deepcopy(objetos)
+
+class RepositorioEscola:
+    """
+    Mantém o conteúdo do banco JSON em memória.
     
-    for item in professores:
-        if isinstance(item, dict):
-            resultado.append(Professor(**item))
-        elif hasattr(item, 'nome') and hasattr(item, 'disciplinas'):
-            resultado.append(item)
-        else:
-            print(f"Item inválido em professores: {item}")
+    O arquivo só é lido de novo quando seu mtime ou tamanho mudam, e os objetos
+    tipados de cada coleção são construídos uma única vez por versão do arquivo.
+    Os contadores de acertos/falhas mostram quantas vezes o disco foi tocado.
     
-    return resultado
+    Alterações que só mexem nas aulas vão para o diário (diario_grade.py) em
+    vez de reescrever o snapshot; o diário é reaplicado na leitura e
+    compactado quando passa de LIMITE_DIARIO_BYTES.
+    
+    Cada coleção tem um contador de versão, incrementado quando seu conteúdo
+    muda. As escritas acontecem sob a TravaArquivo e, se receberem as versões
+    esperadas, recusam com ConflitoDeVersao em vez de sobrescrever a gravação
+    de outra sessão.
+    """
+    
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.diario = DiarioGrade(caminho)
+        self.acertos = 0
+        self.falhas = 0
+        self._assinatura = None
+        self._dados = None
+        self._objetos = {}
+        self._sequencia = 0
+        self._versoes = {}
+        self._lock = threading.RLock()
+        self._trava = TravaArquivo(caminho + ".lock")
+    
+    def _assinatura_arquivo(self):
+        try:
+            info = os.stat(self.caminho)
+        except OSError:
+            return None
+        return (info.st_mtime_ns, info.st_size, self.diario.assinatura())
+    
+    def _garantir_atualizado(self):
+        """Recarrega o arquivo se ele mudou desde a última leitura"""
+        assinatura = self._assinatura_arquivo()
+        if self._dados is not None and assinatura is not None and assinatura == self._assinatura:
+            self.acertos += 1
+            return True
+        
+        self.falhas += 1
+        try:
+            dados, sequencia, versoes = _ler_com_diario(self.caminho, self.diario)
+        except Exception:
+            self.invalidar()
+            return False
+        
+        self._sequencia = sequencia
+        self._versoes = versoes
+        self._dados = dados
+        self._assinatura = assinatura
+        self._objetos = {}
+        return True
+    
+    def dados(self):
+        """
+        Retorna uma cópia profunda do dicionário completo do banco: o cache é
+        compartilhado por todas as sessões e não pode ser alterado por fora
+        """
+        with self._lock:
+            if not self._garantir_atualizado():
+                return criar_dados_iniciais()
+            return copy.deepcopy(self._dados)
+    
+    def colecao(self, nome):
+        """
+        Retorna os objetos tipados de uma coleção, copiados em profundidade:
+        alterar as listas de um objeto (ex.: Professor.disciplinas) não mexe no cache
+        """
+        with self._lock:
+            if not self._garantir_atualizado():
+                return _construir_objetos(nome, criar_dados_iniciais().get(nome, []))
+            
+            if nome not in _MODELOS_COLECOES:
+                return copy.deepcopy(self._dados.get(nome, []))
+            if nome not in self._objetos:
+                self._objetos[nome] = _construir_objetos(nome, self._dados.get(nome, []))
+            return _copiar_objetos(nome, self._objetos[nome])
+    
+    def aulas_filtradas(self, campo, valor, dia=None):
+        """Aulas cujo campo (turma/professor) tem o valor dado, opcionalmente num dia"""
+        with self._lock:
+            if not self._garantir_atualizado():
+                return []
+            if "aulas" not in self._objetos:
+                self._objetos["aulas"] = _construir_objetos("aulas", self._dados.get("aulas", []))
+            return [
+                copy.copy(aula) for aula in self._objetos["aulas"]
+                if getattr(aula, campo) == valor and (dia is None or aula.dia == dia)
+            ]
+    
+    def existe(self):
+        return os.path.exists(self.caminho)
+    
+    def versoes(self):
+        """Versão atual de cada coleção ({nome: inteiro})"""
+        with self._lock:
+            self._garantir_atualizado()
+            return dict(self._versoes)
+    
+    def _gravar_snapshot(self, dados, versoes):
+        """Grava o dicionário completo no arquivo (escrita atômica) e descarta o diário"""
+        snapshot = dict(dados)
+        snapshot.pop(CHAVE_SEQUENCIA, None)
+        snapshot.pop(CHAVE_VERSOES, None)
+        try:
+            _escrever_atomico(
+                dict(snapshot, **{CHAVE_SEQUENCIA: self._sequencia, CHAVE_VERSOES: versoes}),
+                self.caminho
+            )
+            self.diario.limpar()
+        except Exception:
+            self.invalidar()
+            raise
+        self._versoes = dict(versoes)
+        self.atualizar(snapshot)
+    
+    def _versoes_incrementadas(self, nomes):
+        versoes = dict(self._versoes)
+        for nome in nomes:
+            versoes[nome] = versoes.get(nome, 0) + 1
+        return versoes
+    
+    def gravar(self, dados):
+        """Substitui o conteúdo do banco pelo dicionário completo"""
+        with self._lock, self._trava:
+            atuais = self._dados if self._garantir_atualizado() else {}
+            alteradas = [nome for nome, itens in dados.items() if atuais.get(nome) != itens]
+            self._gravar_snapshot(dados, self._versoes_incrementadas(alteradas))
+    
+    def salvar_colecoes(self, colecoes, versoes_esperadas=None):
+        """
+        Aplica as coleções sobre o conteúdo atual e grava uma única vez.
+        
+        Lança ConflitoDeVersao se alguma coleção não estiver na versão
+        esperada; retorna as versões após a gravação.
+        """
+        with self._lock, self._trava:
+            # Relê sob a trava: outro processo pode ter gravado desde a última leitura
+            dados = self.dados()
+            _verificar_versoes(versoes_esperadas, self._versoes, colecoes)
+            
+            alteradas = [nome for nome, itens in colecoes.items() if dados.get(nome) != itens]
+            if not alteradas:
+                return dict(self._versoes)
+            
+            # Só as aulas mudaram: registra a diferença no diário
+            if alteradas == ["aulas"] and self._dados is not None:
+                self._registrar_aulas(colecoes["aulas"])
+                return dict(self._versoes)
+            
+            dados.update(colecoes)
+            self._gravar_snapshot(dados, self._versoes_incrementadas(alteradas))
+            return dict(self._versoes)
+    
+    def _registrar_aulas(self, aulas):
+        """Anexa ao diário as operações que levam das aulas atuais às novas"""
+        antigas = [normalizar_aula(a) for a in self._dados.get("aulas", [])]
+        novas = [normalizar_aula(a) for a in aulas]
+        operacoes = calcular_operacoes(antigas, novas)
+        if not operacoes:
+            return
+        
+        versoes = self._versoes_incrementadas(["aulas"])
+        
+        # Mudanças grandes (ex.: grade gerada de novo) vão direto para um novo snapshot
+        if len(operacoes) > len(novas) // 2:
+            self._gravar_snapshot(dict(self._dados, aulas=novas), versoes)
+            return
+        
+        try:
+            self._sequencia = self.diario.anexar(operacoes, self._sequencia, versao=versoes["aulas"])
+        except Exception:
+            self.invalidar()
+            raise
+        self._versoes = versoes
+        self._dados["aulas"] = novas
+        self._objetos.pop("aulas", None)
+        self._assinatura = self._assinatura_arquivo()
+        
+        if self.diario.tamanho() > LIMITE_DIARIO_BYTES:
+            self.compactar()
+    
+    def compactar(self):
+        """Incorpora o diário num novo snapshot"""
+        with self._lock, self._trava:
+            if self._garantir_atualizado() and self.diario.existe():
+                self._gravar_snapshot(self._dados, self._versoes)
+    
+    def apagar(self):
+        with self._lock, self._trava:
+            if os.path.exists(self.caminho):
+                os.remove(self.caminho)
+            self.diario.limpar()
+            self.invalidar()
+    
+    def atualizar(self, dados):
+        """Registra no cache (cópia própria) os dados que acabaram de ser gravados no arquivo"""
+        with self._lock:
+            self._dados = copy.deepcopy(dados)
+            self._assinatura = self._assinatura_arquivo()
+            self._objetos = {}
+    
+    def invalidar(self):
+        """Descarta o cache; a próxima leitura vai ao disco"""
+        with self._lock:
+            self._dados = None
+            self._assinatura = None
+            self._objetos = {}
+            self._versoes = {}
+    
+    def estatisticas(self):
+        """Retorna os contadores de uso do cache"""
+        total = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": (self.acertos / total) if total else 0.0,
+        }
+    
+    def zerar_contadores(self):
+        self.acertos = 0
+        self.falhas = 0
 
-def carregar_disciplinas():
-    dados = carregar_tudo()
-    disciplinas = dados.get("disciplinas", [])
-    resultado = []
+class RepositorioSQLite:
+    """Mesma interface do RepositorioEscola, sobre o backend SQLite (banco_sqlite.py)"""
     
-    for item in disciplinas:
-        if isinstance(item, dict):
-            resultado.append(Disciplina(**item))
-        elif hasattr(item, 'nome') and hasattr(item, 'carga_semanal'):
-            resultado.append(item)
+    def __init__(self, caminho):
+        from banco_sqlite import BancoSQLite
+        self.caminho = caminho
+        self.banco = BancoSQLite(caminho)
+    
+    def existe(self):
+        return not self.banco.esta_vazio()
+    
+    def dados(self):
+        return self.banco.carregar_tudo()
+    
+    def colecao(self, nome):
+        itens = self.banco.carregar_colecao(nome)
+        if nome not in _MODELOS_COLECOES:
+            return itens
+        return _construir_objetos(nome, itens)
+    
+    def aulas_filtradas(self, campo, valor, dia=None):
+        if campo == "professor":
+            itens = self.banco.aulas_do_professor(valor, dia)
         else:
-            print(f"Item inválido em disciplinas: {item}")
+            itens = self.banco.aulas_da_turma(valor, dia)
+        return _construir_objetos("aulas", itens)
     
-    return resultado
+    def versoes(self):
+        return self.banco.versoes()
+    
+    def gravar(self, dados):
+        self.banco.salvar_colecoes(dados)
+    
+    def salvar_colecoes(self, colecoes, versoes_esperadas=None):
+        # A verificação roda dentro da transação do SQLite (BEGIN IMMEDIATE)
+        _, versoes = self.banco.salvar_colecoes(
+            colecoes,
+            lambda atuais: _verificar_versoes(versoes_esperadas, atuais, colecoes)
+        )
+        return versoes
+    
+    def apagar(self):
+        self.banco.apagar_tudo()
+    
+    def invalidar(self):
+        pass
+    
+    def estatisticas(self):
+        return self.banco.estatisticas()
+    
+    def zerar_contadores(self):
+        self.banco.consultas = 0
 
-def carregar_salas():
-    dados = carregar_tudo()
-    salas = dados.get("salas", [])
-    resultado = []
+_repositorios = {}
+
+def obter_repositorio(caminho=None):
+    """Retorna o repositório associado ao banco atual (JSON em cache ou SQLite)"""
+    if BACKEND == "sqlite":
+        caminho = caminho or SQLITE_FILE
+        chave = ("sqlite", caminho)
+        if chave not in _repositorios:
+            _repositorios[chave] = RepositorioSQLite(caminho)
+        return _repositorios[chave]
     
-    for item in salas:
-        if isinstance(item, dict):
-            resultado.append(Sala(**item))
-        elif hasattr(item, 'nome') and hasattr(item, 'capacidade'):
-            resultado.append(item)
-        else:
-            print(f"Item inválido em salas: {item}")
+    caminho = caminho or DB_FILE
+    if caminho not in _repositorios:
+        _repositorios[caminho] = RepositorioEscola(caminho)
+    return _repositorios[caminho]
+
+def estatisticas_cache():
+    """Contadores de acertos/falhas do cache do banco atual"""
+    return obter_repositorio().estatisticas()
+
+def versoes_colecoes():
+    """Versão atual de cada coleção; guarde-a ao carregar para detectar conflitos ao salvar"""
+    if not obter_repositorio().existe():
+        init_db()
+    versoes = dict.fromkeys(["turmas", "professores", "disciplinas", "salas", "aulas", "feriados", "periodos"], 0)
+    versoes.update(obter_repositorio().versoes())
+    return versoes
+
+def carregar_tudo():
+    """Carrega todos os dados do banco"""
+    if not obter_repositorio().existe():
+        init_db()
     
-    return resultado
+    return obter_repositorio().dados()
 
-def carregar_grade():
-    dados = carregar_tudo()
-    aulas = dados.get("aulas", [])
-    resultado = []
+def _serializar_extra(valor):
+    """Converte para JSON tipos que o json não conhece (ex.: disponibilidade em set)"""
+    if isinstance(valor, (set, frozenset)):
+        return sorted(valor)
+    raise TypeError(f"Object of type {type(valor).__name__} is not JSON serializable")
+
+def _ler_snapshot(caminho):
+    """Lê o snapshot do banco, em JSON ou no formato binário compacto"""
+    with open(caminho, 'rb') as f:
+        conteudo = f.read()
+    if snapshot_binario.eh_binario(conteudo):
+        return snapshot_binario.decodificar(conteudo)
+    return json.loads(conteudo.decode('utf-8'))
+
+def _ler_com_diario(caminho, diario):
+    """Snapshot com as operações do diário reaplicadas: (dados, sequência, versões)"""
+    dados = _ler_snapshot(caminho)
+    sequencia = dados.pop(CHAVE_SEQUENCIA, 0)
+    versoes = dados.pop(CHAVE_VERSOES, None) or {}
+    operacoes = diario.ler(apos_sequencia=sequencia)
+    if operacoes:
+        aulas = [normalizar_aula(a) for a in dados.get("aulas", [])]
+        dados["aulas"] = aplicar_operacoes(aulas, operacoes)
+        sequencia = operacoes[-1]["seq"]
+        versoes["aulas"] = operacoes[-1].get("versao", versoes.get("aulas", 0))
+    return dados, sequencia, versoes
+
+def ler_banco_json(caminho=None):
+    """Conteúdo atual do banco JSON (snapshot + diário), sem as chaves de controle"""
+    caminho = caminho or DB_FILE
+    dados, _, _ = _ler_com_diario(caminho, DiarioGrade(caminho))
+    return dados
+
+def _escrever_atomico(dados, caminho):
+    """Grava o snapshot num arquivo temporário e o renomeia sobre o banco"""
+    if FORMATO_SNAPSHOT == "binario":
+        conteudo = snapshot_binario.codificar(dados)
+    else:
+        conteudo = json.dumps(dados, indent=2, ensure_ascii=False, default=_serializar_extra).encode('utf-8')
     
-    for item in aulas:
-        if isinstance(item, dict):
-            resultado.append(Aula(**item))
-        elif hasattr(item, 'turma') and hasattr(item, 'disciplina'):
-            resultado.append(item)
-        else:
-            print(f"Item inválido em aulas: {item}")
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    fd, caminho_tmp = tempfile.mkstemp(prefix=".escola_", suffix=".tmp", dir=diretorio)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(caminho_tmp, caminho)
+    except BaseException:
+        if os.path.exists(caminho_tmp):
+            os.remove(caminho_tmp)
+        raise
+
+def salvar_tudo(dados):
+    """Salva todos os dados no banco"""
+    try:
+        obter_repositorio().gravar(dados)
+        return True
+    except Exception as e:
+        print(f"Erro ao salvar: {e}")
+        return False
+
+# Funções de carregamento
+def _carregar_colecao(colecao):
+    if not obter_repositorio().existe():
+        init_db()
     
-    return resultado
+    return obter_repositorio().colecao(colecao)
+
+def carregar_turmas():
+    return _carregar_colecao("turmas")
+
+def carregar_professores():
+    return _carregar_colecao("professores")
+
+def carregar_disciplinas():
+    return _carregar_colecao("disciplinas")
+
+def carregar_salas():
+    return _carregar_colecao("salas")
+
+def carregar_grade(indexada=False):
+    """Aulas da grade; com indexada=True, como GradeIndex (consultas O(1) por turma/professor/período)"""
+    aulas = _carregar_colecao("aulas")
+    if indexada:
+        return GradeIndex(aulas)
+    return aulas
 
 def carregar_feriados():
-    dados = carregar_tudo()
-    return dados.get("feriados", [])
+    return _carregar_colecao("feriados")
 
 def carregar_periodos():
-    dados = carregar_tudo()
-    return dados.get("periodos", [])
+    return _carregar_colecao("periodos")
+
+def carregar_aulas_professor(professor_nome, dia=None):
+    """Aulas de um professor sem desserializar a escola inteira (índice no SQLite)"""
+    if not obter_repositorio().existe():
+        init_db()
+    return obter_repositorio().aulas_filtradas("professor", professor_nome, dia)
+
+def carregar_aulas_turma(turma_nome, dia=None):
+    """Aulas de uma turma sem desserializar a escola inteira (índice no SQLite)"""
+    if not obter_repositorio().existe():
+        init_db()
+    return obter_repositorio().aulas_filtradas("turma", turma_nome, dia)
 
 # Funções de salvamento
 def _converter_para_dict(obj):
-    """Converte objeto para dicionário se for um objeto models"""
+    """Converte objeto para dicionário se for um objeto models (inclusive as variantes compactas)"""
     if hasattr(obj, '__dict__'):
-        return obj.__dict__
+        return dict(obj.__dict__)
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
     return obj
 
+def salvar_colecoes_versionado(colecoes, versoes_esperadas=None):
+    """
+    Salva várias coleções numa única passada: no JSON, uma leitura do banco e
+    uma única escrita atômica (arquivo temporário + rename); no SQLite, uma
+    transação que só toca as linhas alteradas.
+    
+    Args:
+        colecoes: dicionário {nome_da_colecao: lista de objetos ou dicts}
+        versoes_esperadas: {nome_da_colecao: versão} lidas ao carregar; se
+            alguma coleção gravada estiver noutra versão, nada é gravado
+    
+    Returns:
+        As versões de todas as coleções após a gravação.
+    
+    Raises:
+        ConflitoDeVersao: outra sessão gravou uma das coleções antes.
+    """
+    convertidas = {
+        nome: [_converter_para_dict(item) for item in itens]
+        for nome, itens in colecoes.items()
+    }
+    if not obter_repositorio().existe():
+        init_db()
+    return obter_repositorio().salvar_colecoes(convertidas, versoes_esperadas)
+
+def salvar_colecoes(colecoes, versoes_esperadas=None):
+    """Como salvar_colecoes_versionado, mas retorna True/False"""
+    try:
+        salvar_colecoes_versionado(colecoes, versoes_esperadas)
+        return True
+    except ConflitoDeVersao as e:
+        print(f"Conflito ao salvar: {e}")
+        return False
+    except Exception as e:
+        print(f"Erro ao salvar: {e}")
+        return False
+
+class TransacaoBanco:
+    """
+    Acumula atualizações de coleções e grava tudo de uma vez ao final.
+    
+    Uso:
+        with database.transacao(versoes_carregadas) as t:
+            t.definir("turmas", turmas)
+            t.definir("aulas", aulas)
+        if t.conflito: ...
+        elif t.sucesso: versoes_carregadas = t.versoes
+    """
+    
+    def __init__(self, versoes_esperadas=None):
+        self.pendentes = {}
+        self.versoes_esperadas = versoes_esperadas
+        self.sucesso = None
+        self.conflito = None
+        self.versoes = None
+    
+    def definir(self, colecao, itens):
+        self.pendentes[colecao] = list(itens)
+    
+    def confirmar(self):
+        if not self.pendentes:
+            self.sucesso = True
+            return True
+        try:
+            self.versoes = salvar_colecoes_versionado(self.pendentes, self.versoes_esperadas)
+            self.sucesso = True
+        except ConflitoDeVersao as e:
+            self.conflito = e
+            self.sucesso = False
+        except Exception as e:
+            print(f"Erro ao salvar: {e}")
+            self.sucesso = False
+        self.pendentes = {}
+        return self.sucesso
+    
+    def descartar(self):
+        self.pendentes = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, tipo_erro, erro, rastreamento):
+        if tipo_erro is None:
+            self.confirmar()
+        else:
+            self.descartar()
+            self.sucesso = False
+        return False
+
+def transacao(versoes_esperadas=None):
+    """Abre uma transação que grava todas as coleções definidas numa só escrita"""
+    return TransacaoBanco(versoes_esperadas)
+
 def salvar_turmas(turmas):
-    dados = carregar_tudo()
-    dados["turmas"] = [_converter_para_dict(t) for t in turmas]
-    return salvar_tudo(dados)
+    return salvar_colecoes({"turmas": turmas})
 
 def salvar_professores(professores):
-    dados = carregar_tudo()
-    dados["professores"] = [_converter_para_dict(p) for p in professores]
-    return salvar_tudo(dados)
+    return salvar_colecoes({"professores": professores})
 
 def salvar_disciplinas(disciplinas):
-    dados = carregar_tudo()
-    dados["disciplinas"] = [_converter_para_dict(d) for d in disciplinas]
-    return salvar_tudo(dados)
+    return salvar_colecoes({"disciplinas": disciplinas})
 
 def salvar_salas(salas):
-    dados = carregar_tudo()
-    dados["salas"] = [_converter_para_dict(s) for s in salas]
-    return salvar_tudo(dados)
+    return salvar_colecoes({"salas": salas})
 
 def salvar_grade(aulas):
-    dados = carregar_tudo()
-    dados["aulas"] = [_converter_para_dict(a) for a in aulas]
-    return salvar_tudo(dados)
+    return salvar_colecoes({"aulas": aulas})
 
 def salvar_feriados(feriados):
-    dados = carregar_tudo()
-    dados["feriados"] = feriados
-    return salvar_tudo(dados)
+    return salvar_colecoes({"feriados": feriados})
 
 def salvar_periodos(periodos):
-    dados = carregar_tudo()
-    dados["periodos"] = periodos
-    return salvar_tudo(dados)
+    return salvar_colecoes({"periodos": periodos})
 
 def resetar_banco():
     """Reseta o banco de dados para os valores iniciais"""
-    if os.path.exists(DB_FILE):
-        os.remove(DB_FILE)
-    init_db()
+    obter_repositorio().apagar()
+    salvar_tudo(criar_dados_iniciais())
     return True
\ No newline at end of file
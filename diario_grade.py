@@ -0,0 +1,190 @@
+# diario_grade.py - Diário (journal) append-only das alterações de aulas
+"""
+Em vez de reescrever todas as aulas do snapshot a cada ajuste manual, as
+alterações (inserir / mover / remover) são anexadas a um arquivo JSON Lines
+ao lado do banco. Na leitura, o snapshot é reaplicado com o diário; quando o
+diário passa de LIMITE_DIARIO_BYTES, ele é compactado num novo snapshot.
+
+Cada gravação é um lote numa única linha ({"seq", "versao", "ops"}), então
+uma queda no meio da escrita nunca deixa meio lote aplicado. O snapshot
+guarda a última sequência já incorporada ("_diario_seq"), então um diário
+antigo que sobreviva a uma compactação interrompida não é aplicado duas
+vezes. Antes de anexar, o resto de uma linha cortada é descartado, para o
+lote novo não ficar colado atrás dela.
+"""
+
+import json
+import os
+from collections import Counter, defaultdict
+
+from models import Aula
+
+# Tamanho do diário que dispara a compactação num novo snapshot
+LIMITE_DIARIO_BYTES = 64 * 1024
+
+# Chave do snapshot com a última sequência do diário já incorporada
+CHAVE_SEQUENCIA = "_diario_seq"
+
+def cortar_linha_incompleta(caminho):
+    """Trunca o arquivo JSON Lines no último "\n" (resto de uma gravação interrompida)"""
+    try:
+        tamanho = os.path.getsize(caminho)
+    except OSError:
+        return
+    if tamanho == 0:
+        return
+    with open(caminho, 'r+b') as f:
+        f.seek(tamanho - 1)
+        if f.read(1) == b"\n":
+            return
+        corte = 0
+        fim = tamanho
+        while fim > 0:
+            inicio = max(0, fim - 4096)
+            f.seek(inicio)
+            posicao = f.read(fim - inicio).rfind(b"\n")
+            if posicao >= 0:
+                corte = inicio + posicao + 1
+                break
+            fim = inicio
+        f.truncate(corte)
+        f.flush()
+        os.fsync(f.fileno())
+
+def normalizar_aula(aula):
+    """Dicionário completo (com valores padrão) de uma aula em objeto ou dict"""
+    if isinstance(aula, dict):
+        return dict(Aula(**aula).__dict__)
+    if hasattr(aula, '__dict__'):
+        return dict(aula.__dict__)
+    return aula.to_dict()
+
+def _chave(aula_dict):
+    return tuple(sorted(aula_dict.items()))
+
+def calcular_operacoes(aulas_antigas, aulas_novas):
+    """
+    Diferença entre duas listas de aulas (dicts normalizados) como operações.
+
+    Uma aula removida e outra inserida com a mesma turma/disciplina/professor
+    viram uma única operação "mover".
+    """
+    antigas = Counter(_chave(a) for a in aulas_antigas)
+    novas = Counter(_chave(a) for a in aulas_novas)
+
+    removidas = [dict(chave) for chave in (antigas - novas).elements()]
+    inseridas = [dict(chave) for chave in (novas - antigas).elements()]
+
+    inseridas_por_grupo = defaultdict(list)
+    for aula in inseridas:
+        inseridas_por_grupo[(aula["turma"], aula["disciplina"], aula["professor"])].append(aula)
+
+    operacoes = []
+    for aula in removidas:
+        candidatas = inseridas_por_grupo.get((aula["turma"], aula["disciplina"], aula["professor"]))
+        if candidatas:
+            operacoes.append({"op": "mover", "de": aula, "para": candidatas.pop()})
+        else:
+            operacoes.append({"op": "remover", "aula": aula})
+
+    for grupo in inseridas_por_grupo.values():
+        for aula in grupo:
+            operacoes.append({"op": "inserir", "aula": aula})
+
+    return operacoes
+
+def aplicar_operacoes(aulas, operacoes):
+    """Reaplica as operações do diário sobre a lista de aulas (dicts normalizados)"""
+    resultado = list(aulas)
+    posicoes = defaultdict(list)
+    for i, aula in enumerate(resultado):
+        posicoes[_chave(aula)].append(i)
+
+    for operacao in operacoes:
+        tipo = operacao["op"]
+        if tipo == "inserir":
+            posicoes[_chave(operacao["aula"])].append(len(resultado))
+            resultado.append(operacao["aula"])
+            continue
+
+        origem = operacao["de"] if tipo == "mover" else operacao["aula"]
+        indices = posicoes.get(_chave(origem))
+        if not indices:
+            print(f"Operação do diário ignorada (aula não encontrada): {operacao}")
+            continue
+        indice = indices.pop(0)
+
+        if tipo == "mover":
+            resultado[indice] = operacao["para"]
+            posicoes[_chave(operacao["para"])].append(indice)
+        else:
+            resultado[indice] = None
+
+    return [aula for aula in resultado if aula is not None]
+
+class DiarioGrade:
+    """Arquivo JSON Lines com as operações de aulas posteriores ao snapshot"""
+
+    def __init__(self, caminho_banco):
+        self.caminho = caminho_banco + ".diario"
+
+    def existe(self):
+        return os.path.exists(self.caminho)
+
+    def tamanho(self):
+        try:
+            return os.path.getsize(self.caminho)
+        except OSError:
+            return 0
+
+    def assinatura(self):
+        try:
+            info = os.stat(self.caminho)
+        except OSError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def ler(self, apos_sequencia=0):
+        """
+        Operações dos lotes com sequência maior que a do snapshot, cada uma com
+        "seq" (e "versao") do seu lote. A linha incompleta do fim é ignorada.
+        """
+        operacoes = []
+        if not self.existe():
+            return operacoes
+        with open(self.caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    lote = json.loads(linha)
+                except json.JSONDecodeError:
+                    break  # Última linha truncada por uma gravação interrompida
+                if lote.get("seq", 0) <= apos_sequencia:
+                    continue
+                if "ops" not in lote:
+                    operacoes.append(lote)  # Diário antigo: uma operação por linha
+                    continue
+                extras = {chave: lote[chave] for chave in ("seq", "versao") if chave in lote}
+                operacoes.extend(dict(operacao, **extras) for operacao in lote["ops"])
+        return operacoes
+
+    def anexar(self, operacoes, sequencia_inicial, versao=None):
+        """
+        Anexa as operações como um único lote (uma linha) com sequência
+        sequencia_inicial + 1, que é retornada. `versao` é a versão da coleção
+        de aulas após o lote.
+        """
+        sequencia = sequencia_inicial + 1
+        lote = {"seq": sequencia}
+        if versao is not None:
+            lote["versao"] = versao
+        lote["ops"] = list(operacoes)
+        cortar_linha_incompleta(self.caminho)
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(lote, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return sequencia
+
+    def limpar(self):
+        if self.existe():
+            os.remove(self.caminho)
@@ -0,0 +1,151 @@
+# disponibilidade.py - Disponibilidade dos professores como máscaras de bits
+"""
+Professor.disponibilidade é uma lista de dias ("segunda", "terca"...) e
+horarios_indisponiveis uma lista como ["seg_1", "seg_2"], com as duas
+grafias de dia misturadas. Aqui cada professor vira um inteiro em que o bit
+dia * PERIODOS_POR_DIA + (periodo - 1) indica que ele pode dar aula naquele
+(dia, período), compilado uma vez a partir desses campos.
+
+A tabela DisponibilidadeBits guarda também o inverso (para cada slot, o
+conjunto de professores livres como bits de índice de professor) e os
+conjuntos por disciplina e por grupo, de modo que "quem pode dar a
+disciplina D no slot S para uma turma do grupo G" é um AND de três inteiros:
+
+    tabela = DisponibilidadeBits(professores)
+    for prof in tabela.candidatos("Matemática A", "segunda", 3, grupo="A"):
+        ...
+"""
+
+from horarios import HORARIOS
+
+DIAS = ["segunda", "terca", "quarta", "quinta", "sexta"]
+
+# Maior número de períodos em um dia entre os segmentos (EM: 7)
+PERIODOS_POR_DIA = max(slot.periodo for slot in HORARIOS.slots)
+
+TOTAL_SLOTS = len(DIAS) * PERIODOS_POR_DIA
+TODOS_OS_SLOTS = (1 << TOTAL_SLOTS) - 1
+
+# Grafias aceitas para cada dia (completa, abreviada, com acento)
+_INDICE_DIA = {}
+for _i, _dia in enumerate(DIAS):
+    for _grafia in (_dia, _dia[:3], _dia.capitalize(), _dia[:3].capitalize()):
+        _INDICE_DIA[_grafia] = _i
+_INDICE_DIA["terça"] = _INDICE_DIA["Terça"] = 1
+
+def indice_dia(dia):
+    """Posição do dia na semana (0 = segunda) ou None se não reconhecido"""
+    return _INDICE_DIA.get(dia)
+
+def bit_slot(dia, periodo):
+    """Posição do bit de (dia, período); None se o dia ou o período não existir"""
+    i = _INDICE_DIA.get(dia)
+    if i is None or not isinstance(periodo, int) or not 1 <= periodo <= PERIODOS_POR_DIA:
+        return None
+    return i * PERIODOS_POR_DIA + periodo - 1
+
+def mascara_dia(dia):
+    """Todos os períodos de um dia"""
+    i = _INDICE_DIA.get(dia)
+    if i is None:
+        return 0
+    return ((1 << PERIODOS_POR_DIA) - 1) << (i * PERIODOS_POR_DIA)
+
+def _separar_horario(texto):
+    """"seg_1" / "segunda_1" -> ("seg", 1)"""
+    dia, _, periodo = str(texto).rpartition("_")
+    try:
+        return dia, int(periodo)
+    except ValueError:
+        return None, None
+
+def mascara_professor(professor):
+    """Slots livres do professor: dias disponíveis menos os horários indisponíveis"""
+    dias = getattr(professor, 'disponibilidade', None)
+    if dias is None:
+        mascara = TODOS_OS_SLOTS
+    else:
+        mascara = 0
+        for dia in dias:
+            mascara |= mascara_dia(dia)
+    for texto in getattr(professor, 'horarios_indisponiveis', None) or ():
+        bit = bit_slot(*_separar_horario(texto))
+        if bit is not None:
+            mascara &= ~(1 << bit)
+    return mascara
+
+def contar(mascara):
+    """Número de bits ligados"""
+    return mascara.bit_count()
+
+def intersecao(*mascaras):
+    resultado = -1
+    for mascara in mascaras:
+        resultado &= mascara
+    return resultado
+
+def slots_da_mascara(mascara):
+    """[(dia, periodo)] dos bits ligados, em ordem da semana"""
+    slots = []
+    while mascara:
+        bit = (mascara & -mascara).bit_length() - 1
+        dia, periodo = divmod(bit, PERIODOS_POR_DIA)
+        slots.append((DIAS[dia], periodo + 1))
+        mascara &= mascara - 1
+    return slots
+
+class DisponibilidadeBits:
+    """Máscaras de disponibilidade de um conjunto de professores, nos dois sentidos"""
+
+    def __init__(self, professores):
+        self.professores = list(professores)
+        self.indice = {prof.nome: i for i, prof in enumerate(self.professores)}
+        # Slots livres de cada professor (bits de slot)
+        self.mascaras = [mascara_professor(prof) for prof in self.professores]
+        # Professores livres em cada slot, por disciplina e por grupo (bits de índice de professor)
+        self.por_slot = [0] * TOTAL_SLOTS
+        self.por_disciplina = {}
+        self.por_grupo = {}
+        for i, (prof, mascara) in enumerate(zip(self.professores, self.mascaras)):
+            bit_prof = 1 << i
+            for dia, periodo in slots_da_mascara(mascara):
+                self.por_slot[bit_slot(dia, periodo)] |= bit_prof
+            for disciplina in getattr(prof, 'disciplinas', ()) or ():
+                self.por_disciplina[disciplina] = self.por_disciplina.get(disciplina, 0) | bit_prof
+            grupo = getattr(prof, 'grupo', "AMBOS") or "AMBOS"
+            self.por_grupo[grupo] = self.por_grupo.get(grupo, 0) | bit_prof
+
+    def disponivel(self, professor_nome, dia, periodo):
+        i = self.indice.get(professor_nome)
+        bit = bit_slot(dia, periodo)
+        if i is None or bit is None:
+            return False
+        return bool(self.mascaras[i] >> bit & 1)
+
+    def periodos_livres(self, professor_nome):
+        """Quantos (dia, período) o professor tem livres na semana"""
+        i = self.indice.get(professor_nome)
+        return 0 if i is None else contar(self.mascaras[i])
+
+    def mascara_candidatos(self, disciplina, dia, periodo, grupo=None):
+        """Bits dos professores que ministram a disciplina e estão livres no slot"""
+        bit = bit_slot(dia, periodo)
+        if bit is None:
+            return 0
+        mascara = self.por_disciplina.get(disciplina, 0) & self.por_slot[bit]
+        if grupo is not None:
+            # Professores do mesmo grupo da turma ou de "AMBOS"
+            mascara &= self.por_grupo.get(grupo, 0) | self.por_grupo.get("AMBOS", 0)
+        return mascara
+
+    def professores_da_mascara(self, mascara):
+        """Objetos Professor dos bits ligados, na ordem original"""
+        encontrados = []
+        while mascara:
+            bit = mascara & -mascara
+            encontrados.append(self.professores[bit.bit_length() - 1])
+            mascara ^= bit
+        return encontrados
+
+    def candidatos(self, disciplina, dia, periodo, grupo=None):
+        return self.professores_da_mascara(self.mascara_candidatos(disciplina, dia, periodo, grupo))
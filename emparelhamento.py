@@ -0,0 +1,174 @@
+# emparelhamento.py - Professores das aulas por emparelhamento em cada horário REAL
+"""
+O escalonador guloso escolhe o professor de cada aula na hora em que a
+coloca (o menos carregado entre os livres). Um professor compartilhado
+fica com a primeira turma que passa pelo horário, e uma turma seguinte que
+só poderia ter aquele professor fica sem aula, mesmo que a primeira
+pudesse ter outro.
+
+Como cada (segmento, período) ocupa exatamente uma faixa de matriz_grade.FAIXAS
+(MASCARA_SLOT), "um professor por horário REAL" vira "um professor por
+(dia, faixa)", e a atribuição inteira é um fluxo:
+
+    fonte -> aula -> (professor, dia, faixa) -> professor -> sumidouro
+             cap 1    cap 1                     cap limite semanal
+
+EmparelhamentoPorSlot mantém esse fluxo enquanto os horários são
+escolhidos: incluir(aula) procura um caminho aumentante (BFS) em que aulas
+já colocadas trocam de professor no próprio horário, ou liberam um
+professor que atingiu o limite indo para outro, até chegar a um professor
+com folga. Incluir aula a aula dessa forma dá o fluxo máximo (Kuhn).
+
+equilibrar() minimiza em seguida a soma de 1 + 2 + ... + carga de cada
+professor (custo convexo). Nesse fluxo os únicos ciclos de custo negativo
+levam uma aula de carga de um professor com carga c para outro com carga
+<= c - 2 por um caminho residual; cancelá-los até não sobrar nenhum dá o
+custo mínimo. Tudo é polinomial: cada busca é O(arestas) e cada
+cancelamento reduz a soma dos quadrados das cargas.
+
+Com o índice de DisponibilidadeBits, folga(slot, mascara) diz quantos dos
+candidatos (em bits) ainda estão livres e abaixo do limite no horário, para
+o escalonador preferir os horários menos disputados.
+
+    emparelhamento = EmparelhamentoPorSlot(limites, disponibilidade.indice)
+    emparelhamento.folga(("segunda", faixa), mascara_candidatos)
+    emparelhamento.incluir(aula, ("segunda", faixa), ["Tatiane", "Marina"])
+    emparelhamento.equilibrar()
+    emparelhamento.professor[aula]
+"""
+
+from collections import deque
+
+from disponibilidade import contar
+
+class EmparelhamentoPorSlot:
+    """Fluxo máximo aula -> (professor, horário) -> professor, aumentado aula a aula"""
+
+    def __init__(self, limites=None, indice=None):
+        self.limites = limites or {}
+        self.dono = {}          # (slot, professor) -> aula
+        self.professor = {}     # aula -> professor
+        self.slot = {}          # aula -> slot (dia, faixa)
+        self.candidatos = {}    # aula -> [professores]
+        self.aulas_de = {}      # professor -> {aulas}
+        self.indice = indice or {}  # professor -> posição do bit (DisponibilidadeBits.indice)
+        self.ocupados = {}      # slot -> bits dos professores com aula no slot
+        self.esgotados = 0      # bits dos professores no limite semanal
+        self.trocas = 0         # aulas já colocadas que mudaram de professor
+        self.cancelamentos = 0  # ciclos negativos cancelados por equilibrar
+
+    def carga(self, professor):
+        return len(self.aulas_de.get(professor, ()))
+
+    def _com_folga(self, professor):
+        limite = self.limites.get(professor)
+        return limite is None or self.carga(professor) < limite
+
+    def _buscar(self, inicio, destino, esgotadas=None):
+        """
+        BFS no grafo residual a partir das aulas de inicio (que precisam de professor novo).
+        Chegando a uma posição livre (slot, q) com destino(q) verdadeiro, devolve as
+        [(aula, professor novo)] do caminho; None se não há caminho. Aulas em esgotadas
+        (alcançadas por buscas que falharam com destinos que incluem estes) são puladas, e
+        as desta busca entram lá se ela falhar.
+        """
+        esgotadas = set() if esgotadas is None else esgotadas
+        anterior = {aula: None for aula in inicio if aula not in esgotadas}
+        vistos = set()
+        fila = deque(anterior)
+        while fila:
+            aula = fila.popleft()
+            slot = self.slot[aula]
+            for q in sorted(self.candidatos[aula], key=self.carga):
+                if q == self.professor.get(aula) or (slot, q) in vistos:
+                    continue
+                vistos.add((slot, q))
+                dono = self.dono.get((slot, q))
+                if dono is not None:
+                    # A aula toma a posição de dono, que precisa de outro professor no horário
+                    proximas = [dono]
+                elif destino(q):
+                    caminho = [(aula, q)]
+                    while anterior[caminho[-1][0]] is not None:
+                        caminho.append(anterior[caminho[-1][0]])
+                    return caminho
+                elif q in vistos:
+                    continue
+                else:
+                    # q não serve de destino: a aula entra se alguma aula de q sair para outro professor
+                    vistos.add(q)
+                    proximas = self.aulas_de.get(q, ())
+                for proxima in proximas:
+                    if proxima not in anterior and proxima not in esgotadas:
+                        anterior[proxima] = (aula, q)
+                        fila.append(proxima)
+        esgotadas.update(anterior)
+        return None
+
+    def _bit(self, professor):
+        i = self.indice.get(professor)
+        return 0 if i is None else 1 << i
+
+    def _aplicar(self, caminho):
+        afetados = set()
+        for aula, _ in caminho:
+            antigo = self.professor.get(aula)
+            if antigo is not None:
+                afetados.add(antigo)
+                self.aulas_de[antigo].discard(aula)
+                if self.dono.get((self.slot[aula], antigo)) is aula:
+                    del self.dono[(self.slot[aula], antigo)]
+                    self.ocupados[self.slot[aula]] &= ~self._bit(antigo)
+        for aula, professor in caminho:
+            afetados.add(professor)
+            self.professor[aula] = professor
+            self.dono[(self.slot[aula], professor)] = aula
+            self.ocupados[self.slot[aula]] = self.ocupados.get(self.slot[aula], 0) | self._bit(professor)
+            self.aulas_de.setdefault(professor, set()).add(aula)
+        for professor in afetados:
+            if self._com_folga(professor):
+                self.esgotados &= ~self._bit(professor)
+            else:
+                self.esgotados |= self._bit(professor)
+
+    def folga(self, slot, mascara):
+        """Quantos dos candidatos em mascara (bits do índice) estão livres no slot e abaixo do limite"""
+        return contar(mascara & ~self.ocupados.get(slot, 0) & ~self.esgotados)
+
+    def incluir(self, aula, slot, candidatos):
+        """Coloca a aula no slot (dia, faixa) se o fluxo aumenta; devolve se entrou"""
+        self.slot[aula] = slot
+        self.candidatos[aula] = list(candidatos)
+        caminho = self._buscar([aula], self._com_folga)
+        if caminho is None:
+            del self.slot[aula], self.candidatos[aula]
+            return False
+        self.trocas += len(caminho) - 1
+        self._aplicar(caminho)
+        return True
+
+    def equilibrar(self):
+        """Cancela ciclos negativos (carga c -> carga <= c - 2) até o custo convexo ser mínimo"""
+        professores = list(self.aulas_de)
+        melhorou = True
+        while melhorou:
+            melhorou = False
+            # Em carga decrescente os destinos só encolhem: o que uma busca falha esgotou
+            # não leva a destino nas seguintes (até a grade mudar)
+            esgotadas = set()
+            for p in sorted(professores, key=self.carga, reverse=True):
+                maximo = self.carga(p) - 2
+                if maximo < 0:
+                    break
+                caminho = self._buscar(list(self.aulas_de[p]),
+                                       lambda q: self.carga(q) <= maximo and self._com_folga(q), esgotadas)
+                if caminho is not None:
+                    self._aplicar(caminho)
+                    self.cancelamentos += 1
+                    melhorou = True
+                    break
+        return self.custo()
+
+    def custo(self):
+        """Soma de 1 + 2 + ... + carga de cada professor"""
+        return sum(len(aulas) * (len(aulas) + 1) // 2 for aulas in self.aulas_de.values())
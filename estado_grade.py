@@ -0,0 +1,125 @@
+# estado_grade.py - Estado incremental do escalonador guloso (verificações O(1))
+"""
+EstadoGrade é atualizado a cada aula colocada (adicionar) ou retirada
+(remover) e responde em tempo constante às quatro perguntas que o
+escalonador guloso faz para cada candidato:
+
+    estado.turma_livre("6anoA", "segunda", 3)
+    estado.professor_livre("Heliana", "segunda", "EF_II", 3)
+    estado.disciplina_esgotada_no_dia("6anoA", "segunda", "Português A")
+    estado.atingiu_limite("Heliana")
+
+Diferente da ScheduleMatrix (arrays NumPy, boa para varreduras vetorizadas
+e snapshots), aqui tudo é dict/int do Python: ler um escalar de um array
+NumPy custa mais que um dict.get, e o laço guloso faz centenas de milhares
+dessas leituras. A ocupação do professor em cada dia é um inteiro cujos
+bits são as faixas de horário REAL de matriz_grade.FAIXAS, então "livre no
+período P do segmento S" é um AND com a máscara pré-calculada do slot.
+"""
+
+from horarios import HORARIOS
+from matriz_grade import FAIXAS
+from models import segmento_da_turma
+from neuro_rules import maximo_aulas_por_dia
+
+def _mascaras_slots():
+    """{(segmento, periodo): bits das faixas de FAIXAS que o período ocupa}"""
+    mascaras = {}
+    for slot in HORARIOS.slots:
+        mascara = 0
+        for i, (inicio, fim) in enumerate(FAIXAS):
+            if slot.inicio <= inicio and fim <= slot.fim:
+                mascara |= 1 << i
+        mascaras[(slot.segmento, slot.periodo)] = mascara
+    return mascaras
+
+MASCARA_SLOT = _mascaras_slots()
+
+def _valor(aula, campo):
+    if isinstance(aula, dict):
+        return aula.get(campo)
+    return getattr(aula, campo, None)
+
+class EstadoGrade:
+    """Contadores por turma/professor/disciplina de uma grade em construção"""
+
+    def __init__(self, disciplinas=(), limites=None):
+        # (turma, dia, periodo) -> aulas
+        self.turmas = {}
+        # (professor, dia) -> bits das faixas ocupadas; (professor, dia, faixa) -> aulas, para remover
+        self.faixas_professor = {}
+        self._aulas_na_faixa = {}
+        # (turma, disciplina, dia) -> aulas
+        self.disciplinas_no_dia = {}
+        # professor -> aulas na semana / limite semanal
+        self.horas = {}
+        self.limites = dict(limites or {})
+        # Máximo de aulas da disciplina por dia na mesma turma (neuro_rules.maximo_aulas_por_dia)
+        self.maximo_por_dia = {d.nome: maximo_aulas_por_dia(d) for d in disciplinas}
+
+    @classmethod
+    def de_aulas(cls, aulas, disciplinas=(), limites=None):
+        estado = cls(disciplinas, limites)
+        for aula in aulas:
+            estado.adicionar(aula)
+        return estado
+
+    # ============================================
+    # ESCRITA
+    # ============================================
+
+    def _registrar(self, aula, delta):
+        turma = _valor(aula, 'turma')
+        professor = _valor(aula, 'professor')
+        dia = _valor(aula, 'dia')
+        periodo = _valor(aula, 'horario')
+        segmento = _valor(aula, 'segmento') or segmento_da_turma(turma or "")
+
+        chave = (turma, dia, periodo)
+        self.turmas[chave] = self.turmas.get(chave, 0) + delta
+        chave = (turma, _valor(aula, 'disciplina'), dia)
+        self.disciplinas_no_dia[chave] = self.disciplinas_no_dia.get(chave, 0) + delta
+        self.horas[professor] = self.horas.get(professor, 0) + delta
+
+        mascara = MASCARA_SLOT.get((segmento, periodo), 0)
+        ocupadas = self.faixas_professor.get((professor, dia), 0)
+        while mascara:
+            bit = mascara & -mascara
+            mascara ^= bit
+            chave = (professor, dia, bit)
+            restantes = self._aulas_na_faixa.get(chave, 0) + delta
+            self._aulas_na_faixa[chave] = restantes
+            ocupadas = ocupadas | bit if restantes > 0 else ocupadas & ~bit
+        self.faixas_professor[(professor, dia)] = ocupadas
+
+    def adicionar(self, aula):
+        self._registrar(aula, 1)
+
+    def remover(self, aula):
+        self._registrar(aula, -1)
+
+    # ============================================
+    # LEITURA O(1)
+    # ============================================
+
+    def turma_livre(self, turma, dia, periodo):
+        return not self.turmas.get((turma, dia, periodo))
+
+    def professor_livre(self, professor, dia, segmento, periodo):
+        """Se o professor não tem aula em nenhuma faixa de horário REAL do (segmento, período)"""
+        return not self.faixas_professor.get((professor, dia), 0) & MASCARA_SLOT.get((segmento, periodo), 0)
+
+    def aulas_disciplina_no_dia(self, turma, disciplina, dia):
+        return self.disciplinas_no_dia.get((turma, disciplina, dia), 0)
+
+    def disciplina_esgotada_no_dia(self, turma, dia, disciplina):
+        """Se a turma já tem o máximo de aulas da disciplina no dia (1 se pesada, 2 senão)"""
+        return self.disciplinas_no_dia.get((turma, disciplina, dia), 0) >= self.maximo_por_dia.get(disciplina, 1)
+
+    def horas_professor(self, professor):
+        return self.horas.get(professor, 0)
+
+    def atingiu_limite(self, professor):
+        """Professor sem limite conhecido nunca atinge (o escalonador informa os limites)"""
+        limite = self.limites.get(professor)
+        return limite is not None and self.horas.get(professor, 0) >= limite
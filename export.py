@@ -1,23 +1,15 @@
 # export.py
 import pandas as pd
 from fpdf import FPDF
+from horarios import HORARIOS
 
 def exportar_para_excel(aulas, caminho="grade_horaria.xlsx"):
     df = pd.DataFrame([
         {"Turma": a.turma, "Disciplina": a.disciplina, "Professor": a.professor, "Dia": a.dia, "Horário": a.horario, "Sala": a.sala}
         for a in aulas
     ])
-    HORARIOS_REAIS = {
-        1: "07:00-07:50",
-        2: "07:50-08:40",
-        3: "08:40-09:30",
-        4: "09:30-10:00", # INTERVALO
-        5: "10:00-10:50",
-        6: "10:50-11:40",
-        7: "11:40-12:20",
-        8: "12:20-13:10"
-    }
-    df["Horário"] = df["Horário"].map(HORARIOS_REAIS).fillna("Horário Inválido")
+    # Horário real pelo segmento de cada aula (tabela única de horarios.py)
+    df["Horário"] = [HORARIOS.rotulo(a.segmento, a.horario) for a in aulas]
     tabela = df.pivot_table(
         index=["Turma", "Horário"],
         columns="Dia",
@@ -40,23 +32,13 @@ def exportar_para_pdf(aulas, caminho="grade_horaria.pdf"):
     turmas_aulas = defaultdict(list)
     for aula in aulas:
         turmas_aulas[aula.turma].append(aula)
-    HORARIOS_REAIS = {
-        1: "07:00-07:50",
-        2: "07:50-08:40",
-        3: "08:40-09:30",
-        4: "09:30-09:50", # INTERVALO
-        5: "09:50-10:40",
-        6: "10:40-11:30",
-        7: "11:30-12:20",
-        8: "12:20-13:10"
-    }
     for turma in sorted(turmas_aulas.keys()):
         pdf.set_font("Arial", 'B', 12)
         pdf.cell(0, 10, txt=f"Turma: {turma}", ln=True)
         pdf.set_font("Arial", size=10)
         aulas_ordenadas = sorted(turmas_aulas[turma], key=lambda x: (x.dia, x.horario))
         for aula in aulas_ordenadas:
-            pdf.cell(0, 8, txt=f"{HORARIOS_REAIS.get(aula.horario, str(aula.horario))} - {aula.dia.upper()}: {aula.disciplina} ({aula.professor})", ln=True)
+            pdf.cell(0, 8, txt=f"{HORARIOS.rotulo(aula.segmento, aula.horario)} - {aula.dia.upper()}: {aula.disciplina} ({aula.professor})", ln=True)
         pdf.ln(5)
     pdf.output(caminho)
 
@@ -159,9 +141,10 @@ def exportar_grade_por_tipo(aulas, tipo_grade, caminho="grade_exportada.xlsx"):
                 aggfunc=lambda x: x.iloc[0],
                 fill_value=""
             ).reindex(columns=["dom", "seg", "ter", "qua", "qui", "sex", "sab"], fill_value="")
+            segmentos = {a.turma: a.segmento for a in aulas}
             novo_indice = []
             for turma, horario_num in tabela.index:
-                horario_real = HORARIOS_REAIS.get(horario_num, f"{horario_num}ª aula")
+                horario_real = HORARIOS.rotulo(segmentos.get(turma), horario_num)
                 novo_indice.append((turma, horario_real))
             tabela.index = pd.MultiIndex.from_tuples(novo_indice)
             tabela.to_excel(writer, sheet_name="Grade por Turma")
@@ -0,0 +1,121 @@
+# horarios.py - Tabela única de horários (TimeSlot) e matriz de sobreposição
+"""
+Cada (segmento, período) de models.HORARIOS_REAIS vira um TimeSlot com id
+inteiro, início/fim em minutos e o rótulo usado na interface. A matriz de
+sobreposição entre todos os slots é calculada uma única vez ao importar o
+módulo, então perguntas como "o 2º período do EM colide com o 1º do EF II?"
+são uma consulta a uma lista, sem converter textos de horário a cada
+verificação.
+
+    HORARIOS.colidem("EM", 2, "EF_II", 1)   # True (07:50 - 08:40 nos dois)
+    HORARIOS.rotulo("EF_II", 3)             # "09:50 - 10:40"
+"""
+
+from dataclasses import dataclass
+from datetime import time
+from typing import Dict, List, Tuple
+
+from models import HORARIOS_REAIS
+
+# id usado quando o (segmento, período) não existe na tabela
+SEM_SLOT = -1
+
+def _minutos(texto):
+    horas, minutos = texto.strip().split(":")
+    return int(horas) * 60 + int(minutos)
+
+@dataclass(frozen=True)
+class TimeSlot:
+    """Um período de aula de um segmento, com horário real"""
+    id: int
+    segmento: str
+    periodo: int
+    inicio: int  # minutos desde 00:00
+    fim: int
+    rotulo: str  # "07:50 - 08:40"
+    intervalo_antes: bool = False
+    intervalo_depois: bool = False
+
+    @property
+    def inicio_time(self):
+        return time(self.inicio // 60, self.inicio % 60)
+
+    @property
+    def fim_time(self):
+        return time(self.fim // 60, self.fim % 60)
+
+class RegistroHorarios:
+    """Todos os TimeSlot dos segmentos + matriz booleana de sobreposição entre eles"""
+
+    def __init__(self, horarios_reais=HORARIOS_REAIS):
+        self.slots: List[TimeSlot] = []
+        self._ids: Dict[Tuple[str, int], int] = {}
+        self._por_rotulo: Dict[Tuple[str, str], int] = {}
+
+        for segmento, periodos in horarios_reais.items():
+            ordenados = sorted(periodos.items())
+            faixas = [tuple(_minutos(p) for p in texto.split("-")) for _, texto in ordenados]
+            for i, ((periodo, texto), (inicio, fim)) in enumerate(zip(ordenados, faixas)):
+                slot = TimeSlot(
+                    id=len(self.slots),
+                    segmento=segmento,
+                    periodo=periodo,
+                    inicio=inicio,
+                    fim=fim,
+                    rotulo=texto,
+                    intervalo_antes=i > 0 and faixas[i - 1][1] < inicio,
+                    intervalo_depois=i + 1 < len(faixas) and faixas[i + 1][0] > fim,
+                )
+                self.slots.append(slot)
+                self._ids[(segmento, periodo)] = slot.id
+                self._por_rotulo[(segmento, texto)] = periodo
+
+        # sobreposicao[a][b] é True se os slots a e b se sobrepõem no horário real
+        self.sobreposicao: List[List[bool]] = [
+            [not (a.fim <= b.inicio or b.fim <= a.inicio) for b in self.slots]
+            for a in self.slots
+        ]
+
+    def id_slot(self, segmento, periodo):
+        """id do slot (SEM_SLOT se o período não existe no segmento)"""
+        return self._ids.get((segmento, periodo), SEM_SLOT)
+
+    def slot(self, segmento, periodo):
+        id_ = self._ids.get((segmento, periodo), SEM_SLOT)
+        return None if id_ == SEM_SLOT else self.slots[id_]
+
+    def colidem(self, segmento1, periodo1, segmento2, periodo2):
+        """Se os dois períodos se sobrepõem no horário real (períodos inexistentes nunca colidem)"""
+        a = self._ids.get((segmento1, periodo1), SEM_SLOT)
+        b = self._ids.get((segmento2, periodo2), SEM_SLOT)
+        if a == SEM_SLOT or b == SEM_SLOT:
+            return False
+        return self.sobreposicao[a][b]
+
+    def colidem_ids(self, a, b):
+        return a != SEM_SLOT and b != SEM_SLOT and self.sobreposicao[a][b]
+
+    def sobrepostos(self, id_):
+        """ids dos slots (de qualquer segmento) que se sobrepõem ao slot dado, incluindo ele"""
+        return [b for b, colide in enumerate(self.sobreposicao[id_]) if colide]
+
+    def rotulo(self, segmento, periodo):
+        """Horário real formatado ("07:50 - 08:40"), ou "Período N" se não existir"""
+        id_ = self._ids.get((segmento, periodo), SEM_SLOT)
+        return f"Período {periodo}" if id_ == SEM_SLOT else self.slots[id_].rotulo
+
+    def periodo_por_rotulo(self, segmento, rotulo):
+        """Inverso de rotulo(): número do período (0 se não existir)"""
+        return self._por_rotulo.get((segmento, rotulo), 0)
+
+    def periodos(self, segmento):
+        return [s.periodo for s in self.slots if s.segmento == segmento]
+
+    def faixas(self):
+        """Horários reais distintos de todos os segmentos, em ordem: [(inicio, fim, rotulo)]"""
+        vistas = {}
+        for slot in self.slots:
+            vistas.setdefault((slot.inicio, slot.fim), slot.rotulo)
+        return [(inicio, fim, rotulo) for (inicio, fim), rotulo in sorted(vistas.items())]
+
+HORARIOS = RegistroHorarios()
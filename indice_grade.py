@@ -0,0 +1,180 @@
+# indice_grade.py - Índices secundários em memória sobre a lista de aulas
+"""
+GradeIndex é uma lista de aulas (objetos Aula ou dicts) que mantém, junto
+com a lista, dicionários por turma, por professor e por posição na grade:
+
+    por_turma[turma]                          -> aulas da turma
+    por_professor[professor]                  -> aulas do professor
+    por_turma_horario[(turma, dia, horario)]  -> aulas da turma nesse período
+    por_professor_horario[(prof, dia, horario)] -> aulas do professor nesse período
+
+Assim "qual aula está nesta célula?" ou "quantas aulas tem o professor?"
+custam O(1) em vez de uma varredura da grade inteira.
+
+Os índices acompanham append/extend/insert/remove/pop/del e atribuições
+na lista. Para trocar dia/horário de uma aula já indexada use mover();
+alterar os campos da aula diretamente deixa os índices desatualizados
+(nesse caso, chame reindexar()).
+"""
+
+from collections import defaultdict
+
+def _valor(aula, campo):
+    if isinstance(aula, dict):
+        return aula.get(campo)
+    return getattr(aula, campo, None)
+
+def _definir(aula, campo, valor):
+    if isinstance(aula, dict):
+        aula[campo] = valor
+    else:
+        setattr(aula, campo, valor)
+
+def _retirar(lista, aula):
+    """Remove a própria aula (por identidade) de uma lista do índice"""
+    for i, existente in enumerate(lista):
+        if existente is aula:
+            del lista[i]
+            return
+
+class GradeIndex(list):
+    """Lista de aulas com índices por turma, professor e (turma|professor, dia, horario)"""
+
+    def __init__(self, aulas=()):
+        super().__init__(aulas)
+        self.reindexar()
+
+    def __copy__(self):
+        return GradeIndex(self)
+
+    def __reduce__(self):
+        # copy/deepcopy/pickle reconstroem os índices em vez de compartilhá-los
+        return (GradeIndex, (list(self),))
+
+    # ============================================
+    # MANUTENÇÃO DOS ÍNDICES
+    # ============================================
+
+    def reindexar(self):
+        """Reconstrói todos os índices a partir da lista"""
+        self.por_turma = defaultdict(list)
+        self.por_professor = defaultdict(list)
+        self.por_turma_horario = defaultdict(list)
+        self.por_professor_horario = defaultdict(list)
+        for aula in self:
+            self._indexar(aula)
+
+    def _indexar(self, aula):
+        turma = _valor(aula, 'turma')
+        professor = _valor(aula, 'professor')
+        dia = _valor(aula, 'dia')
+        horario = _valor(aula, 'horario')
+        self.por_turma[turma].append(aula)
+        self.por_professor[professor].append(aula)
+        self.por_turma_horario[(turma, dia, horario)].append(aula)
+        self.por_professor_horario[(professor, dia, horario)].append(aula)
+
+    def _desindexar(self, aula):
+        turma = _valor(aula, 'turma')
+        professor = _valor(aula, 'professor')
+        dia = _valor(aula, 'dia')
+        horario = _valor(aula, 'horario')
+        _retirar(self.por_turma[turma], aula)
+        _retirar(self.por_professor[professor], aula)
+        _retirar(self.por_turma_horario[(turma, dia, horario)], aula)
+        _retirar(self.por_professor_horario[(professor, dia, horario)], aula)
+
+    def append(self, aula):
+        super().append(aula)
+        self._indexar(aula)
+
+    def extend(self, aulas):
+        aulas = list(aulas)
+        super().extend(aulas)
+        for aula in aulas:
+            self._indexar(aula)
+
+    def __iadd__(self, aulas):
+        self.extend(aulas)
+        return self
+
+    def insert(self, posicao, aula):
+        super().insert(posicao, aula)
+        self._indexar(aula)
+
+    def remove(self, aula):
+        # Mesma semântica de list.remove (primeira aula igual), desindexando a que saiu
+        posicao = self.index(aula)
+        self._desindexar(self[posicao])
+        super().__delitem__(posicao)
+
+    def pop(self, posicao=-1):
+        aula = super().pop(posicao)
+        self._desindexar(aula)
+        return aula
+
+    def clear(self):
+        super().clear()
+        self.reindexar()
+
+    def __setitem__(self, posicao, valor):
+        if isinstance(posicao, slice):
+            super().__setitem__(posicao, valor)
+            self.reindexar()
+            return
+        self._desindexar(self[posicao])
+        super().__setitem__(posicao, valor)
+        self._indexar(valor)
+
+    def __delitem__(self, posicao):
+        if isinstance(posicao, slice):
+            super().__delitem__(posicao)
+            self.reindexar()
+            return
+        self._desindexar(self[posicao])
+        super().__delitem__(posicao)
+
+    def mover(self, aula, dia, horario):
+        """Muda o dia/horário de uma aula da lista mantendo os índices"""
+        self._desindexar(aula)
+        _definir(aula, 'dia', dia)
+        _definir(aula, 'horario', horario)
+        if isinstance(aula, dict):
+            if 'periodo' in aula:
+                aula['periodo'] = horario
+        elif hasattr(aula, 'periodo'):
+            aula.periodo = horario
+        self._indexar(aula)
+
+    # ============================================
+    # CONSULTAS O(1)
+    # ============================================
+
+    def da_turma(self, turma):
+        return list(self.por_turma.get(turma, ()))
+
+    def do_professor(self, professor):
+        return list(self.por_professor.get(professor, ()))
+
+    def na_turma(self, turma, dia, horario):
+        """Aulas da turma no dia/horário (mais de uma indica conflito)"""
+        return list(self.por_turma_horario.get((turma, dia, horario), ()))
+
+    def do_professor_em(self, professor, dia, horario):
+        """Aulas do professor no dia/horário (mais de uma indica superposição)"""
+        return list(self.por_professor_horario.get((professor, dia, horario), ()))
+
+    def turma_ocupada(self, turma, dia, horario):
+        return bool(self.por_turma_horario.get((turma, dia, horario)))
+
+    def professor_ocupado(self, professor, dia, horario):
+        return bool(self.por_professor_horario.get((professor, dia, horario)))
+
+    def horas_professor(self, professor):
+        return len(self.por_professor.get(professor, ()))
+
+def indexar(aulas):
+    """Retorna as aulas como GradeIndex (sem reconstruir se já forem)"""
+    if isinstance(aulas, GradeIndex):
+        return aulas
+    return GradeIndex(aulas)
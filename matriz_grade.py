@@ -0,0 +1,225 @@
+# matriz_grade.py - Ocupação da grade em tensores NumPy (ScheduleMatrix)
+"""
+ScheduleMatrix acompanha uma List[Aula] com contadores densos:
+
+    turmas[turma, dia, periodo]           -> aulas da turma no período
+    professores[professor, dia, faixa]    -> aulas do professor na faixa de horário REAL
+    disciplinas[turma, disciplina, dia]   -> aulas da disciplina na turma no dia
+    horas[professor]                      -> aulas do professor na semana
+
+As faixas são os intervalos elementares entre todos os inícios/fins de
+horarios.HORARIOS: um período do EM e um do EF II que acontecem no mesmo
+horário real caem na mesma faixa, então "o professor está livre?" vale
+entre segmentos. Turma livre, professor livre e "quantas aulas de D hoje"
+são leituras O(1); adicionar/remover/mover são escritas O(1).
+
+copiar() devolve um snapshot que compartilha os arrays até a primeira
+escrita (copy-on-write), para algoritmos de busca que testam um movimento
+e o descartam.
+"""
+
+import numpy as np
+
+from disponibilidade import DIAS, PERIODOS_POR_DIA, indice_dia
+from horarios import HORARIOS, SEM_SLOT
+from models import segmento_da_turma
+from registro_entidades import RegistroEntidades
+
+def _faixas_elementares():
+    """(lista de (inicio, fim) elementares, {id do slot: range das faixas que ele cobre})"""
+    limites = sorted({m for slot in HORARIOS.slots for m in (slot.inicio, slot.fim)})
+    faixas = [(a, b) for a, b in zip(limites, limites[1:])
+              if any(slot.inicio <= a and b <= slot.fim for slot in HORARIOS.slots)]
+    cobertura = {}
+    for slot in HORARIOS.slots:
+        indices = [i for i, (a, b) in enumerate(faixas) if slot.inicio <= a and b <= slot.fim]
+        cobertura[slot.id] = range(indices[0], indices[-1] + 1)
+    return faixas, cobertura
+
+FAIXAS, _COBERTURA = _faixas_elementares()
+
+def _valor(aula, campo):
+    if isinstance(aula, dict):
+        return aula.get(campo)
+    return getattr(aula, campo, None)
+
+def _definir(aula, campo, valor):
+    if isinstance(aula, dict):
+        aula[campo] = valor
+    else:
+        setattr(aula, campo, valor)
+
+def _segmento(aula):
+    segmento = _valor(aula, 'segmento')
+    if segmento:
+        return segmento
+    return segmento_da_turma(_valor(aula, 'turma') or "")
+
+class ScheduleMatrix:
+    """Tensores de ocupação de turmas, professores e disciplinas, com snapshots copy-on-write"""
+
+    _ARRAYS = ("turmas", "professores", "disciplinas", "horas")
+
+    def __init__(self, turmas=(), professores=(), disciplinas=(), registro=None):
+        self.registro = registro or RegistroEntidades.de_colecoes(turmas, professores, disciplinas)
+        n_turmas = max(len(self.registro.turmas), 8)
+        n_professores = max(len(self.registro.professores), 8)
+        n_disciplinas = max(len(self.registro.disciplinas), 8)
+        self.turmas = np.zeros((n_turmas, len(DIAS), PERIODOS_POR_DIA), dtype=np.int16)
+        self.professores = np.zeros((n_professores, len(DIAS), len(FAIXAS)), dtype=np.int16)
+        self.disciplinas = np.zeros((n_turmas, n_disciplinas, len(DIAS)), dtype=np.int16)
+        self.horas = np.zeros(n_professores, dtype=np.int32)
+        self._compartilhados = set()
+
+    @classmethod
+    def de_aulas(cls, aulas, turmas=(), professores=(), disciplinas=(), registro=None):
+        matriz = cls(turmas, professores, disciplinas, registro)
+        for aula in aulas:
+            matriz.adicionar(aula)
+        return matriz
+
+    # ============================================
+    # SNAPSHOTS (COPY-ON-WRITE)
+    # ============================================
+
+    def copiar(self):
+        """Snapshot que compartilha os arrays até a primeira escrita de qualquer um dos lados"""
+        copia = ScheduleMatrix.__new__(ScheduleMatrix)
+        copia.registro = self.registro  # ids só crescem, podem ser compartilhados
+        for nome in self._ARRAYS:
+            setattr(copia, nome, getattr(self, nome))
+        copia._compartilhados = set(self._ARRAYS)
+        self._compartilhados = set(self._ARRAYS)
+        return copia
+
+    def _para_escrita(self, nome):
+        if nome in self._compartilhados:
+            setattr(self, nome, getattr(self, nome).copy())
+            self._compartilhados.discard(nome)
+        return getattr(self, nome)
+
+    def _garantir_capacidade(self, id_turma, id_professor, id_disciplina):
+        """Aumenta os arrays (dobrando) quando um nome novo recebe id fora da capacidade"""
+        if id_turma >= self.turmas.shape[0] or id_disciplina >= self.disciplinas.shape[1]:
+            n_turmas = max(self.turmas.shape[0], 2 * (id_turma + 1))
+            n_disciplinas = max(self.disciplinas.shape[1], 2 * (id_disciplina + 1))
+            turmas = np.zeros((n_turmas,) + self.turmas.shape[1:], dtype=self.turmas.dtype)
+            turmas[:self.turmas.shape[0]] = self.turmas
+            disciplinas = np.zeros((n_turmas, n_disciplinas, len(DIAS)), dtype=self.disciplinas.dtype)
+            disciplinas[:self.disciplinas.shape[0], :self.disciplinas.shape[1]] = self.disciplinas
+            self.turmas, self.disciplinas = turmas, disciplinas
+            self._compartilhados -= {"turmas", "disciplinas"}
+        if id_professor >= self.professores.shape[0]:
+            n_professores = 2 * (id_professor + 1)
+            professores = np.zeros((n_professores,) + self.professores.shape[1:], dtype=self.professores.dtype)
+            professores[:self.professores.shape[0]] = self.professores
+            horas = np.zeros(n_professores, dtype=self.horas.dtype)
+            horas[:self.horas.shape[0]] = self.horas
+            self.professores, self.horas = professores, horas
+            self._compartilhados -= {"professores", "horas"}
+
+    # ============================================
+    # ESCRITA
+    # ============================================
+
+    def _registrar(self, aula, delta):
+        dia = indice_dia(_valor(aula, 'dia'))
+        periodo = _valor(aula, 'horario')
+        slot = HORARIOS.id_slot(_segmento(aula), periodo)
+        if dia is None or slot == SEM_SLOT:
+            return False
+
+        t = self.registro.turmas.id(_valor(aula, 'turma'))
+        p = self.registro.professores.id(_valor(aula, 'professor'))
+        d = self.registro.disciplinas.id(_valor(aula, 'disciplina'))
+        self._garantir_capacidade(t, p, d)
+
+        self._para_escrita("turmas")[t, dia, periodo - 1] += delta
+        faixas = _COBERTURA[slot]
+        self._para_escrita("professores")[p, dia, faixas.start:faixas.stop] += delta
+        self._para_escrita("disciplinas")[t, d, dia] += delta
+        self._para_escrita("horas")[p] += delta
+        return True
+
+    def adicionar(self, aula):
+        """Conta a aula; retorna False (sem contar) se o dia ou o período não existirem"""
+        return self._registrar(aula, 1)
+
+    def remover(self, aula):
+        return self._registrar(aula, -1)
+
+    def mover(self, aula, dia, horario):
+        """Muda dia/horário da aula mantendo os contadores"""
+        self.remover(aula)
+        _definir(aula, 'dia', dia)
+        _definir(aula, 'horario', horario)
+        if isinstance(aula, dict):
+            if 'periodo' in aula:
+                aula['periodo'] = horario
+        elif hasattr(aula, 'periodo'):
+            aula.periodo = horario
+        self.adicionar(aula)
+
+    # ============================================
+    # LEITURA O(1)
+    # ============================================
+
+    def aulas_turma_em(self, turma, dia, periodo):
+        t = self.registro.turmas.procurar(turma)
+        i = indice_dia(dia)
+        if t < 0 or i is None or t >= self.turmas.shape[0] or not 1 <= periodo <= PERIODOS_POR_DIA:
+            return 0
+        return int(self.turmas[t, i, periodo - 1])
+
+    def turma_livre(self, turma, dia, periodo):
+        return self.aulas_turma_em(turma, dia, periodo) == 0
+
+    def professor_livre(self, professor, dia, segmento, periodo):
+        """Se o professor não tem aula em nenhuma faixa que o (segmento, período) ocupa"""
+        p = self.registro.professores.procurar(professor)
+        i = indice_dia(dia)
+        slot = HORARIOS.id_slot(segmento, periodo)
+        if p < 0 or p >= self.professores.shape[0] or i is None or slot == SEM_SLOT:
+            return True
+        faixas = _COBERTURA[slot]
+        return not self.professores[p, i, faixas.start:faixas.stop].any()
+
+    def aulas_disciplina_no_dia(self, turma, disciplina, dia):
+        t = self.registro.turmas.procurar(turma)
+        d = self.registro.disciplinas.procurar(disciplina)
+        i = indice_dia(dia)
+        if t < 0 or d < 0 or i is None or t >= self.disciplinas.shape[0] or d >= self.disciplinas.shape[1]:
+            return 0
+        return int(self.disciplinas[t, d, i])
+
+    def horas_professor(self, professor):
+        p = self.registro.professores.procurar(professor)
+        if p < 0 or p >= self.horas.shape[0]:
+            return 0
+        return int(self.horas[p])
+
+    def aulas_turma_no_dia(self, turma, dia):
+        t = self.registro.turmas.procurar(turma)
+        i = indice_dia(dia)
+        if t < 0 or i is None or t >= self.turmas.shape[0]:
+            return 0
+        return int(self.turmas[t, i].sum())
+
+    # ============================================
+    # CONFLITOS (VETORIZADOS)
+    # ============================================
+
+    def conflitos_turma(self):
+        """[(turma, dia, periodo, quantidade)] com mais de uma aula no mesmo período"""
+        return [(self.registro.turmas.nomes[t], DIAS[i], int(p) + 1, int(self.turmas[t, i, p]))
+                for t, i, p in np.argwhere(self.turmas > 1)]
+
+    def conflitos_professor(self):
+        """[(professor, dia, (inicio, fim) da faixa em minutos, quantidade)] no mesmo horário REAL"""
+        return [(self.registro.professores.nomes[p], DIAS[i], FAIXAS[f], int(self.professores[p, i, f]))
+                for p, i, f in np.argwhere(self.professores > 1)]
+
+    def pares_conflito_professor(self):
+        """Número de pares de aulas do mesmo professor que se sobrepõem em cada faixa"""
+        excesso = self.professores.astype(np.int64)
+        return int((excesso * (excesso - 1) // 2).sum())
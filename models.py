@@ -2,6 +2,8 @@
 Modelos de dados para o sistema de grade horária
 """
 
+import re
+import sys
 import uuid
 from typing import List
 from dataclasses import dataclass, asdict
@@ -9,7 +11,7 @@ from dataclasses import dataclass, asdict
 # Constantes
 DIAS_SEMANA = ["seg", "ter", "qua", "qui", "sex"]
 
-# Horários reais por período e segmento (para referência, não usados diretamente)
+# Horários reais por período e segmento (fonte da tabela de TimeSlot em horarios.py)
 HORARIOS_REAIS = {
     "EF_II": {
         1: "07:50 - 08:40",
@@ -29,6 +31,46 @@ HORARIOS_REAIS = {
     }
 }
 
+# ============================================
+# SEGMENTO DAS TURMAS
+# ============================================
+# O segmento de cada turma é resolvido uma vez (campo segmento da Turma ou,
+# na falta dele, inferir_segmento) e fica em SEGMENTO_POR_TURMA. Aula e as
+# funções obter_segmento_turma dos outros módulos consultam esse dicionário
+# em vez de repetir a heurística pelo nome a cada verificação.
+#
+# O dicionário é do processo (compartilhado pelas sessões do Streamlit):
+# quem tem os objetos Turma em mãos deve preferir turma.segmento, e quem
+# renomeia, muda o segmento ou exclui uma turma atualiza o registro.
+
+SEGMENTO_POR_TURMA = {}
+
+# "1emA", "3 EM", "EM2", "Ensino Médio"; não casa com "em" dentro de palavras ("Semear")
+_PADRAO_EM = re.compile(r"\dem|(?<![a-z])em(?![a-z])|m[eé]dio")
+
+def inferir_segmento(texto):
+    """Segmento a partir do nome ou da série da turma ("EM" ou "EF_II")"""
+    if texto and _PADRAO_EM.search(texto.lower()):
+        return "EM"
+    return "EF_II"
+
+def registrar_segmento(turma_nome, segmento, nome_anterior=None):
+    """Registra o segmento da turma; nome_anterior (turma renomeada) sai do registro"""
+    if nome_anterior is not None and nome_anterior != turma_nome:
+        SEGMENTO_POR_TURMA.pop(nome_anterior, None)
+    SEGMENTO_POR_TURMA[turma_nome] = segmento
+
+def esquecer_segmento(turma_nome):
+    """Remove do registro uma turma excluída"""
+    SEGMENTO_POR_TURMA.pop(turma_nome, None)
+
+def segmento_da_turma(turma_nome):
+    """Segmento registrado da turma (inferido pelo nome uma única vez se ela não foi carregada)"""
+    segmento = SEGMENTO_POR_TURMA.get(turma_nome)
+    if segmento is None:
+        segmento = SEGMENTO_POR_TURMA[turma_nome] = inferir_segmento(turma_nome)
+    return segmento
+
 @dataclass
 class Aula:
     """Representa uma aula alocada na grade horária"""
@@ -48,12 +90,9 @@ class Aula:
         # Se periodo não foi fornecido, usa o mesmo valor de horario
         if self.periodo is None:
             self.periodo = self.horario
-        # Se segmento não foi fornecido, tenta inferir
+        # Se segmento não foi fornecido, usa o da turma
         if self.segmento is None:
-            if 'em' in self.turma.lower():
-                self.segmento = "EM"
-            else:
-                self.segmento = "EF_II"
+            self.segmento = segmento_da_turma(self.turma)
     
     def to_dict(self):
         return asdict(self)
@@ -66,13 +105,11 @@ class Turma:
         self.turno = turno
         self.grupo = grupo
         self.segmento = segmento or self._determinar_segmento()
+        registrar_segmento(self.nome, self.segmento)
     
     def _determinar_segmento(self):
         """Determina o segmento baseado na série"""
-        if 'em' in self.serie.lower() or 'medio' in self.serie.lower():
-            return "EM"
-        else:
-            return "EF_II"
+        return inferir_segmento(self.serie)
     
     def get_horarios_disponiveis(self):
         """Retorna os períodos disponíveis para esta turma"""
@@ -90,6 +127,9 @@ class Turma:
     
     def __repr__(self):
         return f"Turma({self.nome}, {self.serie}, {self.grupo}, {self.segmento})"
+    
+    def to_dict(self):
+        return dict(self.__dict__)
 
 class Professor:
     def __init__(self, nome: str, disciplinas: List[str], disponibilidade: List[str], 
@@ -103,6 +143,9 @@ class Professor:
     
     def __repr__(self):
         return f"Professor({self.nome}, {self.disciplinas})"
+    
+    def to_dict(self):
+        return dict(self.__dict__)
 
 class Disciplina:
     def __init__(self, nome: str, carga_semanal: int, tipo: str, 
@@ -119,6 +162,9 @@ class Disciplina:
     
     def __repr__(self):
         return f"Disciplina({self.nome}, {self.carga_semanal}h, {self.grupo})"
+    
+    def to_dict(self):
+        return dict(self.__dict__)
 
 class Sala:
     def __init__(self, nome: str, capacidade: int, tipo: str = "normal", id: str = None):
@@ -128,4 +174,147 @@ class Sala:
         self.tipo = tipo
     
     def __repr__(self):
-        return f"Sala({self.nome}, {self.capacidade}, {self.tipo})"
\ No newline at end of file
+        return f"Sala({self.nome}, {self.capacidade}, {self.tipo})"
+    
+    def to_dict(self):
+        return dict(self.__dict__)
+
+# ============================================
+# VARIANTES COMPACTAS (__slots__)
+# ============================================
+# Mesmos construtores e mesmo to_dict() das classes acima, sem __dict__ por
+# instância. Os textos repetidos (nomes, dia, segmento, sala, grupo, cores)
+# são internados, então milhares de aulas apontam para as mesmas strings.
+# Úteis quando muitas cópias de grade ficam em memória ao mesmo tempo.
+
+def _internar(valor):
+    return sys.intern(valor) if isinstance(valor, str) else valor
+
+class AulaCompacta:
+    """Aula com __slots__ (mesmos campos, valores padrão e to_dict de Aula)"""
+    __slots__ = ("turma", "disciplina", "professor", "dia", "horario", "periodo",
+                 "segmento", "sala", "grupo", "cor_fundo", "cor_fonte")
+    
+    def __init__(self, turma: str, disciplina: str, professor: str, dia: str, horario: int,
+                 periodo: int = None, segmento: str = None, sala: str = "Sala 1",
+                 grupo: str = "A", cor_fundo: str = "#4A90E2", cor_fonte: str = "#FFFFFF"):
+        self.turma = _internar(turma)
+        self.disciplina = _internar(disciplina)
+        self.professor = _internar(professor)
+        self.dia = _internar(dia)
+        self.horario = horario
+        self.periodo = horario if periodo is None else periodo
+        if segmento is None:
+            segmento = segmento_da_turma(turma)
+        self.segmento = _internar(segmento)
+        self.sala = _internar(sala)
+        self.grupo = _internar(grupo)
+        self.cor_fundo = _internar(cor_fundo)
+        self.cor_fonte = _internar(cor_fonte)
+    
+    def to_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+    
+    def __eq__(self, outra):
+        if not isinstance(outra, (AulaCompacta, Aula)):
+            return NotImplemented
+        return self.to_dict() == outra.to_dict()
+    
+    __hash__ = None  # Mutável, como a dataclass Aula
+    
+    def __repr__(self):
+        campos = ", ".join(f"{campo}={getattr(self, campo)!r}" for campo in self.__slots__)
+        return f"AulaCompacta({campos})"
+
+class TurmaCompacta:
+    """Turma com __slots__ (métodos compartilhados com Turma)"""
+    __slots__ = ("id", "nome", "serie", "turno", "grupo", "segmento")
+    
+    def __init__(self, nome: str, serie: str, turno: str, grupo: str, segmento: str = None, id: str = None):
+        self.id = id or str(uuid.uuid4())
+        self.nome = _internar(nome)
+        self.serie = _internar(serie)
+        self.turno = _internar(turno)
+        self.grupo = _internar(grupo)
+        self.segmento = _internar(segmento or self._determinar_segmento())
+        registrar_segmento(self.nome, self.segmento)
+    
+    _determinar_segmento = Turma._determinar_segmento
+    get_horarios_disponiveis = Turma.get_horarios_disponiveis
+    get_carga_maxima = Turma.get_carga_maxima
+    __repr__ = Turma.__repr__
+    
+    def to_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+class ProfessorCompacto:
+    """Professor com __slots__"""
+    __slots__ = ("id", "nome", "disciplinas", "disponibilidade", "grupo", "horarios_indisponiveis")
+    
+    def __init__(self, nome: str, disciplinas: List[str], disponibilidade: List[str],
+                 grupo: str = "AMBOS", horarios_indisponiveis: List[str] = None, id: str = None):
+        self.id = id or str(uuid.uuid4())
+        self.nome = _internar(nome)
+        self.disciplinas = [_internar(d) for d in disciplinas]
+        self.disponibilidade = disponibilidade
+        self.grupo = _internar(grupo)
+        self.horarios_indisponiveis = horarios_indisponiveis or []
+    
+    __repr__ = Professor.__repr__
+    
+    def to_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+class DisciplinaCompacta:
+    """Disciplina com __slots__"""
+    __slots__ = ("id", "nome", "carga_semanal", "tipo", "turmas", "grupo", "cor_fundo", "cor_fonte")
+    
+    def __init__(self, nome: str, carga_semanal: int, tipo: str,
+                 turmas: List[str], grupo: str = "A",
+                 cor_fundo: str = "#4A90E2", cor_fonte: str = "#FFFFFF", id: str = None):
+        self.id = id or str(uuid.uuid4())
+        self.nome = _internar(nome)
+        self.carga_semanal = carga_semanal
+        self.tipo = _internar(tipo)
+        self.turmas = [_internar(t) for t in turmas]
+        self.grupo = _internar(grupo)
+        self.cor_fundo = _internar(cor_fundo)
+        self.cor_fonte = _internar(cor_fonte)
+    
+    __repr__ = Disciplina.__repr__
+    
+    def to_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+class SalaCompacta:
+    """Sala com __slots__"""
+    __slots__ = ("id", "nome", "capacidade", "tipo")
+    
+    def __init__(self, nome: str, capacidade: int, tipo: str = "normal", id: str = None):
+        self.id = id or str(uuid.uuid4())
+        self.nome = _internar(nome)
+        self.capacidade = capacidade
+        self.tipo = _internar(tipo)
+    
+    __repr__ = Sala.__repr__
+    
+    def to_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+# Classe comum -> variante compacta
+MODELOS_COMPACTOS = {
+    Aula: AulaCompacta,
+    Turma: TurmaCompacta,
+    Professor: ProfessorCompacto,
+    Disciplina: DisciplinaCompacta,
+    Sala: SalaCompacta,
+}
+
+def compactar(obj):
+    """Cópia de um objeto dos modelos (ou de uma lista deles) na variante compacta"""
+    if isinstance(obj, list):
+        return [compactar(item) for item in obj]
+    classe = MODELOS_COMPACTOS.get(type(obj))
+    if classe is None:
+        return obj
+    return classe(**obj.to_dict())
@@ -0,0 +1,116 @@
+# multistart.py - Várias execuções do algoritmo simples em paralelo, fica a melhor
+"""
+gerar_grade embaralha as aulas de cada turma (random.shuffle), então
+sementes diferentes dão grades diferentes. Aqui N execuções com sementes
+0..N-1 são distribuídas por um ProcessPoolExecutor (um processo por núcleo)
+e a melhor grade é escolhida pela completude e, empatando, pela pontuação
+suave (aulas em horário ideal menos janelas nas turmas).
+
+    aulas, resumo = gerar_grade_multistart(turmas, professores, disciplinas, execucoes=16)
+    resumo["semente"], resumo["completude"], resumo["pontuacao"]
+
+Com parar_em_completa=True, a primeira execução com 100% cancela as que
+ainda não começaram. Os dados vão para cada processo uma única vez (no
+inicializador do pool) e o escalonador roda silencioso, sem chamar o
+streamlit fora da thread da interface. Com processos=1 as execuções rodam
+no próprio processo, na mesma ordem. Só a ordenação "aleatoria" varia com
+a semente; "restritiva" daria N vezes a mesma grade. reparar é repassado a
+gerar_grade (cada execução faz o seu reparo das aulas que sobraram).
+"""
+
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from neuro_rules import eh_horario_ideal
+from simple_scheduler import SimpleGradeHoraria
+
+# Dados do processo trabalhador, enviados uma vez pelo inicializador do pool
+_DADOS = {}
+
+def _preparar(turmas, professores, disciplinas, salas):
+    _DADOS["entrada"] = (turmas, professores, disciplinas, salas)
+
+def _executar(semente, ordenacao, reparar=True):
+    """Uma execução de gerar_grade com a semente dada: (semente, aulas, estatísticas)"""
+    turmas, professores, disciplinas, salas = _DADOS["entrada"]
+    random.seed(semente)
+    escalonador = SimpleGradeHoraria(turmas, professores, disciplinas, salas, silencioso=True)
+    # A análise de fluxo é a mesma em toda execução e custaria mais que a própria geração
+    aulas = escalonador.gerar_grade(ordenacao, reparar=reparar, verificar_viabilidade=False)
+    return semente, aulas, escalonador.estatisticas
+
+# ============================================
+# PONTUAÇÃO DAS RESTRIÇÕES SUAVES
+# ============================================
+
+def pontuacao_suave(aulas, disciplinas):
+    """Aulas em horário ideal para o tipo da disciplina menos janelas (períodos vagos entre aulas) nas turmas"""
+    tipos = {disc.nome: disc.tipo for disc in disciplinas}
+    ideais = 0
+    periodos = {}
+    for aula in aulas:
+        tipo = tipos.get(aula.disciplina, "media")
+        if eh_horario_ideal(tipo, aula.horario, aula.segmento or "EF_II"):
+            ideais += 1
+        periodos.setdefault((aula.turma, aula.dia), set()).add(aula.horario)
+    janelas = sum(max(ocupados) - min(ocupados) + 1 - len(ocupados) for ocupados in periodos.values())
+    return ideais - janelas
+
+def _chave(execucao, disciplinas):
+    semente, aulas, estatisticas = execucao
+    # Maior completude, depois maior pontuação; empate fica com a menor semente
+    return estatisticas.get("completude", 0), pontuacao_suave(aulas, disciplinas), -semente
+
+# ============================================
+# MULTI-START
+# ============================================
+
+def gerar_grade_multistart(turmas, professores, disciplinas, salas=(), execucoes=8, processos=None,
+                           ordenacao="aleatoria", semente_inicial=0, parar_em_completa=True, reparar=True):
+    """
+    Roda gerar_grade com as sementes semente_inicial .. semente_inicial + execucoes - 1 e devolve
+    (aulas da melhor execução, resumo). processos=None usa todos os núcleos.
+    """
+    inicio = time.perf_counter()
+    sementes = list(range(semente_inicial, semente_inicial + execucoes))
+    processos = max(1, min(processos or os.cpu_count() or 1, len(sementes)))
+    concluidas = []
+
+    if processos == 1:
+        _preparar(turmas, professores, disciplinas, list(salas))
+        for semente in sementes:
+            concluidas.append(_executar(semente, ordenacao, reparar))
+            if parar_em_completa and concluidas[-1][2].get("completude", 0) >= 100:
+                break
+    else:
+        with ProcessPoolExecutor(max_workers=processos, initializer=_preparar,
+                                 initargs=(turmas, professores, disciplinas, list(salas))) as pool:
+            pendentes = {pool.submit(_executar, semente, ordenacao, reparar) for semente in sementes}
+            while pendentes:
+                prontas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                concluidas.extend(futuro.result() for futuro in prontas)
+                if parar_em_completa and any(e.get("completude", 0) >= 100 for _, _, e in concluidas):
+                    # As que já estão rodando terminam; as da fila não começam
+                    for futuro in pendentes:
+                        futuro.cancel()
+                    break
+
+    if not concluidas:
+        return [], {}
+    semente, aulas, estatisticas = max(concluidas, key=lambda execucao: _chave(execucao, disciplinas))
+    completudes = [e.get("completude", 0) for _, _, e in concluidas]
+    resumo = {
+        "semente": semente,
+        "completude": estatisticas.get("completude", 0),
+        "pontuacao": pontuacao_suave(aulas, disciplinas),
+        "estatisticas": estatisticas,
+        "execucoes": len(concluidas),
+        "canceladas": len(sementes) - len(concluidas),
+        "processos": processos,
+        "pior_completude": min(completudes),
+        "media_completude": sum(completudes) / len(completudes),
+        "tempo_ms": (time.perf_counter() - inicio) * 1000,
+    }
+    return aulas, resumo
@@ -1,3 +1,7 @@
+def maximo_aulas_por_dia(disciplina) -> int:
+    """Máximo de aulas da disciplina no mesmo dia numa turma: 1 se pesada, 2 senão"""
+    return 1 if disciplina.tipo == "pesada" else 2
+
 def eh_horario_ideal(tipo_disciplina: str, horario: int, segmento: str) -> bool:
     """
     Horários ideais considerando:
@@ -21,4 +25,31 @@ def eh_horario_ideal(tipo_disciplina: str, horario: int, segmento: str) -> bool:
         elif tipo_disciplina == "pratica":
             return horario in [5, 6, 7]  # Após intervalo
         else:
-            return horario in [1, 2, 3, 4, 5, 6, 7]
\ No newline at end of file
+            return horario in [1, 2, 3, 4, 5, 6, 7]
+
+def periodos_ideais(tipo_disciplina: str, segmento: str) -> list:
+    """
+    Períodos preferidos para distribuir a disciplina:
+    - Pesadas: manhã
+    - Práticas: evitar 1º período
+    - Leves: tarde (períodos finais)
+    """
+    if segmento == "EM":
+        if tipo_disciplina == "pesada":
+            return [1, 2, 3, 4]
+        elif tipo_disciplina == "pratica":
+            return [4, 5, 6, 7]
+        elif tipo_disciplina == "leve":
+            return [5, 6, 7]
+        else:  # media
+            return list(range(1, 8))
+    
+    else:  # EF_II
+        if tipo_disciplina == "pesada":
+            return [1, 2, 3]
+        elif tipo_disciplina == "pratica":
+            return [3, 4, 5]
+        elif tipo_disciplina == "leve":
+            return [4, 5]
+        else:  # media
+            return list(range(1, 6))
@@ -0,0 +1,281 @@
+# recozimento.py - Recozimento simulado das preferências pedagógicas de uma grade viável
+"""
+Parte de uma grade completa e sem violações e minimiza uma pontuação
+ponderada das preferências (neuro_rules), sem nunca criar violação:
+
+    horario_ideal       aula fora de eh_horario_ideal (+1) e fora de periodos_ideais (+1)
+    janelas_professor   faixas de horário REAL vagas entre a primeira e a última aula
+                        do professor no dia
+    agrupamento         pares de aulas da mesma disciplina no mesmo dia da turma
+    desequilibrio       soma de (aulas no dia - média da turma)² por turma
+
+Os movimentos são os da busca tabu (mover para um horário vago da turma,
+trocar duas aulas da turma), sorteados; a viabilidade é conferida pelos
+contadores de busca_tabu.BuscaTabu e a variação da pontuação é calculada
+só sobre as chaves que o movimento toca (turma/dia, turma/disciplina/dia,
+professor/dia). Movimentos que pioram são aceitos com probabilidade
+exp(-delta / T); T cai geometricamente a cada iteracoes_por_temperatura.
+
+    recozimento = Recozimento(aulas, professores, disciplinas, pesos={"janelas_professor": 3})
+    aulas_melhores = recozimento.resolver()
+    recozimento.exportar_traco("traco.csv")   # iteração, tempo, temperatura, pontuação...
+"""
+
+import csv
+import io
+import math
+import random
+import time
+
+from busca_tabu import BuscaTabu
+from disponibilidade import DIAS
+from estado_grade import MASCARA_SLOT
+from horarios import HORARIOS
+from neuro_rules import eh_horario_ideal, periodos_ideais
+
+PESOS_PADRAO = {
+    "horario_ideal": 3.0,
+    "janelas_professor": 2.0,
+    "agrupamento": 2.0,
+    "desequilibrio": 1.0,
+}
+
+def _vagas_entre(ocupadas):
+    """Bits vagos entre o menor e o maior bit ligado"""
+    if not ocupadas:
+        return 0
+    return ocupadas.bit_length() - (ocupadas & -ocupadas).bit_length() + 1 - ocupadas.bit_count()
+
+class Recozimento:
+    """Recozimento simulado com avaliação local da pontuação e traço exportável"""
+
+    def __init__(self, aulas, professores, disciplinas, pesos=None, temperatura_inicial=None,
+                 temperatura_final=0.01, resfriamento=0.995, iteracoes_por_temperatura=100,
+                 max_iteracoes=200000, max_segundos=10.0, intervalo_traco=500, semente=0):
+        self.pesos = dict(PESOS_PADRAO)
+        self.pesos.update(pesos or {})
+        desconhecidos = set(self.pesos) - set(PESOS_PADRAO)
+        if desconhecidos:
+            raise ValueError(f"Termos desconhecidos: {', '.join(sorted(desconhecidos))}")
+        self.temperatura_inicial = temperatura_inicial
+        self.temperatura_final = temperatura_final
+        self.resfriamento = resfriamento
+        self.iteracoes_por_temperatura = iteracoes_por_temperatura
+        self.max_iteracoes = max_iteracoes
+        self.max_segundos = max_segundos
+        self.intervalo_traco = intervalo_traco
+        self.aleatorio = random.Random(semente)
+        self.traco = []
+        self.estatisticas = {}
+
+        # Contadores de viabilidade (mesmas posições: grade.dia / grade.periodo)
+        self.grade = BuscaTabu(aulas, professores, disciplinas, semente=semente)
+        self.aulas = self.grade.aulas
+        tipos = {disc.nome: disc.tipo for disc in disciplinas}
+
+        # Penalidade de horário de cada aula em cada período (0, 1 ou 2)
+        self.penalidade_periodo = []
+        for aula, segmento in zip(self.aulas, self.grade.segmento):
+            tipo = tipos.get(aula.disciplina, "media")
+            preferidos = periodos_ideais(tipo, segmento)
+            self.penalidade_periodo.append({
+                p: (not eh_horario_ideal(tipo, p, segmento)) + (p not in preferidos)
+                for p in HORARIOS.periodos(segmento)
+            })
+        self.media_dia = {}
+        for i in self.grade.ativas:
+            turma = self.aulas[i].turma
+            self.media_dia[turma] = self.media_dia.get(turma, 0) + 1 / len(DIAS)
+
+        # Contadores da pontuação
+        self.aulas_no_dia = {}      # (turma, dia) -> aulas
+        self.disciplina_dia = {}    # (turma, disciplina, dia) -> aulas
+        self.faixas = {}            # (professor, dia, bit da faixa) -> aulas
+        self.ocupacao_prof = {}     # (professor, dia) -> bits das faixas com aula
+        self.termos = dict.fromkeys(PESOS_PADRAO, 0.0)
+        # Dias sem aula também contam no desequilíbrio
+        for turma, media in self.media_dia.items():
+            self.termos["desequilibrio"] += len(DIAS) * media ** 2
+        for i in self.grade.ativas:
+            self._contar(i, self.grade.dia[i], self.grade.periodo[i], 1)
+
+    # ============================================
+    # PONTUAÇÃO
+    # ============================================
+
+    def pontuacao(self):
+        return sum(self.pesos[termo] * valor for termo, valor in self.termos.items())
+
+    def _contar(self, i, d, p, delta):
+        """Soma (delta=1) ou retira (delta=-1) a contribuição da aula i em (d, p) em cada termo"""
+        aula = self.aulas[i]
+        termos = self.termos
+        termos["horario_ideal"] += delta * self.penalidade_periodo[i].get(p, 2)
+
+        chave = (aula.turma, d)
+        c = self.aulas_no_dia.get(chave, 0)
+        media = self.media_dia[aula.turma]
+        termos["desequilibrio"] += (c + delta - media) ** 2 - (c - media) ** 2
+        self.aulas_no_dia[chave] = c + delta
+
+        chave = (aula.turma, aula.disciplina, d)
+        c = self.disciplina_dia.get(chave, 0)
+        # Pares c*(c-1)/2: entrar soma c, sair tira c-1
+        termos["agrupamento"] += c if delta > 0 else -(c - 1)
+        self.disciplina_dia[chave] = c + delta
+
+        chave = (aula.professor, d)
+        antes = ocupadas = self.ocupacao_prof.get(chave, 0)
+        mascara = MASCARA_SLOT.get((self.grade.segmento[i], p), 0)
+        while mascara:
+            bit = mascara & -mascara
+            mascara ^= bit
+            c = self.faixas.get((aula.professor, d, bit), 0) + delta
+            self.faixas[(aula.professor, d, bit)] = c
+            ocupadas = ocupadas | bit if c > 0 else ocupadas & ~bit
+        if ocupadas != antes:
+            self.ocupacao_prof[chave] = ocupadas
+            termos["janelas_professor"] += _vagas_entre(ocupadas) - _vagas_entre(antes)
+
+    def _recontar(self, saindo, entrando):
+        """Tira as aulas das posições saindo e conta nas posições entrando: [(aula, dia, periodo)]"""
+        for i, d, p in saindo:
+            self._contar(i, d, p, -1)
+        for i, d, p in entrando:
+            self._contar(i, d, p, 1)
+
+    def _origens(self, destinos):
+        return [(i, self.grade.dia[i], self.grade.periodo[i]) for i, _, _ in destinos]
+
+    def _sortear(self):
+        """Movimento aleatório que não cria violação: (movimento, [(aula, dia, periodo) de destino]) ou None"""
+        grade = self.grade
+        i = self.aleatorio.choice(grade.ativas)
+        d, p = self.aleatorio.choice(grade.slots_segmento[grade.segmento[i]])
+        if (d, p) == (grade.dia[i], grade.periodo[i]):
+            return None
+        ocupantes = grade.ocupantes.get((self.aulas[i].turma, d, p))
+        if not ocupantes:
+            if grade.variacao_mover(i, d, p)[0] > 0:
+                return None
+            return ("mover", i, d, p), [(i, d, p)]
+        j = ocupantes[0]
+        if self.aulas[j].disciplina == self.aulas[i].disciplina or grade.variacao_trocar(i, j)[0] > 0:
+            return None
+        return ("trocar", i, j), [(i, d, p), (j, grade.dia[i], grade.periodo[i])]
+
+    def _estimar_temperatura(self, amostras=200):
+        """T inicial em que uma piora média é aceita com probabilidade 1/2"""
+        pioras = []
+        for _ in range(amostras * 5):
+            sorteio = self._sortear()
+            if sorteio is None:
+                continue
+            _, destinos = sorteio
+            origens = self._origens(destinos)
+            antes = self.pontuacao()
+            self._recontar(origens, destinos)
+            delta = self.pontuacao() - antes
+            self._recontar(destinos, origens)
+            if delta > 0:
+                pioras.append(delta)
+            if len(pioras) >= amostras:
+                break
+        if not pioras:
+            return 1.0
+        return (sum(pioras) / len(pioras)) / math.log(2)
+
+    # ============================================
+    # RECOZIMENTO
+    # ============================================
+
+    def _registrar_traco(self, iteracao, inicio, temperatura, atual, melhor):
+        self.traco.append({
+            "iteracao": iteracao,
+            "tempo_ms": round((time.perf_counter() - inicio) * 1000, 1),
+            "temperatura": round(temperatura, 4),
+            "pontuacao": round(atual, 3),
+            "melhor": round(melhor, 3),
+        })
+
+    def resolver(self):
+        """Lista de Aula (cópias) na posição de menor pontuação encontrada"""
+        inicio = time.perf_counter()
+        grade = self.grade
+        temperatura = self.temperatura_inicial or self._estimar_temperatura()
+        temperatura_inicial = temperatura
+        pontuacao_inicial = atual = self.pontuacao()
+        termos_iniciais = dict(self.termos)
+        melhor = atual
+        melhor_posicao = (list(grade.dia), list(grade.periodo))
+        aceitos = pioras_aceitas = 0
+        iteracao = 0
+        motivo = "temperatura_final"
+        self.traco = []
+        self._registrar_traco(0, inicio, temperatura, atual, melhor)
+
+        while temperatura > self.temperatura_final and grade.ativas:
+            if iteracao >= self.max_iteracoes:
+                motivo = "limite_iteracoes"
+                break
+            if iteracao % 256 == 0 and time.perf_counter() - inicio > self.max_segundos:
+                motivo = "limite_tempo"
+                break
+            iteracao += 1
+            if iteracao % self.iteracoes_por_temperatura == 0:
+                temperatura *= self.resfriamento
+            if iteracao % self.intervalo_traco == 0:
+                self._registrar_traco(iteracao, inicio, temperatura, atual, melhor)
+
+            sorteio = self._sortear()
+            if sorteio is None:
+                continue
+            movimento, destinos = sorteio
+            origens = self._origens(destinos)
+            self._recontar(origens, destinos)
+            delta = self.pontuacao() - atual
+            if delta <= 0 or self.aleatorio.random() < math.exp(-delta / temperatura):
+                grade.aplicar(movimento)
+                atual += delta
+                aceitos += 1
+                pioras_aceitas += delta > 0
+                if atual < melhor - 1e-9:
+                    melhor = atual
+                    melhor_posicao = (list(grade.dia), list(grade.periodo))
+            else:
+                self._recontar(destinos, origens)
+
+        self._registrar_traco(iteracao, inicio, temperatura, atual, melhor)
+
+        # Volta para a melhor posição
+        self._recontar([(i, grade.dia[i], grade.periodo[i]) for i in grade.ativas],
+                       [(i, melhor_posicao[0][i], melhor_posicao[1][i]) for i in grade.ativas])
+        grade.posicionar(*melhor_posicao)
+
+        self.estatisticas = {
+            "pontuacao_inicial": pontuacao_inicial,
+            "pontuacao_final": self.pontuacao(),
+            "termos_iniciais": termos_iniciais,
+            "termos_finais": dict(self.termos),
+            "violacoes": grade.duro,
+            "temperatura_inicial": temperatura_inicial,
+            "temperatura_final": temperatura,
+            "iteracoes": iteracao,
+            "aceitos": aceitos,
+            "pioras_aceitas": pioras_aceitas,
+            "motivo": motivo,
+            "tempo_ms": (time.perf_counter() - inicio) * 1000,
+        }
+        return self.aulas
+
+    def traco_csv(self):
+        """Traço (iteração, tempo_ms, temperatura, pontuação, melhor) como texto CSV"""
+        saida = io.StringIO()
+        escritor = csv.DictWriter(saida, fieldnames=["iteracao", "tempo_ms", "temperatura", "pontuacao", "melhor"])
+        escritor.writeheader()
+        escritor.writerows(self.traco)
+        return saida.getvalue()
+
+    def exportar_traco(self, caminho):
+        with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+            arquivo.write(self.traco_csv())
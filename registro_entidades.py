@@ -0,0 +1,137 @@
+# registro_entidades.py - Ids inteiros densos para turmas, professores, disciplinas...
+"""
+Turmas, professores e disciplinas são identificados pelo nome em todo o
+sistema, e os validadores montavam chaves como f"{turma}|{dia}|{hora_real}"
+para cada aula. O RegistroEntidades dá a cada nome um inteiro denso
+(0, 1, 2, ...) por tipo de entidade, de modo que motores e validadores
+trabalhem com tuplas de inteiros (e possam indexar arrays) e só convertam
+de volta para nomes na interface e na exportação.
+
+    registro = RegistroEntidades.de_colecoes(turmas, professores, disciplinas)
+    t = registro.id("turma", "1emA")          # 0, 1, 2...
+    registro.nome("turma", t)                 # "1emA"
+    chave = registro.codificar_aula(aula)     # (turma, disciplina, professor, dia, horario)
+
+Nomes desconhecidos recebem o próximo id na primeira consulta, então os ids
+já atribuídos nunca mudam durante a vida do registro.
+"""
+
+# Ordem dos dias usada pela grade; o id do dia segue a semana
+DIAS_COMPLETOS = ["segunda", "terca", "quarta", "quinta", "sexta"]
+
+def _nome(item):
+    if isinstance(item, str):
+        return item
+    if isinstance(item, dict):
+        return item.get("nome")
+    return getattr(item, "nome", None)
+
+def _valor(aula, campo):
+    if isinstance(aula, dict):
+        return aula.get(campo)
+    return getattr(aula, campo, None)
+
+class TabelaIds:
+    """Nomes de um tipo de entidade <-> ids inteiros densos"""
+
+    def __init__(self, nomes=()):
+        self.nomes = []
+        self.ids = {}
+        for nome in nomes:
+            self.id(nome)
+
+    def id(self, nome):
+        """Id do nome, registrando-o se ainda não existir"""
+        id_ = self.ids.get(nome)
+        if id_ is None:
+            id_ = len(self.nomes)
+            self.ids[nome] = id_
+            self.nomes.append(nome)
+        return id_
+
+    def procurar(self, nome, padrao=-1):
+        """Id do nome sem registrar (padrao se não existir)"""
+        return self.ids.get(nome, padrao)
+
+    def nome(self, id_):
+        return self.nomes[id_]
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def __contains__(self, nome):
+        return nome in self.ids
+
+    def __iter__(self):
+        return iter(self.nomes)
+
+class RegistroEntidades:
+    """Uma TabelaIds por tipo de entidade ("turma", "professor", "disciplina", "dia", ...)"""
+
+    def __init__(self):
+        self.tabelas = {}
+        # Dias da semana primeiro, para que os ids 0-4 sigam a ordem da semana
+        self.tabelas["dia"] = TabelaIds(DIAS_COMPLETOS)
+
+    @classmethod
+    def de_colecoes(cls, turmas=(), professores=(), disciplinas=(), salas=(), aulas=()):
+        """Registro com os ids atribuídos na ordem das coleções carregadas"""
+        registro = cls()
+        for tipo, itens in (("turma", turmas), ("professor", professores),
+                            ("disciplina", disciplinas), ("sala", salas)):
+            tabela = registro.tabela(tipo)
+            for item in itens:
+                nome = _nome(item)
+                if nome is not None:
+                    tabela.id(nome)
+        for aula in aulas:
+            registro.codificar_aula(aula)
+        return registro
+
+    def tabela(self, tipo):
+        if tipo not in self.tabelas:
+            self.tabelas[tipo] = TabelaIds()
+        return self.tabelas[tipo]
+
+    def id(self, tipo, nome):
+        return self.tabela(tipo).id(nome)
+
+    def nome(self, tipo, id_):
+        return self.tabelas[tipo].nomes[id_]
+
+    @property
+    def turmas(self):
+        return self.tabela("turma")
+
+    @property
+    def professores(self):
+        return self.tabela("professor")
+
+    @property
+    def disciplinas(self):
+        return self.tabela("disciplina")
+
+    @property
+    def dias(self):
+        return self.tabela("dia")
+
+    def codificar_aula(self, aula):
+        """(turma, disciplina, professor, dia, horario) de uma aula como inteiros"""
+        return (
+            self.turmas.id(_valor(aula, "turma")),
+            self.disciplinas.id(_valor(aula, "disciplina")),
+            self.professores.id(_valor(aula, "professor")),
+            self.dias.id(_valor(aula, "dia")),
+            _valor(aula, "horario"),
+        )
+
+    def decodificar_aula(self, chave):
+        """Inverso de codificar_aula: dict com os nomes"""
+        turma, disciplina, professor, dia, horario = chave
+        return {
+            "turma": self.turmas.nomes[turma],
+            "disciplina": self.disciplinas.nomes[disciplina],
+            "professor": self.professores.nomes[professor],
+            "dia": self.dias.nomes[dia],
+            "horario": horario,
+        }
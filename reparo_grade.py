@@ -0,0 +1,263 @@
+# reparo_grade.py - Reparo das aulas que o escalonador não conseguiu colocar
+"""
+Para cada aula pendente (turma, disciplina), em ordem:
+
+    1. colocação direta em qualquer (dia, período, professor) viável
+    2. cadeia de ejeção: escolhe uma posição bloqueada por UMA aula, tira
+       essa aula, coloca a pendente e tenta recolocar a retirada do mesmo
+       jeito, até `profundidade` níveis; se a cadeia não fecha, tudo volta
+    3. cadeia de Kempe: para uma posição s1 bloqueada e outra s2, junta as
+       aulas em s1/s2 ligadas por turma ou professor (a partir das que
+       bloqueiam) e troca s1 <-> s2 em todas; se a troca é viável e libera
+       s1, a pendente entra
+
+Aulas colocadas numa cadeia não são ejetadas de novo na mesma cadeia.
+Todas as consultas são O(1) sobre índices de ocupação: EstadoGrade
+(turma/período, faixas do professor, disciplina/dia, horas), a aula da
+turma em cada (dia, período) e as aulas de cada professor em cada dia.
+
+    reparo = ReparoGrade(aulas, turmas, professores, disciplinas, limites)
+    aulas, restantes = reparo.resolver([(turma, disciplina), ...])
+    reparo.estatisticas   # direto, ejecao, kempe, restantes, tempo_ms
+"""
+
+import time
+
+from disponibilidade import DIAS, DisponibilidadeBits
+from estado_grade import MASCARA_SLOT, EstadoGrade
+from horarios import HORARIOS
+from models import Aula, segmento_da_turma
+from neuro_rules import maximo_aulas_por_dia, periodos_ideais
+
+class ReparoGrade:
+    """Cadeias de ejeção e de Kempe sobre os índices de ocupação de uma grade"""
+
+    def __init__(self, aulas, turmas, professores, disciplinas, limites=None,
+                 profundidade=3, max_ramos=8, max_cadeia=12, max_segundos=5.0):
+        self.profundidade = profundidade
+        self.max_ramos = max_ramos
+        self.max_cadeia = max_cadeia
+        self.max_segundos = max_segundos
+        self.estatisticas = {}
+
+        self.disponibilidade = DisponibilidadeBits(professores)
+        self.disciplinas = {disc.nome: disc for disc in disciplinas}
+        self.turmas = {turma.nome: turma for turma in turmas}
+        self.estado = EstadoGrade(disciplinas, limites)
+        self.colocadas = {}         # id(aula) -> aula, na ordem em que entraram
+        self.na_turma = {}          # (turma, dia, periodo) -> aula
+        self.do_professor = {}      # (professor, dia) -> [aulas]
+        self._opcoes = {}
+        for aula in aulas:
+            self._adicionar(aula)
+
+    # ============================================
+    # ÍNDICES
+    # ============================================
+
+    def _adicionar(self, aula):
+        self.colocadas[id(aula)] = aula
+        self.na_turma[(aula.turma, aula.dia, aula.horario)] = aula
+        self.do_professor.setdefault((aula.professor, aula.dia), []).append(aula)
+        self.estado.adicionar(aula)
+
+    def _retirar(self, aula):
+        del self.colocadas[id(aula)]
+        if self.na_turma.get((aula.turma, aula.dia, aula.horario)) is aula:
+            del self.na_turma[(aula.turma, aula.dia, aula.horario)]
+        do_dia = self.do_professor[(aula.professor, aula.dia)]
+        # Aula é dataclass (== compara campos): remove pela identidade
+        del do_dia[next(i for i, outra in enumerate(do_dia) if outra is aula)]
+        self.estado.remover(aula)
+
+    def _segmento(self, turma_nome):
+        turma = self.turmas.get(turma_nome)
+        return getattr(turma, 'segmento', None) or segmento_da_turma(turma_nome)
+
+    def _grupo(self, turma_nome):
+        return getattr(self.turmas.get(turma_nome), 'grupo', "A")
+
+    def opcoes(self, turma_nome, disciplina):
+        """(dia, periodo, professor) permitidos pela disponibilidade, períodos ideais primeiro"""
+        chave = (turma_nome, disciplina.nome)
+        if chave not in self._opcoes:
+            segmento = self._segmento(turma_nome)
+            ideais = periodos_ideais(disciplina.tipo, segmento)
+            periodos = sorted(HORARIOS.periodos(segmento), key=lambda p: p not in ideais)
+            self._opcoes[chave] = [
+                (dia, periodo, prof.nome)
+                for dia in DIAS for periodo in periodos
+                for prof in self.disponibilidade.candidatos(disciplina.nome, dia, periodo, self._grupo(turma_nome))
+            ]
+        return self._opcoes[chave]
+
+    def bloqueadores(self, turma_nome, disciplina, dia, periodo, professor):
+        """Aulas que impedem a posição ([] = livre), ou None se nenhuma ejeção resolve"""
+        if self.estado.atingiu_limite(professor):
+            return None
+        if self.estado.aulas_disciplina_no_dia(turma_nome, disciplina.nome, dia) >= maximo_aulas_por_dia(disciplina):
+            return None
+        bloqueios = []
+        ocupante = self.na_turma.get((turma_nome, dia, periodo))
+        if ocupante is not None:
+            bloqueios.append(ocupante)
+        mascara = MASCARA_SLOT.get((self._segmento(turma_nome), periodo), 0)
+        for outra in self.do_professor.get((professor, dia), ()):
+            if outra is not ocupante and MASCARA_SLOT.get((outra.segmento, outra.horario), 0) & mascara:
+                bloqueios.append(outra)
+        return bloqueios
+
+    def _colocar(self, turma_nome, disciplina, dia, periodo, professor):
+        aula = Aula(turma=turma_nome, disciplina=disciplina.nome, professor=professor,
+                    dia=dia, horario=periodo, segmento=self._segmento(turma_nome))
+        self._adicionar(aula)
+        return aula
+
+    # ============================================
+    # CADEIAS DE EJEÇÃO
+    # ============================================
+
+    def _inserir(self, turma_nome, disciplina, profundidade, travadas, prazo):
+        """Coloca a aula direto ou por ejeção; devolve a Aula colocada ou None (estado intacto)"""
+        ejecoes = []
+        for dia, periodo, professor in self.opcoes(turma_nome, disciplina):
+            bloqueios = self.bloqueadores(turma_nome, disciplina, dia, periodo, professor)
+            if bloqueios is None:
+                continue
+            if not bloqueios:
+                return self._colocar(turma_nome, disciplina, dia, periodo, professor)
+            if len(bloqueios) == 1 and id(bloqueios[0]) not in travadas:
+                ejecoes.append((dia, periodo, professor, bloqueios[0]))
+        if profundidade == 0:
+            return None
+
+        for dia, periodo, professor, ejetada in ejecoes[:self.max_ramos]:
+            if time.perf_counter() > prazo:
+                return None
+            disciplina_ejetada = self.disciplinas.get(ejetada.disciplina)
+            if disciplina_ejetada is None:
+                continue
+            self._retirar(ejetada)
+            if self.bloqueadores(turma_nome, disciplina, dia, periodo, professor) == []:
+                nova = self._colocar(turma_nome, disciplina, dia, periodo, professor)
+                travadas.add(id(nova))
+                if self._inserir(ejetada.turma, disciplina_ejetada, profundidade - 1, travadas, prazo):
+                    return nova
+                travadas.discard(id(nova))
+                self._retirar(nova)
+            self._adicionar(ejetada)
+        return None
+
+    # ============================================
+    # CADEIAS DE KEMPE
+    # ============================================
+
+    def _cadeia(self, inicio, s1, s2):
+        """Aulas em s1/s2 ligadas (mesma turma ou professor) às de inicio; None se passar de max_cadeia"""
+        cadeia = {id(aula): aula for aula in inicio}
+        fila = list(inicio)
+        while fila:
+            aula = fila.pop()
+            dia, periodo = s2 if (aula.dia, aula.horario) == s1 else s1
+            ligadas = [outra for outra in self.do_professor.get((aula.professor, dia), ())
+                       if outra.horario == periodo]
+            ocupante = self.na_turma.get((aula.turma, dia, periodo))
+            if ocupante is not None:
+                ligadas.append(ocupante)
+            for outra in ligadas:
+                if id(outra) not in cadeia:
+                    cadeia[id(outra)] = outra
+                    fila.append(outra)
+                    if len(cadeia) > self.max_cadeia:
+                        return None
+        return list(cadeia.values())
+
+    def _trocar(self, cadeia, s1, s2):
+        """Troca s1 <-> s2 em todas as aulas da cadeia; devolve as novas Aula ou None (estado intacto)"""
+        for aula in cadeia:
+            self._retirar(aula)
+        novas = []
+        for aula in cadeia:
+            dia, periodo = s2 if (aula.dia, aula.horario) == s1 else s1
+            disciplina = self.disciplinas.get(aula.disciplina)
+            livre = disciplina is not None and periodo in HORARIOS.periodos(self._segmento(aula.turma)) \
+                and self.disponibilidade.disponivel(aula.professor, dia, periodo) \
+                and self.bloqueadores(aula.turma, disciplina, dia, periodo, aula.professor) == []
+            if not livre:
+                for nova in novas:
+                    self._retirar(nova)
+                for original in cadeia:
+                    self._adicionar(original)
+                return None
+            novas.append(self._colocar(aula.turma, disciplina, dia, periodo, aula.professor))
+        return novas
+
+    def _kempe(self, turma_nome, disciplina, prazo):
+        """Coloca a aula liberando uma posição por troca de Kempe; devolve a Aula ou None"""
+        slots = [(dia, periodo) for dia in DIAS for periodo in HORARIOS.periodos(self._segmento(turma_nome))]
+        for dia, periodo, professor in self.opcoes(turma_nome, disciplina):
+            bloqueios = self.bloqueadores(turma_nome, disciplina, dia, periodo, professor)
+            if not bloqueios:
+                continue
+            s1 = (dia, periodo)
+            if any((aula.dia, aula.horario) != s1 for aula in bloqueios):
+                continue  # bloqueio por sobreposição REAL de outro período: a troca não o move
+            for s2 in slots:
+                if time.perf_counter() > prazo:
+                    return None
+                if s2 == s1:
+                    continue
+                cadeia = self._cadeia(bloqueios, s1, s2)
+                if cadeia is None:
+                    continue
+                novas = self._trocar(cadeia, s1, s2)
+                if novas is None:
+                    continue
+                if self.bloqueadores(turma_nome, disciplina, dia, periodo, professor) == []:
+                    return self._colocar(turma_nome, disciplina, dia, periodo, professor)
+                # Desfaz a troca
+                for nova in novas:
+                    self._retirar(nova)
+                for original in cadeia:
+                    self._adicionar(original)
+        return None
+
+    # ============================================
+    # REPARO
+    # ============================================
+
+    def resolver(self, pendentes):
+        """
+        pendentes: [(nome da turma, Disciplina)]. Devolve (aulas, restantes): a grade reparada
+        e as pendentes que continuaram sem lugar.
+        """
+        inicio = time.perf_counter()
+        prazo = inicio + self.max_segundos
+        contagem = {"direto": 0, "ejecao": 0, "kempe": 0}
+        restantes = list(pendentes)
+        passadas = 0
+        # Repete enquanto alguma pendente entrar: cada colocação muda a ocupação das outras
+        while restantes and time.perf_counter() < prazo:
+            passadas += 1
+            ainda = []
+            for turma_nome, disciplina in restantes:
+                if self._inserir(turma_nome, disciplina, 0, set(), prazo):
+                    contagem["direto"] += 1
+                elif self._inserir(turma_nome, disciplina, self.profundidade, set(), prazo):
+                    contagem["ejecao"] += 1
+                elif self._kempe(turma_nome, disciplina, prazo):
+                    contagem["kempe"] += 1
+                else:
+                    ainda.append((turma_nome, disciplina))
+            if len(ainda) == len(restantes):
+                break
+            restantes = ainda
+
+        self.estatisticas = {
+            "pendentes": len(pendentes),
+            **contagem,
+            "restantes": len(restantes),
+            "passadas": passadas,
+            "tempo_ms": (time.perf_counter() - inicio) * 1000,
+        }
+        return list(self.colocadas.values()), restantes
@@ -6,6 +6,11 @@ from ortools.sat.python import cp_model
 from collections import defaultdict
 import streamlit as st
 
+from disponibilidade import DisponibilidadeBits
+from horarios import HORARIOS
+from models import segmento_da_turma
+from registro_entidades import RegistroEntidades
+
 class GradeHorariaORTools:
     def __init__(self, turmas, professores, disciplinas, relaxar_horario_ideal=False):
         self.turmas = turmas
@@ -13,31 +18,21 @@ class GradeHorariaORTools:
         self.disciplinas = {d.nome: d for d in disciplinas}
         self.dias = ['segunda', 'terca', 'quarta', 'quinta', 'sexta']
         self.relaxar_horario_ideal = relaxar_horario_ideal
+        self.segmentos = {t.nome: t.segmento for t in turmas if getattr(t, 'segmento', None)}
+        
+        # Disponibilidade dos professores em máscaras de bits
+        self.disponibilidade = DisponibilidadeBits(professores)
+        
+        # Variáveis indexadas por ids inteiros; nomes só voltam em resolver()
+        self.registro = RegistroEntidades.de_colecoes(turmas, professores, disciplinas)
         
-        # Configurações por segmento
+        # Configurações por segmento (da tabela única de horarios.py)
         self.config_segmento = {
-            "EF_II": {
-                "total_periodos": 5,
-                "horarios_reais": {
-                    1: "07:50-08:40",
-                    2: "08:40-09:30",
-                    3: "09:50-10:40", 
-                    4: "10:40-11:30",
-                    5: "11:30-12:20"
-                }
-            },
-            "EM": {
-                "total_periodos": 7,
-                "horarios_reais": {
-                    1: "07:00-07:50",
-                    2: "07:50-08:40",
-                    3: "08:40-09:30",
-                    4: "09:50-10:40",
-                    5: "10:40-11:30",
-                    6: "11:30-12:20",
-                    7: "12:20-13:10"
-                }
+            segmento: {
+                "total_periodos": len(HORARIOS.periodos(segmento)),
+                "horarios_reais": {p: HORARIOS.rotulo(segmento, p) for p in HORARIOS.periodos(segmento)}
             }
+            for segmento in ("EF_II", "EM")
         }
         
         # Inicializar modelo
@@ -54,11 +49,9 @@ class GradeHorariaORTools:
         self._adicionar_restricoes()
     
     def _obter_segmento(self, turma_nome):
-        """Retorna segmento da turma"""
-        turma_obj = next((t for t in self.turmas if t.nome == turma_nome), None)
-        if turma_obj and hasattr(turma_obj, 'segmento'):
-            return turma_obj.segmento
-        return "EF_II" if "ef" in turma_nome.lower() or "ano" in turma_nome.lower() else "EM"
+        """Retorna segmento da turma (dicionário montado uma vez em __init__)"""
+        segmento = self.segmentos.get(turma_nome)
+        return segmento or segmento_da_turma(turma_nome)
     
     def _processar_dados(self):
         """Processa todos os dados para criar combinações possíveis"""
@@ -77,6 +70,7 @@ class GradeHorariaORTools:
             segmento = self._obter_segmento(turma_nome)
             config = self.config_segmento[segmento]
             periodos_disponiveis = list(range(1, config["total_periodos"] + 1))
+            turma_grupo = next((t.grupo for t in self.turmas if t.nome == turma_nome), 'A')
             
             # Para cada disciplina necessária
             for disc_nome in set(disciplinas):
@@ -85,33 +79,12 @@ class GradeHorariaORTools:
                 # Para cada dia e período
                 for dia in self.dias:
                     for periodo in periodos_disponiveis:
-                        # Encontrar professores disponíveis
-                        profs_disponiveis = []
-                        for prof in self.professores:
-                            # Verificar se professor ministra a disciplina
-                            if disc_nome not in prof.disciplinas:
-                                continue
-                            
-                            # Verificar disponibilidade no dia
-                            if dia not in prof.disponibilidade:
-                                continue
-                            
-                            # Verificar horários indisponíveis
-                            horario_str = f"{dia}_{periodo}"
-                            if isinstance(prof.horarios_indisponiveis, set):
-                                if horario_str in prof.horarios_indisponiveis:
-                                    continue
-                            elif isinstance(prof.horarios_indisponiveis, list):
-                                if horario_str in prof.horarios_indisponiveis:
-                                    continue
-                            
-                            # Verificar grupo
-                            prof_grupo = getattr(prof, 'grupo', 'A')
-                            turma_grupo = next((t.grupo for t in self.turmas if t.nome == turma_nome), 'A')
-                            if prof_grupo not in [turma_grupo, "AMBOS"]:
-                                continue
-                            
-                            profs_disponiveis.append(prof.nome)
+                        # Professores da disciplina, livres no slot e do grupo da turma:
+                        # um AND sobre as máscaras de disponibilidade
+                        profs_disponiveis = [
+                            prof.nome for prof in
+                            self.disponibilidade.candidatos(disc_nome, dia, periodo, turma_grupo)
+                        ]
                         
                         if profs_disponiveis:
                             chave = (turma_nome, disc_nome, dia, periodo)
@@ -120,58 +93,67 @@ class GradeHorariaORTools:
         st.info(f"📊 Criadas {len(self.atribuicoes_possiveis)} combinações possíveis")
     
     def _criar_variaveis(self):
-        """Cria variáveis de decisão"""
+        """Cria variáveis de decisão, com chave (turma, disciplina, dia, periodo, professor) em ids"""
         st.info("🎲 Criando variáveis...")
         
+        registro = self.registro
         for (turma, disc, dia, periodo), profs in self.atribuicoes_possiveis.items():
+            t = registro.turmas.id(turma)
+            d = registro.disciplinas.id(disc)
+            di = registro.dias.id(dia)
             for prof in profs:
                 var = self.model.NewBoolVar(f'aula_{turma}_{disc}_{dia}_{periodo}_{prof}')
-                self.variaveis[(turma, disc, dia, periodo, prof)] = var
+                self.variaveis[(t, d, di, periodo, registro.professores.id(prof))] = var
     
     def _adicionar_restricoes(self):
         """Adiciona restrições ao modelo"""
         st.info("🔒 Adicionando restrições...")
         
+        # Agrupar as variáveis numa única passada (em vez de varrer todas por restrição)
+        vars_por_turma_disc = defaultdict(list)
+        vars_por_prof_slot = defaultdict(lambda: defaultdict(list))
+        vars_por_turma_horario = defaultdict(list)
+        segmentos = {}
+        for (t, d, di, p, pr), var in self.variaveis.items():
+            if t not in segmentos:
+                segmentos[t] = self._obter_segmento(self.registro.turmas.nomes[t])
+            vars_por_turma_disc[(t, d)].append(var)
+            vars_por_prof_slot[(pr, di)][HORARIOS.id_slot(segmentos[t], p)].append(var)
+            vars_por_turma_horario[(t, di, p)].append(var)
+        
         # 1. Cada aula pendente deve ser alocada
         contagem_por_turma_disc = defaultdict(int)
         for turma in self.turmas:
             for disc_nome, disc in self.disciplinas.items():
                 if turma.nome in disc.turmas:
-                    contagem_por_turma_disc[(turma.nome, disc_nome)] = disc.carga_semanal
+                    chave = (self.registro.turmas.id(turma.nome), self.registro.disciplinas.id(disc_nome))
+                    contagem_por_turma_disc[chave] = disc.carga_semanal
         
         # Para cada par (turma, disciplina), garantir que tenha o número correto de aulas
-        for (turma_nome, disc_nome), total_necessario in contagem_por_turma_disc.items():
-            vars_turma_disc = []
-            for (t, d, di, p, prof), var in self.variaveis.items():
-                if t == turma_nome and d == disc_nome:
-                    vars_turma_disc.append(var)
-            
+        for chave, total_necessario in contagem_por_turma_disc.items():
+            vars_turma_disc = vars_por_turma_disc.get(chave)
             if vars_turma_disc:
                 self.model.Add(sum(vars_turma_disc) == total_necessario)
         
-        # 2. Professor não pode dar duas aulas ao mesmo tempo
-        for prof in self.professores:
-            for dia in self.dias:
-                for periodo in range(1, 8):  # 1-7 períodos
-                    vars_prof = []
-                    for (t, d, di, p, pr), var in self.variaveis.items():
-                        if pr == prof.nome and di == dia and p == periodo:
-                            vars_prof.append(var)
-                    
-                    if len(vars_prof) > 1:
-                        self.model.Add(sum(vars_prof) <= 1)
+        # 2. Professor não pode dar duas aulas ao mesmo tempo, no horário REAL:
+        # para cada início de slot, todos os slots (de qualquer segmento) em andamento
+        for por_slot in vars_por_prof_slot.values():
+            vistos = set()
+            for a in por_slot:
+                inicio = HORARIOS.slots[a].inicio
+                grupo = frozenset(b for b in por_slot
+                                  if HORARIOS.sobreposicao[a][b] and HORARIOS.slots[b].inicio <= inicio)
+                if grupo in vistos:
+                    continue
+                vistos.add(grupo)
+                vars_prof = [var for b in grupo for var in por_slot[b]]
+                if len(vars_prof) > 1:
+                    self.model.Add(sum(vars_prof) <= 1)
         
         # 3. Turma não pode ter duas aulas ao mesmo tempo
-        for turma in self.turmas:
-            for dia in self.dias:
-                for periodo in range(1, 8):  # 1-7 períodos
-                    vars_turma = []
-                    for (t, d, di, p, pr), var in self.variaveis.items():
-                        if t == turma.nome and di == dia and p == periodo:
-                            vars_turma.append(var)
-                    
-                    if len(vars_turma) > 1:
-                        self.model.Add(sum(vars_turma) <= 1)
+        for vars_turma in vars_por_turma_horario.values():
+            if len(vars_turma) > 1:
+                self.model.Add(sum(vars_turma) <= 1)
     
     def resolver(self):
         """Resolve o modelo"""
@@ -184,18 +166,10 @@ class GradeHorariaORTools:
             
             # Coletar resultados
             aulas = []
-            for (turma, disc, dia, periodo, prof), var in self.variaveis.items():
+            for (t, d, di, periodo, pr), var in self.variaveis.items():
                 if self.solver.Value(var) == 1:
-                    segmento = self._obter_segmento(turma)
-                    
-                    aula = {
-                        'turma': turma,
-                        'disciplina': disc,
-                        'professor': prof,
-                        'dia': dia,
-                        'horario': periodo,  # Número do período
-                        'segmento': segmento
-                    }
+                    aula = self.registro.decodificar_aula((t, d, pr, di, periodo))
+                    aula['segmento'] = self._obter_segmento(aula['turma'])
                     aulas.append(aula)
             
             st.success(f"📊 {len(aulas)} aulas alocadas")
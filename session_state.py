@@ -1,11 +1,16 @@
 import streamlit as st
 from models import Turma, Professor, Disciplina, Sala, DIAS_SEMANA
 import database
+from registro_entidades import RegistroEntidades
 
 def init_session_state():
     """Inicializa todos os estados da sessão"""
     database.init_db()
     
+    # Versões das coleções no carregamento (lidas antes delas): salvar recusa se outra sessão gravou depois
+    if "versoes_banco" not in st.session_state:
+        st.session_state.versoes_banco = database.versoes_colecoes()
+    
     # Carregar turmas
     if "turmas" not in st.session_state:
         turmas_carregadas = database.carregar_turmas()
@@ -71,8 +76,7 @@ def init_session_state():
     
     # Carregar grade
     if "aulas" not in st.session_state:
-        aulas_carregadas = database.carregar_grade()
-        st.session_state.aulas = aulas_carregadas if aulas_carregadas else []
+        st.session_state.aulas = database.carregar_grade(indexada=True)
     
     # Carregar feriados
     if "feriados" not in st.session_state:
@@ -82,4 +86,22 @@ def init_session_state():
     # Carregar períodos
     if "periodos" not in st.session_state:
         periodos_carregados = database.carregar_periodos()
-        st.session_state.periodos = periodos_carregados if periodos_carregados else []
\ No newline at end of file
+        st.session_state.periodos = periodos_carregados if periodos_carregados else []
+    
+    # Ids inteiros das entidades carregadas (validadores usam tuplas de inteiros como chave)
+    if "registro" not in st.session_state:
+        st.session_state.registro = RegistroEntidades.de_colecoes(
+            st.session_state.turmas,
+            st.session_state.professores,
+            st.session_state.disciplinas,
+            st.session_state.salas,
+            st.session_state.aulas,
+        )
+
+def recarregar_do_banco():
+    """Descarta as coleções da sessão e as carrega de novo do banco (ex.: após um conflito)"""
+    for chave in ["turmas", "professores", "disciplinas", "salas", "aulas",
+                  "feriados", "periodos", "registro", "versoes_banco", "conflito_banco"]:
+        if chave in st.session_state:
+            del st.session_state[chave]
+    init_session_state()
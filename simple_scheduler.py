@@ -1,88 +1,142 @@
 # simple_scheduler_final.py - ALGORITMO DEFINITIVO COM TODAS AS REGRAS
+import heapq
 import random
-from datetime import datetime, time
-from models import Aula
+import time as relogio
+import streamlit as st
+from datetime import time
+from models import Aula, segmento_da_turma
+from neuro_rules import maximo_aulas_por_dia, periodos_ideais
+from horarios import HORARIOS
+from disponibilidade import DisponibilidadeBits, contar
+from matriz_grade import ScheduleMatrix
+from estado_grade import MASCARA_SLOT, EstadoGrade
+from busca_backtracking import BuscaBacktracking
+from busca_tabu import BuscaTabu
+from recozimento import Recozimento
+from reparo_grade import ReparoGrade
+from emparelhamento import EmparelhamentoPorSlot
+from viabilidade_fluxo import analisar_viabilidade, descrever_gargalo
+
+class _SemInterface:
+    """Faz as vezes do módulo streamlit quando a geração roda sem interface (ex.: em outro processo)"""
+    
+    def __getattr__(self, nome):
+        return self._ignorar
+    
+    def _ignorar(self, *args, **kwargs):
+        return None
+    
+    def columns(self, colunas, **kwargs):
+        return [self] * (colunas if isinstance(colunas, int) else len(colunas))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        return False
 
 class SimpleGradeHorariaFinal:
     """Algoritmo definitivo com todas as regras de uma grade escolar real"""
     
-    def __init__(self, turmas, professores, disciplinas, salas):
+    # Ordem de alocação em gerar_grade:
+    #   "aleatoria"  - turma por turma, aulas embaralhadas
+    #   "restritiva" - aula com menos opções (horário, professor) primeiro, reordenando a cada alocação
+    #   "backtracking" - busca completa (busca_backtracking), completada pela ordem aleatória se estourar o orçamento
+    #   "emparelhamento" - horário com mais professores sobrando, professores por emparelhamento em cada horário REAL
+    ORDENACOES = ("aleatoria", "restritiva", "backtracking", "emparelhamento")
+    
+    # Orçamento da busca com backtracking
+    MAX_NOS_BUSCA = 200000
+    MAX_SEGUNDOS_BUSCA = 30.0
+    # Orçamento do reparo das aulas que sobraram
+    MAX_SEGUNDOS_REPARO = 5.0
+    
+    def __init__(self, turmas, professores, disciplinas, salas, silencioso=False):
         self.turmas = turmas
         self.professores = professores
         self.disciplinas = disciplinas
         self.salas = salas
         self.dias_semana = ['segunda', 'terca', 'quarta', 'quinta', 'sexta']
+        # Mensagens de progresso: streamlit, ou nada quando silencioso
+        self.st = _SemInterface() if silencioso else st
+        
+        # Segmento de cada turma, resolvido uma vez
+        self.segmentos = {t.nome: t.segmento for t in turmas if getattr(t, 'segmento', None)}
+        
+        # Disponibilidade (dias e horários indisponíveis) compilada em máscaras de bits
+        self.disponibilidade = DisponibilidadeBits(professores)
         
         # Contadores para monitoramento
         self.tentativas_falhas = 0
         self.regras_violadas = []
+        
+        # Limite semanal de cada professor, calculado uma vez (ver obter_limite_professor)
+        segmentos_disciplina = {}
+        for disc in disciplinas:
+            segmentos_disciplina.setdefault(disc.nome, set()).update(
+                self.obter_segmento_turma(turma_nome) for turma_nome in disc.turmas)
+        self._segmentos_disciplina = segmentos_disciplina
+        self.limites = {prof.nome: self._calcular_limite(prof) for prof in professores}
+        
+        # Estado incremental da lista de aulas em construção (ver _estado_para)
+        self.estado = None
+        self._aulas_do_estado = None
+        # Ocupação em tensores, montada ao fim de gerar_grade para o relatório de conflitos
+        self.matriz = None
+        # Completude, tempo e falhas da última geração
+        self.estatisticas = {}
+        # Nós, backjumps e motivo de parada da última busca com backtracking
+        self.estatisticas_busca = {}
+        # Colocações diretas / por ejeção / por Kempe do último reparo
+        self.estatisticas_reparo = {}
+        # Trocas de professor e cargas da última ordenação "emparelhamento"
+        self.estatisticas_emparelhamento = {}
+        # Fluxo máximo e gargalos da última análise de viabilidade (viabilidade_fluxo)
+        self.viabilidade = {}
+        # Custos antes/depois da última otimizar_grade (busca tabu)
+        self.estatisticas_tabu = {}
+        # Último Recozimento de otimizar_preferencias (estatísticas e traço)
+        self.recozimento = None
+    
+    def _estado_para(self, aulas_existentes):
+        """EstadoGrade que acompanha esta lista de aulas, ou None (cai na varredura da lista)"""
+        if self.estado is not None and aulas_existentes is self._aulas_do_estado:
+            return self.estado
+        return None
+    
+    def _acompanhar(self, aulas):
+        """Passa a manter um EstadoGrade em sincronia com a lista (aulas.append -> adicionar)"""
+        self.estado = EstadoGrade.de_aulas(aulas, self.disciplinas, self.limites)
+        self._aulas_do_estado = aulas
     
     # ============================================
     # REGRA 1: HORÁRIOS REAIS E CONVERSÃO
     # ============================================
     
     def obter_segmento_turma(self, turma_nome):
-        """Determina o segmento da turma baseado no nome"""
+        """Segmento da turma (campo da Turma, servido por models.SEGMENTO_POR_TURMA)"""
         if not turma_nome:
             return "EF_II"
-        
-        turma_nome_lower = turma_nome.lower()
-        
-        # Ensino Médio
-        if 'em' in turma_nome_lower:
-            return "EM"
-        
-        # Ensino Fundamental II
-        if any(x in turma_nome_lower for x in ['6', '7', '8', '9', 'ano', 'ef']):
-            return "EF_II"
-        
-        # Fallback
-        try:
-            if turma_nome_lower[0].isdigit():
-                return "EF_II"
-            else:
-                return "EM"
-        except:
-            return "EF_II"
+        return self.segmentos.get(turma_nome) or segmento_da_turma(turma_nome)
     
     def obter_horario_real_intervalos(self, segmento, periodo):
         """
         Retorna horário real como objetos time para comparação
         Retorna: (inicio_time, fim_time, intervalo_antes, intervalo_depois)
         """
-        if segmento == "EM":
-            horarios = {
-                1: ("07:00", "07:50", False, False),
-                2: ("07:50", "08:40", False, False), 
-                3: ("08:40", "09:30", False, True),   # Intervalo DEPOIS
-                4: ("09:50", "10:40", True, False),   # Intervalo ANTES
-                5: ("10:40", "11:30", False, False),
-                6: ("11:30", "12:20", False, False),
-                7: ("12:20", "13:10", False, False)
-            }
-        else:  # EF_II
-            horarios = {
-                1: ("07:50", "08:40", False, False),
-                2: ("08:40", "09:30", False, True),   # Intervalo DEPOIS
-                3: ("09:50", "10:40", True, False),   # Intervalo ANTES
-                4: ("10:40", "11:30", False, False),
-                5: ("11:30", "12:20", False, False)
-            }
-        
-        hora_str, fim_str, intervalo_antes, intervalo_depois = horarios.get(
-            periodo, ("00:00", "00:00", False, False)
-        )
-        
-        # Converter para objetos time para comparação
-        inicio_time = datetime.strptime(hora_str, "%H:%M").time()
-        fim_time = datetime.strptime(fim_str, "%H:%M").time()
-        
-        return inicio_time, fim_time, intervalo_antes, intervalo_depois
+        slot = HORARIOS.slot(segmento, periodo)
+        if slot is None:
+            return time(0, 0), time(0, 0), False, False
+        return slot.inicio_time, slot.fim_time, slot.intervalo_antes, slot.intervalo_depois
     
     def horarios_colidem(self, inicio1, fim1, inicio2, fim2):
         """Verifica se dois horários se sobrepõem"""
         return not (fim1 <= inicio2 or fim2 <= inicio1)
     
+    def periodos_colidem(self, segmento1, periodo1, segmento2, periodo2):
+        """Verifica se dois períodos se sobrepõem no horário REAL (consulta à matriz de horarios.py)"""
+        return HORARIOS.colidem(segmento1, periodo1, segmento2, periodo2)
+    
     # ============================================
     # REGRA 2: VALIDAÇÃO DE PROFESSOR
     # ============================================
@@ -92,21 +146,15 @@ class SimpleGradeHorariaFinal:
         """
         VERIFICAÇÃO CRÍTICA: Professor não pode estar em dois lugares no mesmo horário REAL
         """
-        # Obter horário REAL da nova aula
-        inicio_novo, fim_novo, _, _ = self.obter_horario_real_intervalos(
-            segmento_nova_aula, periodo_nova_aula
-        )
+        estado = self._estado_para(aulas_existentes)
+        if estado is not None:
+            return estado.professor_livre(professor_nome, dia, segmento_nova_aula, periodo_nova_aula)
         
         for aula in aulas_existentes:
             if aula.professor == professor_nome and aula.dia == dia:
-                # Obter horário REAL da aula existente
-                seg_existente = self.obter_segmento_turma(aula.turma)
-                inicio_existente, fim_existente, _, _ = self.obter_horario_real_intervalos(
-                    seg_existente, aula.horario
-                )
-                
                 # Verificar colisão de horários REAIS
-                if self.horarios_colidem(inicio_novo, fim_novo, inicio_existente, fim_existente):
+                seg_existente = aula.segmento or self.obter_segmento_turma(aula.turma)
+                if self.periodos_colidem(segmento_nova_aula, periodo_nova_aula, seg_existente, aula.horario):
                     return False  # CONFLITO DETECTADO!
         
         return True
@@ -114,30 +162,30 @@ class SimpleGradeHorariaFinal:
     def professor_atingiu_limite(self, aulas_existentes, professor_obj):
         """Verifica se professor atingiu limite de horas semanais"""
         # Contar aulas do professor
-        aulas_professor = [a for a in aulas_existentes if a.professor == professor_obj.nome]
+        estado = self._estado_para(aulas_existentes)
+        if estado is not None and professor_obj.nome in estado.limites:
+            return estado.atingiu_limite(professor_obj.nome)
+        total = sum(1 for a in aulas_existentes if a.professor == professor_obj.nome)
         
         # Determinar limite baseado no segmento
         limite = self.obter_limite_professor(professor_obj)
         
-        return len(aulas_professor) >= limite
+        return total >= limite
     
     def obter_limite_professor(self, professor):
         """Retorna limite de horas baseado no segmento principal do professor"""
-        # Analisar disciplinas do professor
-        tem_efii = False
-        tem_em = False
-        
+        limite = self.limites.get(professor.nome)
+        if limite is None:
+            limite = self.limites[professor.nome] = self._calcular_limite(professor)
+        return limite
+    
+    def _calcular_limite(self, professor):
+        # Segmentos das turmas de todas as disciplinas do professor
+        segmentos = set()
         for disc_nome in professor.disciplinas:
-            # Encontrar disciplina
-            for disc in self.disciplinas:
-                if disc.nome == disc_nome:
-                    # Verificar turmas
-                    for turma_nome in disc.turmas:
-                        segmento = self.obter_segmento_turma(turma_nome)
-                        if segmento == "EF_II":
-                            tem_efii = True
-                        elif segmento == "EM":
-                            tem_em = True
+            segmentos |= self._segmentos_disciplina.get(disc_nome, set())
+        tem_efii = "EF_II" in segmentos
+        tem_em = "EM" in segmentos
         
         # Determinar limite
         if tem_efii and not tem_em:
@@ -147,19 +195,93 @@ class SimpleGradeHorariaFinal:
         else:
             return 35  # Ambos - usar limite maior
     
+    def encontrar_professor_disponivel_real(self, disciplina_nome, grupo_turma, aulas_existentes,
+                                            dia, periodo, segmento, turma_nome):
+        """
+        Professor que ministra a disciplina e está livre no horário REAL (menos carregado primeiro)
+        """
+        candidatos = self.professores_viaveis(disciplina_nome, grupo_turma, aulas_existentes,
+                                              dia, periodo, segmento)
+        if not candidatos:
+            return None
+        
+        # Distribuir carga: professor com menos aulas primeiro
+        estado = self._estado_para(aulas_existentes)
+        if estado is not None:
+            return min(candidatos, key=lambda p: estado.horas_professor(p.nome))
+        return min(candidatos, key=lambda p: sum(1 for a in aulas_existentes if a.professor == p.nome))
+    
+    def professores_viaveis(self, disciplina_nome, grupo_turma, aulas_existentes, dia, periodo, segmento):
+        """Professores da disciplina livres no horário REAL e abaixo do limite semanal"""
+        candidatos = []
+        # Disciplina, grupo, dia e horário indisponível: um AND sobre as máscaras pré-calculadas
+        for prof in self.disponibilidade.candidatos(disciplina_nome, dia, periodo, grupo_turma):
+            if self.professor_atingiu_limite(aulas_existentes, prof):
+                continue
+            if not self.professor_disponivel_horario_real(aulas_existentes, prof.nome, dia, segmento, periodo):
+                continue
+            candidatos.append(prof)
+        return candidatos
+    
     # ============================================
     # REGRA 3: VALIDAÇÃO DE TURMA
     # ============================================
     
     def turma_tem_horario_livre(self, aulas_existentes, turma_nome, dia, periodo):
         """Verifica se turma tem horário livre"""
+        estado = self._estado_para(aulas_existentes)
+        if estado is not None:
+            return estado.turma_livre(turma_nome, dia, periodo)
+        
         for aula in aulas_existentes:
             if aula.turma == turma_nome and aula.dia == dia and aula.horario == periodo:
                 return False
         return True
     
+    def horario_esta_preenchido(self, aulas_existentes, turma_nome, dia, periodo):
+        """Verifica se a turma já tem aula no dia/período"""
+        return not self.turma_tem_horario_livre(aulas_existentes, turma_nome, dia, periodo)
+    
+    def calcular_necessidades_turma(self, turma_nome, grupo_turma):
+        """Retorna (total de aulas necessárias, {disciplina: carga semanal}) da turma"""
+        necessidades = {}
+        for disc in self.disciplinas:
+            if turma_nome in disc.turmas:
+                disc_grupo = disc.grupo if hasattr(disc, 'grupo') else "A"
+                if disc_grupo == grupo_turma:
+                    necessidades[disc.nome] = disc.carga_semanal
+        return sum(necessidades.values()), necessidades
+    
+    def validar_viabilidade_turma(self, turma_nome, grupo_turma):
+        """Verifica se a carga da turma cabe na semana e se toda disciplina tem professor"""
+        total, necessidades = self.calcular_necessidades_turma(turma_nome, grupo_turma)
+        segmento = self.obter_segmento_turma(turma_nome)
+        capacidade = len(HORARIOS.periodos(segmento)) * len(self.dias_semana)
+        
+        if total == 0:
+            return False, f"❌ Turma {turma_nome}: nenhuma disciplina do grupo {grupo_turma}"
+        if total > capacidade:
+            return False, f"❌ Turma {turma_nome}: {total} aulas para {capacidade} horários"
+        
+        sem_professor = [
+            disc_nome for disc_nome in necessidades
+            if not any(
+                disc_nome in prof.disciplinas and
+                (prof.grupo if hasattr(prof, 'grupo') else "AMBOS") in [grupo_turma, "AMBOS"]
+                for prof in self.professores
+            )
+        ]
+        if sem_professor:
+            return False, f"❌ Turma {turma_nome}: sem professor para {', '.join(sem_professor)}"
+        
+        return True, f"✅ Turma {turma_nome}: {total}/{capacidade} aulas viáveis"
+    
     def disciplina_ja_dada_hoje(self, aulas_existentes, turma_nome, dia, disciplina_nome):
-        """Evita mesma disciplina mais de 1 vez por dia (exceto carga > 3)"""
+        """Se a turma já tem o máximo de aulas da disciplina no dia (1 se pesada, 2 senão)"""
+        estado = self._estado_para(aulas_existentes)
+        if estado is not None:
+            return estado.disciplina_esgotada_no_dia(turma_nome, dia, disciplina_nome)
+        
         contador = 0
         for aula in aulas_existentes:
             if (aula.turma == turma_nome and 
@@ -167,13 +289,9 @@ class SimpleGradeHorariaFinal:
                 aula.disciplina == disciplina_nome):
                 contador += 1
         
-        # Se disciplina tem carga > 3, pode ter 2 aulas no mesmo dia
         for disc in self.disciplinas:
             if disc.nome == disciplina_nome:
-                if disc.carga_semanal > 3:
-                    return contador >= 2  # Máximo 2 por dia
-                else:
-                    return contador >= 1  # Máximo 1 por dia
+                return contador >= maximo_aulas_por_dia(disc)
         
         return contador >= 1
     
@@ -216,41 +334,34 @@ class SimpleGradeHorariaFinal:
     
     def distribuir_periodos_ideais(self, segmento, disciplina_tipo):
         """
-        Distribui disciplinas nos períodos ideais:
+        Distribui disciplinas nos períodos ideais (neuro_rules.periodos_ideais):
         - Pesadas: 1º-3º períodos (manhã)
         - Práticas: evitar 1º período
         - Leves: tarde (períodos finais)
         """
-        if segmento == "EM":
-            if disciplina_tipo == "pesada":
-                return [1, 2, 3, 4]  # Manhã
-            elif disciplina_tipo == "pratica":
-                return [4, 5, 6, 7]  # Evitar 1º período
-            elif disciplina_tipo == "leve":
-                return [5, 6, 7]  # Tarde
-            else:  # media
-                return list(range(1, 8))
-        else:  # EF_II
-            if disciplina_tipo == "pesada":
-                return [1, 2, 3]  # Manhã
-            elif disciplina_tipo == "pratica":
-                return [3, 4, 5]  # Evitar 1º período
-            elif disciplina_tipo == "leve":
-                return [4, 5]  # Tarde
-            else:  # media
-                return list(range(1, 6))
+        return periodos_ideais(disciplina_tipo, segmento)
     
     # ============================================
     # ALGORITMO PRINCIPAL COM BACKTRACKING
     # ============================================
-        def gerar_grade(self):
+    def gerar_grade(self, ordenacao="aleatoria", reparar=True, verificar_viabilidade=True):
         """
         GERAÇÃO INTELIGENTE: Aloca apenas o necessário, deixa VAGA quando não é possível
         Não força alocações impossíveis, respeita limites reais
+        
+        ordenacao: "aleatoria", "restritiva", "backtracking" ou "emparelhamento" (ver ORDENACOES)
+        reparar: tenta colocar as aulas que sobraram com cadeias de ejeção e de Kempe
+        verificar_viabilidade: fluxo máximo antes de alocar; aponta os gargalos e, se 100% é
+            impossível, não gasta o orçamento da busca com backtracking
         """
+        if ordenacao not in self.ORDENACOES:
+            self.st.error(f"❌ Ordenação desconhecida: {ordenacao}")
+            return []
+        inicio = relogio.perf_counter()
         aulas = []
+        self._acompanhar(aulas)
         
-        st.info(f"🔍 Iniciando geração inteligente para {len(self.turmas)} turmas")
+        self.st.info(f"🔍 Iniciando geração inteligente para {len(self.turmas)} turmas")
         
         # FASE 1: Validar viabilidade de cada turma
         turmas_validas = []
@@ -263,126 +374,60 @@ class SimpleGradeHorariaFinal:
             valido, mensagem = self.validar_viabilidade_turma(turma_nome, grupo_turma)
             if valido:
                 turmas_validas.append(turma)
-                st.success(mensagem)
+                self.st.success(mensagem)
             else:
                 problemas.append(mensagem)
-                st.error(mensagem)
+                self.st.error(mensagem)
         
         if problemas:
-            st.warning(f"⚠️ {len(problemas)} turmas com problemas de viabilidade")
+            self.st.warning(f"⚠️ {len(problemas)} turmas com problemas de viabilidade")
         
         if not turmas_validas:
-            st.error("❌ Nenhuma turma viável para gerar grade!")
+            self.st.error("❌ Nenhuma turma viável para gerar grade!")
             return []
         
-        # FASE 2: Para cada turma válida, alocar disciplinas
+        # FASE 1b: Fluxo máximo demanda -> (professor, horário): gargalos que os totais não mostram
+        self.viabilidade = {}
+        if verificar_viabilidade:
+            self.viabilidade = analisar_viabilidade(turmas_validas, self.professores, self.disciplinas, self.limites)
+            if not self.viabilidade["viavel"]:
+                self.st.warning(f"⚠️ No máximo {self.viabilidade['fluxo']}/{self.viabilidade['demanda']} aulas "
+                           f"cabem ({self.viabilidade['completude_maxima']:.1f}%)")
+                for gargalo in self.viabilidade["gargalos"][:5]:
+                    self.st.write(f"   Gargalo: {descrever_gargalo(gargalo)}")
+                if ordenacao == "backtracking":
+                    self.st.warning("⚠️ A busca completa não chegaria a 100%: usando mais restritas primeiro")
+                    ordenacao = "restritiva"
+        
+        # FASE 2 e 3: Alocar as aulas das turmas válidas
+        if ordenacao == "restritiva":
+            self.st.info("📅 Alocando aulas com menos opções primeiro")
+            resultado = self._alocar_mais_restritas_primeiro(turmas_validas, aulas)
+        elif ordenacao == "backtracking":
+            self.st.info("📅 Buscando grade completa com backtracking")
+            resultado = self._alocar_com_backtracking(turmas_validas, aulas)
+        elif ordenacao == "emparelhamento":
+            self.st.info("📅 Alocando horários com emparelhamento de professores")
+            resultado = self._alocar_com_emparelhamento(turmas_validas, aulas)
+        else:
+            resultado = self._alocar_em_ordem(turmas_validas, aulas)
+        
+        # FASE 3b: Reparo das aulas que sobraram, sem refazer a grade
+        self.estatisticas_reparo = {}
+        if reparar and any(nao_alocadas for _, nao_alocadas in resultado.values()):
+            resultado = self._reparar(turmas_validas, aulas, resultado)
+        
         for turma in turmas_validas:
-            turma_nome = turma.nome
-            grupo_turma = turma.grupo
-            segmento = self.obter_segmento_turma(turma_nome)
-            
-            st.info(f"📅 Alocando turma {turma_nome} ({segmento}, Grupo {grupo_turma})")
-            
-            # Obter disciplinas desta turma
-            disciplinas_turma = []
-            for disc in self.disciplinas:
-                if turma_nome in disc.turmas:
-                    disc_grupo = disc.grupo if hasattr(disc, 'grupo') else "A"
-                    if disc_grupo == grupo_turma:
-                        # Adicionar múltiplas entradas conforme carga semanal
-                        for _ in range(disc.carga_semanal):
-                            disciplinas_turma.append(disc)
-            
-            if not disciplinas_turma:
-                st.warning(f"⚠️ Turma {turma_nome} não tem disciplinas!")
+            if turma.nome not in resultado:
                 continue
-            
-            # Embaralhar disciplinas para distribuição aleatória
-            random.shuffle(disciplinas_turma)
-            
-            # FASE 3: Tentar alocar cada aula da turma
-            aulas_alocadas_turma = 0
-            aulas_nao_alocadas = []
-            
-            for disciplina in disciplinas_turma:
-                alocado = False
-                
-                # Tentar dias da semana
-                for dia in self.dias_semana:
-                    if alocado:
-                        break
-                    
-                    # Períodos disponíveis para esta turma
-                    if segmento == "EM":
-                        periodos = list(range(1, 8))
-                    else:
-                        periodos = list(range(1, 6))
-                    
-                    # Ordenar períodos: evitar períodos ruins para certas disciplinas
-                    if disciplina.tipo == "pesada":
-                        # Matérias pesadas preferencialmente de manhã
-                        periodos.sort(key=lambda p: 0 if p <= 3 else 1 if p <= 5 else 2)
-                    elif disciplina.tipo == "pratica":
-                        # Práticas não no primeiro período
-                        periodos.sort(key=lambda p: 1 if p == 1 else 0)
-                    
-                    for periodo in periodos:
-                        # Pular se horário já está ocupado
-                        if self.horario_esta_preenchido(aulas, turma_nome, dia, periodo):
-                            continue
-                        
-                        # Encontrar professor disponível REALMENTE
-                        professor = self.encontrar_professor_disponivel_real(
-                            disciplina.nome, grupo_turma, aulas, 
-                            dia, periodo, segmento, turma_nome
-                        )
-                        
-                        if professor:
-                            # Verificar se disciplina já foi dada hoje (limitar repetição)
-                            aulas_hoje = [
-                                a for a in aulas 
-                                if a.turma == turma_nome and 
-                                a.dia == dia and 
-                                a.disciplina == disciplina.nome
-                            ]
-                            
-                            # Limitar: máximo 2 aulas da mesma disciplina por dia
-                            if len(aulas_hoje) >= 2:
-                                continue
-                            
-                            # Se disciplina pesada, evitar mais de 1 por dia
-                            if disciplina.tipo == "pesada" and len(aulas_hoje) >= 1:
-                                continue
-                            
-                            # TODAS AS CONDIÇÕES ATENDIDAS! Criar aula
-                            nova_aula = Aula(
-                                turma=turma_nome,
-                                disciplina=disciplina.nome,
-                                professor=professor.nome,
-                                dia=dia,
-                                horario=periodo,
-                                segmento=segmento
-                            )
-                            aulas.append(nova_aula)
-                            aulas_alocadas_turma += 1
-                            alocado = True
-                            break
-                    
-                    if alocado:
-                        break
-                
-                # Se não conseguiu alocar, adicionar à lista de não alocadas
-                if not alocado:
-                    aulas_nao_alocadas.append(disciplina.nome)
-            
-            # Relatório da turma
-            necessarias, _ = self.calcular_necessidades_turma(turma_nome, grupo_turma)
+            aulas_alocadas_turma, aulas_nao_alocadas = resultado[turma.nome]
+            necessarias, _ = self.calcular_necessidades_turma(turma.nome, turma.grupo)
             
             if aulas_nao_alocadas:
-                st.warning(f"⚠️ Turma {turma_nome}: {aulas_alocadas_turma}/{necessarias} aulas")
-                st.write(f"   Não alocadas: {', '.join(set(aulas_nao_alocadas))}")
+                self.st.warning(f"⚠️ Turma {turma.nome}: {aulas_alocadas_turma}/{necessarias} aulas")
+                self.st.write(f"   Não alocadas: {', '.join(set(aulas_nao_alocadas))}")
             else:
-                st.success(f"✅ Turma {turma_nome}: {aulas_alocadas_turma}/{necessarias} aulas")
+                self.st.success(f"✅ Turma {turma.nome}: {aulas_alocadas_turma}/{necessarias} aulas")
         
         # FASE 4: Diagnóstico final
         total_necessario = 0
@@ -391,44 +436,43 @@ class SimpleGradeHorariaFinal:
             total_necessario += necessarias
         
         total_alocado = len(aulas)
+        self.estatisticas = {
+            "ordenacao": ordenacao,
+            "necessarias": total_necessario,
+            "alocadas": total_alocado,
+            "falhas": sum(len(nao_alocadas) for _, nao_alocadas in resultado.values()),
+            "completude": (total_alocado / total_necessario * 100) if total_necessario > 0 else 0,
+            "completude_maxima": self.viabilidade.get("completude_maxima"),
+            "tempo_ms": (relogio.perf_counter() - inicio) * 1000,
+        }
         
-        st.subheader("📊 RELATÓRIO FINAL DA GERAÇÃO")
-        col1, col2, col3 = st.columns(3)
+        self.st.subheader("📊 RELATÓRIO FINAL DA GERAÇÃO")
+        col1, col2, col3 = self.st.columns(3)
         with col1:
-            st.metric("Aulas Necessárias", total_necessario)
+            self.st.metric("Aulas Necessárias", total_necessario)
         with col2:
-            st.metric("Aulas Alocadas", total_alocado)
+            self.st.metric("Aulas Alocadas", total_alocado)
         with col3:
-            percentual = (total_alocado / total_necessario * 100) if total_necessario > 0 else 0
-            st.metric("Completude", f"{percentual:.1f}%")
+            self.st.metric("Completude", f"{self.estatisticas['completude']:.1f}%")
+        self.st.caption(f"Ordenação: {ordenacao} | {self.estatisticas['falhas']} aulas sem horário | "
+                   f"{self.estatisticas['tempo_ms']:.0f} ms")
         
         if total_alocado < total_necessario:
-            st.warning(f"⚠️ Faltam {total_necessario - total_alocado} aulas!")
-            st.write("**Possíveis causas:**")
-            st.write("1. Professores insuficientes para algumas disciplinas")
-            st.write("2. Conflitos de horário REAL não resolvíveis")
-            st.write("3. Limites de professores atingidos")
-            st.write("4. Horários indisponíveis bloqueando alocações")
-        
-        # Verificar conflitos residuais
-        conflitos = 0
-        for i, aula1 in enumerate(aulas):
-            for aula2 in aulas[i+1:]:
-                if (aula1.professor == aula2.professor and 
-                    aula1.dia == aula2.dia):
-                    seg1 = self.obter_segmento_turma(aula1.turma)
-                    seg2 = self.obter_segmento_turma(aula2.turma)
-                    
-                    inicio1, fim1, _, _ = self.obter_horario_real_intervalos(seg1, aula1.horario)
-                    inicio2, fim2, _, _ = self.obter_horario_real_intervalos(seg2, aula2.horario)
-                    
-                    if self.horarios_colidem(inicio1, fim1, inicio2, fim2):
-                        conflitos += 1
+            self.st.warning(f"⚠️ Faltam {total_necessario - total_alocado} aulas!")
+            self.st.write("**Possíveis causas:**")
+            self.st.write("1. Professores insuficientes para algumas disciplinas")
+            self.st.write("2. Conflitos de horário REAL não resolvíveis")
+            self.st.write("3. Limites de professores atingidos")
+            self.st.write("4. Horários indisponíveis bloqueando alocações")
+        
+        # Verificar conflitos residuais (pares de aulas do professor na mesma faixa de horário REAL)
+        self.matriz = ScheduleMatrix.de_aulas(aulas, self.turmas, self.professores, self.disciplinas)
+        conflitos = self.matriz.pares_conflito_professor()
         
         if conflitos > 0:
-            st.error(f"❌ ATENÇÃO: {conflitos} conflitos de horário REAL detectados!")
+            self.st.error(f"❌ ATENÇÃO: {conflitos} conflitos de horário REAL detectados!")
         else:
-            st.success("✅ Nenhum conflito de horário REAL!")
+            self.st.success("✅ Nenhum conflito de horário REAL!")
         
         return aulas
         
@@ -437,7 +481,406 @@ class SimpleGradeHorariaFinal:
     
     
     
-   ''' def gerar_grade(self):
+    # ============================================
+    # ORDENS DE ALOCAÇÃO
+    # ============================================
+    
+    def _disciplinas_da_turma(self, turma_nome, grupo_turma):
+        return [disc for disc in self.disciplinas
+                if turma_nome in disc.turmas and (disc.grupo if hasattr(disc, 'grupo') else "A") == grupo_turma]
+    
+    def _periodos_preferidos(self, segmento, disciplina):
+        """Períodos do segmento na ordem de preferência para o tipo da disciplina"""
+        periodos = list(range(1, 8)) if segmento == "EM" else list(range(1, 6))
+        if disciplina.tipo == "pesada":
+            # Matérias pesadas preferencialmente de manhã
+            periodos.sort(key=lambda p: 0 if p <= 3 else 1 if p <= 5 else 2)
+        elif disciplina.tipo == "pratica":
+            # Práticas não no primeiro período
+            periodos.sort(key=lambda p: 1 if p == 1 else 0)
+        return periodos
+    
+    def _dia_comporta(self, turma_nome, disciplina, dia):
+        """Máximo 2 aulas da mesma disciplina por dia, e 1 se for pesada"""
+        aulas_hoje = self.estado.aulas_disciplina_no_dia(turma_nome, disciplina.nome, dia)
+        return aulas_hoje < maximo_aulas_por_dia(disciplina)
+    
+    def _primeira_opcao(self, turma_nome, grupo_turma, segmento, disciplina, aulas):
+        """(dia, periodo, professor) da primeira opção viável na ordem de preferência, ou None"""
+        periodos = self._periodos_preferidos(segmento, disciplina)
+        for dia in self.dias_semana:
+            if not self._dia_comporta(turma_nome, disciplina, dia):
+                continue
+            for periodo in periodos:
+                # Pular se horário já está ocupado
+                if self.horario_esta_preenchido(aulas, turma_nome, dia, periodo):
+                    continue
+                # Encontrar professor disponível REALMENTE
+                professor = self.encontrar_professor_disponivel_real(
+                    disciplina.nome, grupo_turma, aulas, dia, periodo, segmento, turma_nome
+                )
+                if professor:
+                    return dia, periodo, professor
+        return None
+    
+    def _colocar(self, aulas, turma_nome, segmento, disciplina, dia, periodo, professor):
+        nova_aula = Aula(
+            turma=turma_nome,
+            disciplina=disciplina.nome,
+            professor=professor.nome,
+            dia=dia,
+            horario=periodo,
+            segmento=segmento
+        )
+        aulas.append(nova_aula)
+        self.estado.adicionar(nova_aula)
+        return nova_aula
+    
+    def _alocar_em_ordem(self, turmas_validas, aulas):
+        """Turma por turma, aulas embaralhadas: {turma: (alocadas, [disciplinas não alocadas])}"""
+        resultado = {}
+        for turma in turmas_validas:
+            turma_nome = turma.nome
+            grupo_turma = turma.grupo
+            segmento = self.obter_segmento_turma(turma_nome)
+            
+            self.st.info(f"📅 Alocando turma {turma_nome} ({segmento}, Grupo {grupo_turma})")
+            
+            # Múltiplas entradas conforme carga semanal
+            disciplinas_turma = [disc for disc in self._disciplinas_da_turma(turma_nome, grupo_turma)
+                                 for _ in range(disc.carga_semanal)]
+            if not disciplinas_turma:
+                self.st.warning(f"⚠️ Turma {turma_nome} não tem disciplinas!")
+                continue
+            
+            # Embaralhar disciplinas para distribuição aleatória
+            random.shuffle(disciplinas_turma)
+            
+            alocadas = 0
+            nao_alocadas = []
+            for disciplina in disciplinas_turma:
+                opcao = self._primeira_opcao(turma_nome, grupo_turma, segmento, disciplina, aulas)
+                if opcao is None:
+                    nao_alocadas.append(disciplina.nome)
+                    continue
+                self._colocar(aulas, turma_nome, segmento, disciplina, *opcao)
+                alocadas += 1
+            resultado[turma_nome] = (alocadas, nao_alocadas)
+        return resultado
+    
+    def _alocar_com_backtracking(self, turmas_validas, aulas):
+        """
+        Forward checking + backjumping sobre todas as aulas das turmas válidas. Se o
+        orçamento (MAX_NOS_BUSCA / MAX_SEGUNDOS_BUSCA) acabar, a atribuição parcial mais
+        profunda é mantida e as aulas que faltam vão pela ordem aleatória.
+        """
+        busca = BuscaBacktracking(turmas_validas, self.professores, self.disciplinas, self.limites,
+                                  max_nos=self.MAX_NOS_BUSCA, max_segundos=self.MAX_SEGUNDOS_BUSCA)
+        for aula in busca.resolver():
+            aulas.append(aula)
+            self.estado.adicionar(aula)
+        self.estatisticas_busca = busca.estatisticas
+        if busca.estatisticas["completo"]:
+            self.st.success(f"✅ Busca completa: {busca.estatisticas['nos']} nós, "
+                       f"{busca.estatisticas['backjumps']} backjumps")
+        else:
+            self.st.warning(f"⚠️ Busca parou ({busca.estatisticas['motivo']}) com "
+                       f"{busca.estatisticas['atribuidas']}/{busca.estatisticas['variaveis']} aulas; "
+                       f"completando pela ordem aleatória")
+        
+        colocadas = {}
+        for aula in aulas:
+            chave = (aula.turma, aula.disciplina)
+            colocadas[chave] = colocadas.get(chave, 0) + 1
+        resultado = {}
+        for turma in turmas_validas:
+            segmento = self.obter_segmento_turma(turma.nome)
+            faltam = [disc for disc in self._disciplinas_da_turma(turma.nome, turma.grupo)
+                      for _ in range(disc.carga_semanal - colocadas.get((turma.nome, disc.nome), 0))]
+            random.shuffle(faltam)
+            alocadas = sum(colocadas.get((turma.nome, disc.nome), 0)
+                           for disc in self._disciplinas_da_turma(turma.nome, turma.grupo))
+            nao_alocadas = []
+            for disciplina in faltam:
+                opcao = self._primeira_opcao(turma.nome, turma.grupo, segmento, disciplina, aulas)
+                if opcao is None:
+                    nao_alocadas.append(disciplina.nome)
+                    continue
+                self._colocar(aulas, turma.nome, segmento, disciplina, *opcao)
+                alocadas += 1
+            resultado[turma.nome] = (alocadas, nao_alocadas)
+        return resultado
+    
+    def _reparar(self, turmas_validas, aulas, resultado):
+        """
+        Cadeias de ejeção e de Kempe (ReparoGrade) para as aulas não alocadas. Atualiza a
+        lista de aulas no lugar e devolve o resultado por turma recontado.
+        """
+        pendentes = []
+        for turma in turmas_validas:
+            if turma.nome not in resultado:
+                continue
+            disciplinas_turma = {disc.nome: disc for disc in self._disciplinas_da_turma(turma.nome, turma.grupo)}
+            pendentes.extend((turma.nome, disciplinas_turma[nome]) for nome in resultado[turma.nome][1])
+        
+        reparo = ReparoGrade(aulas, self.turmas, self.professores, self.disciplinas, self.limites,
+                             max_segundos=self.MAX_SEGUNDOS_REPARO)
+        novas, restantes = reparo.resolver(pendentes)
+        self.estatisticas_reparo = reparo.estatisticas
+        if len(restantes) == len(pendentes):
+            return resultado
+        
+        aulas[:] = novas
+        self._acompanhar(aulas)
+        colocadas = len(pendentes) - len(restantes)
+        self.st.info(f"🔧 Reparo colocou {colocadas}/{len(pendentes)} aulas "
+                f"({reparo.estatisticas['direto']} diretas, {reparo.estatisticas['ejecao']} por ejeção, "
+                f"{reparo.estatisticas['kempe']} por Kempe)")
+        
+        por_turma = {}
+        for aula in aulas:
+            por_turma[aula.turma] = por_turma.get(aula.turma, 0) + 1
+        faltando = {}
+        for turma_nome, disciplina in restantes:
+            faltando.setdefault(turma_nome, []).append(disciplina.nome)
+        return {turma_nome: (por_turma.get(turma_nome, 0), faltando.get(turma_nome, []))
+                for turma_nome in resultado}
+    
+    def _alocar_com_emparelhamento(self, turmas_validas, aulas):
+        """
+        Turma por turma, aulas embaralhadas, como em _alocar_em_ordem, mas cada aula tenta
+        primeiro os (dia, período) com mais candidatos ainda livres e abaixo do limite
+        (folga do emparelhamento), na ordem de preferência em caso de empate. A aula entra
+        se o emparelhamento daquele horário REAL acomoda um professor para ela, mesmo trocando
+        os professores de aulas já colocadas (no horário ou, se um professor atingiu o
+        limite, em outros). Com todos os horários fixos, a carga dos professores é equilibrada
+        por cancelamento de ciclos (custo mínimo).
+        
+        Continua guloso nos horários: ganha cerca de 1 ponto de completude sobre a ordem
+        aleatória (benchmark.py emparelhamento) e não chega ao limite da análise de fluxo.
+        """
+        emparelhamento = EmparelhamentoPorSlot(self.limites, self.disponibilidade.indice)
+        posicoes = []       # (turma, segmento, disciplina, dia, periodo) de cada aula incluída
+        ocupados = set()    # (turma, dia, periodo)
+        por_dia = {}        # (turma, disciplina, dia) -> aulas
+        
+        def incluir(turma, segmento, disciplina):
+            maximo = maximo_aulas_por_dia(disciplina)
+            opcoes = []
+            for dia in self.dias_semana:
+                if por_dia.get((turma.nome, disciplina.nome, dia), 0) >= maximo:
+                    continue
+                for periodo in self._periodos_preferidos(segmento, disciplina):
+                    if (turma.nome, dia, periodo) in ocupados:
+                        continue
+                    mascara = self.disponibilidade.mascara_candidatos(disciplina.nome, dia, periodo, turma.grupo)
+                    if mascara:
+                        slot = (dia, MASCARA_SLOT[(segmento, periodo)])
+                        opcoes.append((-emparelhamento.folga(slot, mascara), len(opcoes), dia, periodo, slot, mascara))
+            # Horários com mais professores sobrando primeiro (empate na ordem de preferência)
+            for _, _, dia, periodo, slot, mascara in sorted(opcoes):
+                candidatos = [prof.nome for prof in self.disponibilidade.professores_da_mascara(mascara)]
+                if emparelhamento.incluir(len(posicoes), slot, candidatos):
+                    posicoes.append((turma.nome, segmento, disciplina, dia, periodo))
+                    ocupados.add((turma.nome, dia, periodo))
+                    por_dia[(turma.nome, disciplina.nome, dia)] = por_dia.get(
+                        (turma.nome, disciplina.nome, dia), 0) + 1
+                    return True
+            return False
+        
+        resultado = {}
+        for turma in turmas_validas:
+            segmento = self.obter_segmento_turma(turma.nome)
+            disciplinas_turma = [disc for disc in self._disciplinas_da_turma(turma.nome, turma.grupo)
+                                 for _ in range(disc.carga_semanal)]
+            if not disciplinas_turma:
+                self.st.warning(f"⚠️ Turma {turma.nome} não tem disciplinas!")
+                continue
+            random.shuffle(disciplinas_turma)
+            nao_alocadas = [disc.nome for disc in disciplinas_turma if not incluir(turma, segmento, disc)]
+            resultado[turma.nome] = (len(disciplinas_turma) - len(nao_alocadas), nao_alocadas)
+        
+        inicio = relogio.perf_counter()
+        custo_inicial = emparelhamento.custo()
+        emparelhamento.equilibrar()
+        por_nome = {prof.nome: prof for prof in self.professores}
+        for i, (turma_nome, segmento, disciplina, dia, periodo) in enumerate(posicoes):
+            self._colocar(aulas, turma_nome, segmento, disciplina, dia, periodo,
+                          por_nome[emparelhamento.professor[i]])
+        
+        cargas = [len(aulas_prof) for aulas_prof in emparelhamento.aulas_de.values() if aulas_prof]
+        self.estatisticas_emparelhamento = {
+            "trocas": emparelhamento.trocas,
+            "cancelamentos": emparelhamento.cancelamentos,
+            "custo_inicial": custo_inicial,
+            "custo_final": emparelhamento.custo(),
+            "carga_maxima": max(cargas, default=0),
+            "carga_minima": min(cargas, default=0),
+            "tempo_equilibrio_ms": (relogio.perf_counter() - inicio) * 1000,
+        }
+        self.st.info(f"👥 Emparelhamento: {emparelhamento.trocas} trocas de professor ao alocar, "
+                f"{emparelhamento.cancelamentos} no equilíbrio de carga "
+                f"(cargas de {min(cargas, default=0)} a {max(cargas, default=0)} aulas)")
+        return resultado
+    
+    def _alocar_mais_restritas_primeiro(self, turmas_validas, aulas):
+        """
+        Ordem DSatur: a cada passo aloca a aula (turma, disciplina) com menor folga, isto é,
+        quantas aulas ainda caberiam (respeitando o máximo por dia) menos quantas faltam;
+        desempata por menos opções (horário, professor) viáveis e por mais aulas restantes.
+        Depois de cada alocação só o dia escolhido é recontado para as aulas da mesma
+        turma; nas aulas das disciplinas do professor basta descontar as opções em que ele
+        aparecia nos períodos sobrepostos (recontando o dia se um horário ficou sem
+        professor, ou a semana toda se ele atingiu o limite).
+        """
+        indice = self.disponibilidade.indice
+        # Professores ocupados em cada (segmento, dia, período), já propagando a sobreposição REAL
+        ocupados = {}
+        # Professores que atingiram o limite semanal
+        esgotados = 0
+        
+        pendentes = {}      # (turma, disciplina) -> [turma, segmento, disciplina, aulas restantes]
+        por_turma = {}
+        por_disciplina = {}
+        resultado = {}
+        for turma in turmas_validas:
+            segmento = self.obter_segmento_turma(turma.nome)
+            resultado[turma.nome] = (0, [])
+            for disc in self._disciplinas_da_turma(turma.nome, turma.grupo):
+                chave = (turma.nome, disc.nome)
+                pendentes[chave] = [turma, segmento, disc, disc.carga_semanal]
+                por_turma.setdefault(turma.nome, []).append(chave)
+                por_disciplina.setdefault(disc.nome, []).append(chave)
+        ordem = {chave: i for i, chave in enumerate(pendentes)}
+        
+        # Professores candidatos de cada aula em cada (dia, período), sem a ocupação: não mudam
+        candidatos = {}
+        for (turma_nome, disc_nome), (turma, segmento, _, _) in pendentes.items():
+            chave_candidatos = (disc_nome, turma.grupo, segmento)
+            if chave_candidatos not in candidatos:
+                candidatos[chave_candidatos] = {
+                    dia: {periodo: mascara for periodo in HORARIOS.periodos(segmento)
+                          for mascara in [self.disponibilidade.mascara_candidatos(disc_nome, dia, periodo, turma.grupo)]
+                          if mascara}
+                    for dia in self.dias_semana
+                }
+        
+        def contar_dia(chave, dia):
+            """(opções (horário, professor), aulas que ainda cabem no dia)"""
+            turma, segmento, disciplina, _ = pendentes[chave]
+            maximo = maximo_aulas_por_dia(disciplina) - \
+                self.estado.aulas_disciplina_no_dia(turma.nome, disciplina.nome, dia)
+            if maximo <= 0:
+                return 0, 0
+            opcoes = horarios_viaveis = 0
+            for periodo, mascara in candidatos[(disciplina.nome, turma.grupo, segmento)][dia].items():
+                if not self.estado.turma_livre(turma.nome, dia, periodo):
+                    continue
+                livres = mascara & ~esgotados & ~ocupados.get((segmento, dia, periodo), 0)
+                if livres:
+                    opcoes += contar(livres)
+                    horarios_viaveis += 1
+            return opcoes, min(maximo, horarios_viaveis)
+        
+        por_dia = {chave: {dia: contar_dia(chave, dia) for dia in self.dias_semana} for chave in pendentes}
+        # Somas da semana: [opções, aulas que ainda cabem]
+        totais = {chave: [sum(o for o, _ in dias.values()), sum(c for _, c in dias.values())]
+                  for chave, dias in por_dia.items()}
+        versao = dict.fromkeys(pendentes, 0)
+        fila = []
+        
+        def atualizar_dia(chave, dia, contagem):
+            opcoes_antes, cabem_antes = por_dia[chave][dia]
+            por_dia[chave][dia] = contagem
+            totais[chave][0] += contagem[0] - opcoes_antes
+            totais[chave][1] += contagem[1] - cabem_antes
+        
+        def enfileirar(chave):
+            opcoes, cabem = totais[chave]
+            restantes = pendentes[chave][3]
+            heapq.heappush(fila, (cabem - restantes, opcoes, -restantes, ordem[chave], versao[chave], chave))
+        
+        for chave in pendentes:
+            enfileirar(chave)
+        
+        while fila:
+            *_, versao_fila, chave = heapq.heappop(fila)
+            if chave not in pendentes or versao_fila != versao[chave]:
+                continue  # entrada antiga: a aula foi recontada depois
+            turma, segmento, disciplina, restantes = pendentes[chave]
+            alocadas, nao_alocadas = resultado[turma.nome]
+            
+            opcao = self._primeira_opcao(turma.nome, turma.grupo, segmento, disciplina, aulas)
+            if opcao is None:
+                # Nenhuma opção agora significa nenhuma depois: as restrições só apertam
+                nao_alocadas.extend([disciplina.nome] * restantes)
+                del pendentes[chave]
+                continue
+            
+            dia, periodo, professor = opcao
+            self._colocar(aulas, turma.nome, segmento, disciplina, dia, periodo, professor)
+            resultado[turma.nome] = (alocadas + 1, nao_alocadas)
+            pendentes[chave][3] = restantes - 1
+            
+            # Períodos de cada segmento que se sobrepõem ao escolhido, e quem já os ocupava
+            bit = 1 << indice[professor.nome]
+            sobrepostos = {}
+            ocupados_antes = {}
+            for slot in HORARIOS.sobrepostos(HORARIOS.id_slot(segmento, periodo)):
+                vizinho = HORARIOS.slots[slot]
+                sobrepostos.setdefault(vizinho.segmento, []).append(vizinho.periodo)
+                chave_slot = (vizinho.segmento, dia, vizinho.periodo)
+                ocupados_antes[chave_slot] = ocupados.get(chave_slot, 0)
+                ocupados[chave_slot] = ocupados_antes[chave_slot] | bit
+            recontar_semana = not esgotados & bit and self.estado.atingiu_limite(professor.nome)
+            if recontar_semana:
+                esgotados |= bit
+            
+            mesma_turma = por_turma[turma.nome]
+            afetadas = set(mesma_turma)
+            for disc_nome in professor.disciplinas:
+                afetadas.update(por_disciplina.get(disc_nome, ()))
+            for vizinha in afetadas:
+                if vizinha not in pendentes:
+                    continue
+                if pendentes[vizinha][3] == 0:
+                    del pendentes[vizinha]
+                    continue
+                if recontar_semana:
+                    for d in self.dias_semana:
+                        atualizar_dia(vizinha, d, contar_dia(vizinha, d))
+                elif vizinha[0] == turma.nome:
+                    atualizar_dia(vizinha, dia, contar_dia(vizinha, dia))
+                else:
+                    turma_v, segmento_v, disciplina_v, _ = pendentes[vizinha]
+                    opcoes_dia, cabem = por_dia[vizinha][dia]
+                    if not cabem:
+                        continue
+                    mascaras = candidatos[(disciplina_v.nome, turma_v.grupo, segmento_v)][dia]
+                    descontar = 0
+                    recontar = False
+                    for periodo_v in sobrepostos.get(segmento_v, ()):
+                        mascara = mascaras.get(periodo_v, 0)
+                        chave_slot = (segmento_v, dia, periodo_v)
+                        if not mascara & bit or ocupados_antes[chave_slot] & bit:
+                            continue
+                        if not self.estado.turma_livre(turma_v.nome, dia, periodo_v):
+                            continue
+                        descontar += 1
+                        if not mascara & ~esgotados & ~ocupados[chave_slot]:
+                            recontar = True
+                    if recontar:
+                        atualizar_dia(vizinha, dia, contar_dia(vizinha, dia))
+                    elif descontar:
+                        atualizar_dia(vizinha, dia, (opcoes_dia - descontar, cabem))
+                    else:
+                        continue
+                versao[vizinha] += 1
+                enfileirar(vizinha)
+        
+        return resultado
+    
+    ''' def gerar_grade(self):
         """
         Gera grade completa respeitando TODAS as regras
         Usa backtracking quando encontra conflitos
@@ -628,80 +1071,28 @@ class SimpleGradeHorariaFinal:
     # FASE 3: OTIMIZAÇÃO
     # ============================================
     
-    def otimizar_grade(self, aulas):
-        """Otimiza a grade final, removendo conflitos residuais"""
-        aulas_otimizadas = aulas.copy()
-        melhorias = 0
-        
-        # Verificar e corrigir conflitos de professor
-        for i, aula in enumerate(aulas_otimizadas):
-            for j, outra_aula in enumerate(aulas_otimizadas):
-                if i >= j:
-                    continue
-                
-                # Se mesmo professor e mesmo dia
-                if (aula.professor == outra_aula.professor and 
-                    aula.dia == outra_aula.dia):
-                    
-                    # Obter horários REAIS
-                    seg1 = self.obter_segmento_turma(aula.turma)
-                    inicio1, fim1, _, _ = self.obter_horario_real_intervalos(seg1, aula.horario)
-                    
-                    seg2 = self.obter_segmento_turma(outra_aula.turma)
-                    inicio2, fim2, _, _ = self.obter_horario_real_intervalos(seg2, outra_aula.horario)
-                    
-                    # Se há conflito REAL
-                    if self.horarios_colidem(inicio1, fim1, inicio2, fim2):
-                        # Tentar mover uma das aulas
-                        if self.tentar_mover_aula(aulas_otimizadas, i):
-                            melhorias += 1
-                            break
+    def otimizar_grade(self, aulas, max_segundos=5.0):
+        """
+        Melhora a grade pronta com busca tabu (busca_tabu.BuscaTabu): corrige conflitos
+        residuais e depois reduz janelas e aulas fora do horário ideal. Devolve cópias.
+        """
+        busca = BuscaTabu(aulas, self.professores, self.disciplinas, max_segundos=max_segundos)
+        aulas_otimizadas = busca.resolver()
+        self.estatisticas_tabu = busca.estatisticas
         
+        melhorias = busca.estatisticas["violacoes_inicial"] - busca.estatisticas["violacoes_final"]
         if melhorias > 0:
             print(f"✅ {melhorias} conflitos corrigidos na otimização")
         
         return aulas_otimizadas
     
-    def tentar_mover_aula(self, aulas, indice_aula):
-        """Tenta mover uma aula para resolver conflito"""
-        aula = aulas[indice_aula]
-        turma_nome = aula.turma
-        segmento = self.obter_segmento_turma(turma_nome)
-        
-        # Períodos disponíveis
-        if segmento == "EM":
-            periodos = list(range(1, 8))
-        else:
-            periodos = list(range(1, 6))
-        
-        # Tentar outros períodos no mesmo dia
-        for novo_periodo in periodos:
-            if novo_periodo == aula.horario:
-                continue
-            
-            # Verificar se período está livre
-            periodo_livre = True
-            for a in aulas:
-                if (a.turma == turma_nome and 
-                    a.dia == aula.dia and 
-                    a.horario == novo_periodo):
-                    periodo_livre = False
-                    break
-            
-            if periodo_livre:
-                # Verificar professor disponível
-                if self.professor_disponivel_horario_real(
-                    [a for j, a in enumerate(aulas) if j != indice_aula],
-                    aula.professor,
-                    aula.dia,
-                    segmento,
-                    novo_periodo
-                ):
-                    # Mover aula
-                    aulas[indice_aula].horario = novo_periodo
-                    return True
-        
-        return False
+    def otimizar_preferencias(self, aulas, **opcoes):
+        """
+        Recozimento simulado das preferências pedagógicas (recozimento.Recozimento) sobre uma
+        grade sem violações; opcoes vão para o Recozimento (pesos, resfriamento, max_segundos...).
+        """
+        self.recozimento = Recozimento(aulas, self.professores, self.disciplinas, **opcoes)
+        return self.recozimento.resolver()
     
     # ============================================
     # MÉTODO COMPATÍVEL (para substituição direta)
@@ -0,0 +1,145 @@
+# snapshot_binario.py - Formato binário compacto para o snapshot do banco
+"""
+Alternativa ao JSON com indent=2 de escola_database.json.
+
+As aulas são gravadas em colunas: cada campo de texto (turma, professor,
+disciplina, dia, cores...) vira uma tabela de strings únicas mais um vetor
+de índices inteiros, e horario/periodo viram vetores de inteiros. Na leitura,
+todas as aulas apontam para as mesmas strings (internadas), em vez de uma
+cópia de "#4A90E2" por aula.
+
+O conteúdo é serializado com msgpack, se estiver instalado, ou com pickle
+(protocolo 5). O cabeçalho MAGICO identifica o formato, e database.py
+detecta automaticamente se o arquivo é JSON ou binário.
+"""
+
+import pickle
+import sys
+from array import array
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MAGICO = b"GRDB\x01"
+
+CODEC_MSGPACK = b"M"
+CODEC_PICKLE = b"P"
+
+CAMPOS_TEXTO_AULA = ["turma", "disciplina", "professor", "dia", "segmento",
+                     "sala", "grupo", "cor_fundo", "cor_fonte"]
+CAMPOS_INTEIROS_AULA = ["horario", "periodo"]
+
+# Campos de nomes usados como chave em todo o sistema
+CAMPOS_NOMES = ("nome", "turma", "disciplina", "professor")
+
+def eh_binario(conteudo):
+    """Indica se o conteúdo (bytes) começa com o cabeçalho do formato binário"""
+    return conteudo[:len(MAGICO)] == MAGICO
+
+def _tipo_vetor(tamanho_tabela):
+    return "B" if tamanho_tabela <= 0xFF else "H" if tamanho_tabela <= 0xFFFF else "I"
+
+def _codificar_aulas(aulas):
+    """Lista de dicts -> colunas com tabelas de strings e vetores de índices"""
+    colunas = {}
+    for campo in CAMPOS_TEXTO_AULA:
+        tabela = []
+        posicoes = {}
+        indices = []
+        for aula in aulas:
+            valor = aula.get(campo)
+            if valor not in posicoes:
+                posicoes[valor] = len(tabela)
+                tabela.append(valor)
+            indices.append(posicoes[valor])
+        colunas[campo] = {
+            "tabela": tabela,
+            "tipo": _tipo_vetor(len(tabela)),
+            "indices": array(_tipo_vetor(len(tabela)), indices).tobytes(),
+        }
+    for campo in CAMPOS_INTEIROS_AULA:
+        valores = [aula.get(campo) for aula in aulas]
+        # 0 representa "não informado" (períodos começam em 1)
+        colunas[campo] = array("H", [v or 0 for v in valores]).tobytes()
+    return {"quantidade": len(aulas), "colunas": colunas}
+
+def _decodificar_aulas(bloco):
+    quantidade = bloco["quantidade"]
+    colunas = bloco["colunas"]
+    valores = {}
+    for campo in CAMPOS_TEXTO_AULA:
+        coluna = colunas[campo]
+        tabela = [sys.intern(v) if isinstance(v, str) else v for v in coluna["tabela"]]
+        indices = array(coluna["tipo"])
+        indices.frombytes(coluna["indices"])
+        valores[campo] = [tabela[i] for i in indices]
+    for campo in CAMPOS_INTEIROS_AULA:
+        inteiros = array("H")
+        inteiros.frombytes(colunas[campo])
+        valores[campo] = [v or None for v in inteiros]
+
+    # Campos ausentes (None) ficam de fora para que Aula use seus valores padrão
+    campos = CAMPOS_TEXTO_AULA + CAMPOS_INTEIROS_AULA
+    return [
+        {campo: valor for campo in campos if (valor := valores[campo][i]) is not None}
+        for i in range(quantidade)
+    ]
+
+def _internar_nomes(itens):
+    """Interna os nomes das entidades para compartilhar as strings com as aulas"""
+    for item in itens:
+        if isinstance(item, dict):
+            for campo in CAMPOS_NOMES:
+                if isinstance(item.get(campo), str):
+                    item[campo] = sys.intern(item[campo])
+    return itens
+
+def codificar(dados, codec=None):
+    """Serializa o dicionário do banco no formato binário compacto"""
+    if codec is None:
+        codec = CODEC_MSGPACK if msgpack is not None else CODEC_PICKLE
+
+    conteudo = {}
+    for nome, itens in dados.items():
+        if nome == "aulas":
+            conteudo[nome] = _codificar_aulas(itens)
+        elif nome in ("professores",):
+            # Sets de disponibilidade não existem em msgpack/JSON
+            conteudo[nome] = [
+                dict(p, disponibilidade=sorted(p["disponibilidade"]))
+                if isinstance(p, dict) and isinstance(p.get("disponibilidade"), (set, frozenset)) else p
+                for p in itens
+            ]
+        else:
+            conteudo[nome] = itens
+
+    if codec == CODEC_MSGPACK:
+        corpo = msgpack.packb(conteudo, use_bin_type=True)
+    else:
+        corpo = pickle.dumps(conteudo, protocol=5)
+    return MAGICO + codec + corpo
+
+def decodificar(conteudo):
+    """Lê um snapshot binário e devolve o mesmo dicionário que o JSON teria"""
+    if not eh_binario(conteudo):
+        raise ValueError("Conteúdo não está no formato binário do banco")
+
+    codec = conteudo[len(MAGICO):len(MAGICO) + 1]
+    corpo = conteudo[len(MAGICO) + 1:]
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("Snapshot gravado com msgpack, mas o pacote msgpack não está instalado")
+        dados = msgpack.unpackb(corpo, raw=False)
+    elif codec == CODEC_PICKLE:
+        dados = pickle.loads(corpo)
+    else:
+        raise ValueError(f"Codec desconhecido no snapshot: {codec!r}")
+
+    for nome, itens in dados.items():
+        if nome == "aulas" and isinstance(itens, dict):
+            dados[nome] = _decodificar_aulas(itens)
+        elif isinstance(itens, list):
+            _internar_nomes(itens)
+    return dados
@@ -0,0 +1,135 @@
+# test_database.py - Testes de regressão do banco (python -m pytest test_database.py)
+
+import database
+from models import Aula
+
+def _aulas_iniciais():
+    return [
+        Aula(turma="6anoA", disciplina="Arte A", professor="Vanessa", dia=dia, horario=horario, segmento="EF_II")
+        for dia in ("segunda", "terca") for horario in (1, 2, 3, 4)
+    ]
+
+def _posicoes(aulas):
+    return sorted((aula.dia, aula.horario) for aula in aulas)
+
+def test_migracao_sqlite_reaplica_diario(tmp_path, monkeypatch):
+    """Aula movida que só está no diário precisa chegar ao SQLite na migração"""
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "escola_database.json"))
+    monkeypatch.setattr(database, "SQLITE_FILE", str(tmp_path / "escola_database.sqlite"))
+    monkeypatch.setattr(database, "BACKEND", "json")
+
+    database.init_db()
+    assert database.salvar_grade(_aulas_iniciais())
+    aulas = database.carregar_grade()
+    aulas[0].horario = 5
+    assert database.salvar_grade(aulas)
+    assert database.obter_repositorio().diario.existe()
+    esperado = _posicoes(database.carregar_grade())
+
+    monkeypatch.setattr(database, "BACKEND", "sqlite")
+    database.init_db()
+
+    assert _posicoes(database.carregar_grade()) == esperado
+    assert ("segunda", 5) in esperado
+    assert not set(database.carregar_tudo()) & {database.CHAVE_SEQUENCIA, database.CHAVE_VERSOES}
+
+def test_colecao_nao_compartilha_listas_com_o_cache(tmp_path, monkeypatch):
+    """Alterar as listas dos objetos carregados (ou salvos) não pode mudar o que o cache devolve"""
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "escola_database.json"))
+    monkeypatch.setattr(database, "BACKEND", "json")
+
+    database.init_db()
+    professores = database.carregar_professores()
+    originais = list(professores[0].disciplinas)
+    professores[0].disciplinas.append("Robótica")
+    professores[0].horarios_indisponiveis.append("seg_1")
+    assert database.carregar_professores()[0].disciplinas == originais
+    assert database.carregar_professores()[0].horarios_indisponiveis == []
+    database.carregar_tudo()["professores"][0]["disciplinas"].append("Robótica")
+    assert database.carregar_professores()[0].disciplinas == originais
+
+    assert database.salvar_professores(professores)
+    professores[0].disciplinas.append("Xadrez")
+    assert database.carregar_professores()[0].disciplinas == originais + ["Robótica"]
+
+def test_migrar_de_json_le_snapshot_binario_e_diario(tmp_path, monkeypatch):
+    """A migração pela linha de comando aceita o snapshot binário e não copia as chaves de controle"""
+    from banco_sqlite import BancoSQLite
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "escola_database.json"))
+    monkeypatch.setattr(database, "BACKEND", "json")
+    monkeypatch.setattr(database, "FORMATO_SNAPSHOT", "binario")
+
+    database.init_db()
+    assert database.salvar_grade(_aulas_iniciais())
+    aulas = database.carregar_grade()
+    aulas[0].horario = 5
+    assert database.salvar_grade(aulas)
+    esperado = _posicoes(database.carregar_grade())
+
+    banco = BancoSQLite(str(tmp_path / "migrado.sqlite"))
+    assert banco.esta_vazio()
+    banco.migrar_de_json(database.DB_FILE)
+
+    assert not banco.esta_vazio()
+    assert sorted((a["dia"], a["horario"]) for a in banco.carregar_colecao("aulas")) == esperado
+    assert not [chave for chave in banco.carregar_tudo() if chave.startswith("_")]
+
+def test_sqlite_com_professores_e_sem_turmas_nao_esta_vazio(tmp_path, monkeypatch):
+    """init_db não pode migrar de novo nem gravar os dados padrão sobre um banco em uso"""
+    monkeypatch.setattr(database, "SQLITE_FILE", str(tmp_path / "escola_database.sqlite"))
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "inexistente.json"))
+    monkeypatch.setattr(database, "BACKEND", "sqlite")
+
+    database.init_db()
+    assert database.salvar_turmas([])
+    professores = database.carregar_professores()[:1]
+    assert database.salvar_professores(professores)
+
+    database.init_db()
+    assert database.carregar_turmas() == []
+    assert [p.nome for p in database.carregar_professores()] == [professores[0].nome]
+
+def test_diario_com_linha_cortada_nao_perde_gravacoes_seguintes(tmp_path, monkeypatch):
+    """Uma gravação interrompida no fim do diário não pode esconder os lotes anexados depois dela"""
+    monkeypatch.setattr(database, "DB_FILE", str(tmp_path / "escola_database.json"))
+    monkeypatch.setattr(database, "BACKEND", "json")
+
+    database.init_db()
+    assert database.salvar_grade(_aulas_iniciais())
+    aulas = database.carregar_grade()
+    aulas[0].horario = 5
+    assert database.salvar_grade(aulas)
+
+    repositorio = database.obter_repositorio()
+    with open(repositorio.diario.caminho, 'a', encoding='utf-8') as f:
+        f.write('{"seq": 99, "ops": [{"op": "mover", "de": {"turma"')
+
+    aulas = database.carregar_grade()
+    aulas[1].horario = 6
+    assert database.salvar_grade(aulas)
+    esperado = _posicoes(database.carregar_grade())
+    assert ("segunda", 6) in esperado
+    with open(repositorio.diario.caminho, encoding='utf-8') as f:
+        linhas = f.read().splitlines()
+    assert len(linhas) == 2 and '"seq": 99' not in linhas[-1]  # Um lote por linha, resto cortado
+
+    # Outro processo: repositório novo, lendo só o que está em disco
+    relido = database.RepositorioEscola(database.DB_FILE)
+    assert _posicoes(relido.colecao("aulas")) == esperado
+
+def test_versoes_com_linha_cortada_nao_perdem_versoes_seguintes(tmp_path):
+    """Versões salvas depois de uma gravação interrompida continuam na lista após reiniciar"""
+    from versoes_grade import RepositorioVersoes
+    caminho = str(tmp_path / "escola_database.json")
+    versoes = RepositorioVersoes(caminho)
+    aulas = [a.__dict__ for a in _aulas_iniciais()]
+    versoes.salvar("manhã", aulas)
+    with open(versoes.caminho, 'a', encoding='utf-8') as f:
+        f.write('{"tipo": "versao", "nome": "cortada", "ha')
+
+    aulas[0] = dict(aulas[0], horario=5)
+    versoes.salvar("tarde", aulas)
+
+    relido = RepositorioVersoes(caminho)
+    assert [v["nome"] for v in relido.listar()] == ["manhã", "tarde"]
+    assert ("segunda", 5) in [(a["dia"], a["horario"]) for a in relido.checkout("tarde")]
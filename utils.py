@@ -1,48 +1,15 @@
 # utils.py - Funções auxiliares para horários
 import streamlit as st
+from horarios import HORARIOS
+from models import inferir_segmento, segmento_da_turma
 
 def obter_segmento_turma(turma_nome):
-    """Determina o segmento da turma baseado no nome"""
-    turma_nome_lower = turma_nome.lower()
-    if 'em' in turma_nome_lower or '1em' in turma_nome_lower or '2em' in turma_nome_lower or '3em' in turma_nome_lower:
-        return "EM"
-    elif 'ano' in turma_nome_lower or '6' in turma_nome_lower or '7' in turma_nome_lower or '8' in turma_nome_lower or '9' in turma_nome_lower:
-        return "EF_II"
-    else:
-        # Tentar inferir
-        if any(s in turma_nome_lower for s in ['fundamental', 'ef', 'ii']):
-            return "EF_II"
-        else:
-            return "EM"  # Default para EM se não conseguir determinar
+    """Segmento da turma (resolvido uma vez em models.SEGMENTO_POR_TURMA)"""
+    return segmento_da_turma(turma_nome)
 
 def obter_horario_real(turma_nome, periodo):
-    """Retorna o horário real formatado - VERSÃO SIMPLIFICADA E CORRETA"""
-    segmento = obter_segmento_turma(turma_nome)
-    
-    if segmento == "EM":
-        # EM: 7 períodos de AULA
-        horarios = {
-            1: "07:00 - 07:50",
-            2: "07:50 - 08:40", 
-            3: "08:40 - 09:30",
-            # INTERVALO: 09:30-09:50 (não tem número)
-            4: "09:50 - 10:40",
-            5: "10:40 - 11:30",
-            6: "11:30 - 12:20",
-            7: "12:20 - 13:10"
-        }
-    else:
-        # EF II: 5 períodos de AULA
-        horarios = {
-            1: "07:50 - 08:40",
-            2: "08:40 - 09:30",
-            # INTERVALO: 09:30-09:50 (não tem número)
-            3: "09:50 - 10:40",
-            4: "10:40 - 11:30",
-            5: "11:30 - 12:20"
-        }
-    
-    return horarios.get(periodo, f"Período {periodo}")
+    """Retorna o horário real formatado (tabela única de horarios.py)"""
+    return HORARIOS.rotulo(obter_segmento_turma(turma_nome), periodo)
 
 def obter_periodos_disponiveis(turma_nome):
     """Retorna lista de períodos disponíveis"""
@@ -54,8 +21,7 @@ def obter_periodos_disponiveis(turma_nome):
 
 def calcular_carga_maxima(serie):
     """Calcula carga horária máxima"""
-    serie_lower = serie.lower()
-    if 'em' in serie_lower or serie_lower in ['1em', '2em', '3em']:
+    if inferir_segmento(serie) == "EM":
         return 35  # 7×5
     else:
         return 25  # 5×5
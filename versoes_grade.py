@@ -0,0 +1,247 @@
+# versoes_grade.py - Versões salvas da grade, gravadas como deltas
+"""
+Guarda as grades salvas com "💾 SALVAR GRADE" num arquivo ao lado do banco
+(`<banco>.versoes`, JSON Lines, só acrescenta linhas).
+
+- Conteúdo: cada grade distinta é identificada pelo hash do seu conteúdo
+  (a ordem das aulas não importa). Salvar de novo uma grade idêntica só cria
+  um novo nome apontando para o mesmo conteúdo.
+- Delta: o conteúdo é gravado como as operações (inserir / mover / remover)
+  em relação à grade-pai; uma grade completa ("base") é gravada quando não
+  há pai, quando o delta não compensa ou a cada INTERVALO_BASE deltas
+  encadeados, o que limita o custo de reconstruir qualquer versão.
+- Checkout: reaplica os deltas a partir da base mais próxima; as últimas
+  grades reconstruídas ficam em memória.
+- Gravação interrompida: o resto de linha que ela deixa no fim é cortado
+  antes do próximo registro, e linhas ilegíveis são puladas na leitura
+  (versões cujo conteúdo se perdeu nelas ficam de fora da lista).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import fields
+from datetime import datetime
+
+import database
+from diario_grade import aplicar_operacoes, calcular_operacoes, cortar_linha_incompleta, normalizar_aula
+from models import Aula
+
+# Número máximo de deltas encadeados antes de gravar uma grade completa
+INTERVALO_BASE = 16
+
+# Quantas grades reconstruídas ficam em memória
+TAMANHO_CACHE = 8
+
+_CAMPOS_AULA = {campo.name for campo in fields(Aula)}
+
+def _normalizar(aulas):
+    """Aulas (objetos ou dicts com campos extras) como dicts completos de Aula"""
+    normalizadas = []
+    for aula in aulas:
+        if isinstance(aula, dict):
+            aula = {k: v for k, v in aula.items() if k in _CAMPOS_AULA}
+        normalizadas.append(normalizar_aula(aula))
+    return normalizadas
+
+def hash_conteudo(aulas):
+    """Hash da grade, independente da ordem das aulas (dicts normalizados)"""
+    chaves = sorted(json.dumps(sorted(aula.items()), ensure_ascii=False) for aula in aulas)
+    return hashlib.sha256("\n".join(chaves).encode('utf-8')).hexdigest()[:16]
+
+class RepositorioVersoes:
+    """Versões nomeadas de grades, persistidas como deltas com deduplicação por hash"""
+
+    def __init__(self, caminho_banco):
+        self.caminho = caminho_banco + ".versoes"
+        self._lock = threading.RLock()
+        self._assinatura = None
+        self._conteudos = {}  # hash -> registro (base ou delta)
+        self._versoes = OrderedDict()  # nome -> metadados
+        self._cache = OrderedDict()  # hash -> aulas reconstruídas
+
+    def _assinatura_arquivo(self):
+        try:
+            info = os.stat(self.caminho)
+        except OSError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def _garantir_atualizado(self):
+        assinatura = self._assinatura_arquivo()
+        if assinatura == self._assinatura:
+            return
+        conteudos = {}
+        versoes = OrderedDict()
+        if assinatura is not None:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except json.JSONDecodeError:
+                        continue  # Resto de uma gravação interrompida
+                    if registro["tipo"] == "conteudo":
+                        conteudos[registro["hash"]] = registro
+                    elif registro["tipo"] == "versao":
+                        versoes.pop(registro["nome"], None)
+                        versoes[registro["nome"]] = registro
+                    elif registro["tipo"] == "remocao":
+                        versoes.pop(registro["nome"], None)
+        self._conteudos = conteudos
+        self._versoes = OrderedDict(
+            (nome, versao) for nome, versao in versoes.items() if self._reconstruivel(versao["hash"])
+        )
+        self._assinatura = assinatura
+
+    def _reconstruivel(self, hash_):
+        """Se a cadeia de deltas até uma base está completa"""
+        registro = self._conteudos.get(hash_)
+        while registro is not None and "base" not in registro:
+            registro = self._conteudos.get(registro["pai"])
+        return registro is not None
+
+    def _anexar(self, registros):
+        linhas = [json.dumps(r, ensure_ascii=False) for r in registros]
+        cortar_linha_incompleta(self.caminho)
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write("\n".join(linhas) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for registro in registros:
+            if registro["tipo"] == "conteudo":
+                self._conteudos[registro["hash"]] = registro
+            elif registro["tipo"] == "versao":
+                self._versoes.pop(registro["nome"], None)
+                self._versoes[registro["nome"]] = registro
+            elif registro["tipo"] == "remocao":
+                self._versoes.pop(registro["nome"], None)
+        self._assinatura = self._assinatura_arquivo()
+
+    def _guardar_cache(self, hash_, aulas):
+        self._cache[hash_] = aulas
+        self._cache.move_to_end(hash_)
+        while len(self._cache) > TAMANHO_CACHE:
+            self._cache.popitem(last=False)
+
+    def _reconstruir(self, hash_):
+        """Aulas (dicts normalizados) de um conteúdo, reaplicando a cadeia de deltas"""
+        if hash_ in self._cache:
+            self._cache.move_to_end(hash_)
+            return self._cache[hash_]
+
+        cadeia = []
+        atual = hash_
+        while atual not in self._cache:
+            registro = self._conteudos[atual]
+            if "base" in registro:
+                break
+            cadeia.append(registro)
+            atual = registro["pai"]
+
+        aulas = self._cache[atual] if atual in self._cache else self._conteudos[atual]["base"]
+        if atual not in self._cache:
+            self._guardar_cache(atual, aulas)
+        for registro in reversed(cadeia):
+            aulas = aplicar_operacoes(aulas, registro["ops"])
+        self._guardar_cache(hash_, aulas)
+        return aulas
+
+    def _profundidade(self, hash_):
+        profundidade = 0
+        registro = self._conteudos[hash_]
+        while "base" not in registro:
+            profundidade += 1
+            registro = self._conteudos[registro["pai"]]
+        return profundidade
+
+    # ============================================
+    # API
+    # ============================================
+
+    def salvar(self, nome, aulas, config=None, pai=None):
+        """
+        Salva a grade com o nome dado (substitui uma versão com o mesmo nome).
+
+        `pai` é o nome da versão de onde a grade veio; sem ele, o delta é
+        calculado contra a última versão salva.
+        """
+        aulas = _normalizar(aulas)
+        hash_ = hash_conteudo(aulas)
+        with self._lock:
+            self._garantir_atualizado()
+            registros = []
+
+            if hash_ not in self._conteudos:
+                if pai is None and self._versoes:
+                    pai = next(reversed(self._versoes))
+                hash_pai = self._versoes[pai]["hash"] if pai in self._versoes else None
+
+                registro = {"tipo": "conteudo", "hash": hash_, "base": aulas}
+                if hash_pai is not None and self._profundidade(hash_pai) + 1 < INTERVALO_BASE:
+                    operacoes = calcular_operacoes(self._reconstruir(hash_pai), aulas)
+                    # Delta só compensa se for menor que a grade inteira
+                    if len(operacoes) < len(aulas) // 2:
+                        registro = {"tipo": "conteudo", "hash": hash_, "pai": hash_pai, "ops": operacoes}
+                registros.append(registro)
+
+            versao = {
+                "tipo": "versao",
+                "nome": nome,
+                "hash": hash_,
+                "config": config,
+                "data": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "total_aulas": len(aulas),
+            }
+            registros.append(versao)
+            self._anexar(registros)
+            self._guardar_cache(hash_, aulas)
+            return versao
+
+    def listar(self):
+        """Metadados das versões salvas (sem as aulas), da mais antiga para a mais nova"""
+        with self._lock:
+            self._garantir_atualizado()
+            return [dict(v) for v in self._versoes.values()]
+
+    def checkout(self, nome):
+        """Aulas (dicts) da versão com esse nome"""
+        with self._lock:
+            self._garantir_atualizado()
+            if nome not in self._versoes:
+                raise KeyError(f"Versão de grade não encontrada: {nome}")
+            return [dict(aula) for aula in self._reconstruir(self._versoes[nome]["hash"])]
+
+    def remover(self, nome):
+        with self._lock:
+            self._garantir_atualizado()
+            if nome in self._versoes:
+                self._anexar([{"tipo": "remocao", "nome": nome}])
+
+    def estatisticas(self):
+        with self._lock:
+            self._garantir_atualizado()
+            deltas = sum(1 for r in self._conteudos.values() if "base" not in r)
+            try:
+                tamanho = os.path.getsize(self.caminho)
+            except OSError:
+                tamanho = 0
+            return {
+                "versoes": len(self._versoes),
+                "conteudos": len(self._conteudos),
+                "bases": len(self._conteudos) - deltas,
+                "deltas": deltas,
+                "tamanho_bytes": tamanho,
+            }
+
+_repositorios = {}
+_repositorios_lock = threading.Lock()
+
+def obter_versoes(caminho_banco=None):
+    """Repositório de versões associado ao banco atual"""
+    caminho = caminho_banco or database.DB_FILE
+    with _repositorios_lock:
+        if caminho not in _repositorios:
+            _repositorios[caminho] = RepositorioVersoes(caminho)
+        return _repositorios[caminho]